@@ -2,7 +2,7 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from logging.config import fileConfig
-from sqlalchemy import engine_from_config, pool, text
+from sqlalchemy import engine_from_config, pool
 from alembic import context
 from sqlmodel import SQLModel
 from app.models.models import Table, Reservation
@@ -41,7 +41,6 @@ def run_migrations_online():
             render_as_batch=True
         )
         with context.begin_transaction():
-            connection.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
             context.run_migrations()
 
 if context.is_offline_mode():
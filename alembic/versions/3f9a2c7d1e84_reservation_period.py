@@ -0,0 +1,49 @@
+"""reservation period column
+
+Revision ID: 3f9a2c7d1e84
+Revises: 641867c56258
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a2c7d1e84'
+down_revision: Union[str, None] = '641867c56258'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PERIOD_SQL = "tsrange(reservation_time, reservation_time + duration_minutes * interval '1 minute')"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.add_column(
+        'reservation',
+        sa.Column('period', postgresql.TSRANGE(), sa.Computed(PERIOD_SQL, persisted=True)),
+    )
+    op.drop_constraint('no_overlapping_reservations', 'reservation')
+    op.create_exclude_constraint(
+        'no_overlapping_reservations',
+        'reservation',
+        ('table_id', '='),
+        ('period', '&&'),
+        using='gist',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('no_overlapping_reservations', 'reservation')
+    op.execute(
+        "ALTER TABLE reservation ADD CONSTRAINT no_overlapping_reservations "
+        f"EXCLUDE USING gist (table_id WITH =, ({PERIOD_SQL}) WITH &&)"
+    )
+    op.drop_column('reservation', 'period')
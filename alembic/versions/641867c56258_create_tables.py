@@ -10,6 +10,7 @@ from typing import Sequence, Union
 from alembic import op
 import sqlalchemy as sa
 import sqlmodel
+from sqlalchemy.dialects import postgresql
 
 
 # revision identifiers, used by Alembic.
@@ -21,9 +22,37 @@ depends_on: Union[str, Sequence[str], None] = None
 
 def upgrade() -> None:
     """Upgrade schema."""
-    pass
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.create_table(
+        'table',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('seats', sa.Integer(), nullable=False),
+        sa.Column('location', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'reservation',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('customer_name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('table_id', sa.Integer(), nullable=False),
+        sa.Column('reservation_time', sa.DateTime(), nullable=True),
+        sa.Column('duration_minutes', sa.Integer(), nullable=False),
+        postgresql.ExcludeConstraint(
+            (sa.column('table_id'), '='),
+            (
+                sa.text("tsrange(reservation_time, reservation_time + duration_minutes * interval '1 minute')"),
+                '&&'
+            ),
+            using='gist',
+            name='no_overlapping_reservations',
+        ),
+        sa.ForeignKeyConstraint(['table_id'], ['table.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
 
 
 def downgrade() -> None:
     """Downgrade schema."""
-    pass
+    op.drop_table('reservation')
+    op.drop_table('table')
@@ -0,0 +1,33 @@
+"""list pagination indexes
+
+Revision ID: 8c41e5b0d2a7
+Revises: 3f9a2c7d1e84
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41e5b0d2a7'
+down_revision: Union[str, None] = '3f9a2c7d1e84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_table_location_id', 'table', ['location', 'id'])
+    op.create_index('ix_reservation_time_id', 'reservation', ['reservation_time', 'id'])
+    op.create_index('ix_reservation_table_id_time_id', 'reservation', ['table_id', 'reservation_time', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reservation_table_id_time_id', table_name='reservation')
+    op.drop_index('ix_reservation_time_id', table_name='reservation')
+    op.drop_index('ix_table_location_id', table_name='table')
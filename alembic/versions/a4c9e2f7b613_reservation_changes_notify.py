@@ -0,0 +1,104 @@
+"""reservation changes notify
+
+Revision ID: a4c9e2f7b613
+Revises: f3b8d1c6a2e9
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c9e2f7b613'
+down_revision: Union[str, None] = 'f3b8d1c6a2e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def create_triggers(function: str, table_trigger: str, reservation_trigger: str) -> None:
+    op.execute(
+        f'CREATE TRIGGER {table_trigger} AFTER INSERT OR DELETE ON "table" '
+        f"FOR EACH STATEMENT EXECUTE FUNCTION {function}()"
+    )
+    op.execute(
+        f"CREATE TRIGGER {reservation_trigger}_insert AFTER INSERT ON reservation "
+        f"REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION {function}()"
+    )
+    op.execute(
+        f"CREATE TRIGGER {reservation_trigger}_delete AFTER DELETE ON reservation "
+        f"REFERENCING OLD TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION {function}()"
+    )
+
+
+def drop_triggers(function: str, table_trigger: str, reservation_trigger: str) -> None:
+    op.execute(f"DROP TRIGGER {reservation_trigger}_delete ON reservation")
+    op.execute(f"DROP TRIGGER {reservation_trigger}_insert ON reservation")
+    op.execute(f'DROP TRIGGER {table_trigger} ON "table"')
+    op.execute(f"DROP FUNCTION {function}()")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    drop_triggers("notify_occupancy", "table_occupancy", "reservation_occupancy")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_reservation_changes() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_TABLE_NAME = 'table' THEN
+                PERFORM pg_notify('reservation_changes', 'tables');
+                RETURN NULL;
+            END IF;
+            PERFORM pg_notify('reservation_changes', string_agg(line, E'\\n' ORDER BY line_number))
+            FROM (
+                SELECT line, line_number,
+                       (sum(octet_length(line) + 1) OVER (ORDER BY line_number) - 1) / 6000 AS chunk
+                FROM (
+                    SELECT json_build_array(
+                               CASE TG_OP WHEN 'INSERT' THEN '+' ELSE '-' END,
+                               c.id,
+                               c.table_id,
+                               to_char(lower(c.period), 'YYYY-MM-DD"T"HH24:MI:SS.US'),
+                               to_char(upper(c.period), 'YYYY-MM-DD"T"HH24:MI:SS.US'),
+                               c.duration_minutes,
+                               left(c.customer_name, 100),
+                               left(t.location, 100))::text AS line,
+                           row_number() OVER () AS line_number
+                    FROM changed c
+                    LEFT JOIN "table" t ON t.id = c.table_id
+                    WHERE upper(c.period) >= LOCALTIMESTAMP - interval '1 day'
+                ) AS numbered
+            ) AS lines
+            GROUP BY chunk;
+            RETURN NULL;
+        END $$
+    """)
+    create_triggers("notify_reservation_changes", "table_changes", "reservation_changes")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_triggers("notify_reservation_changes", "table_changes", "reservation_changes")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_occupancy() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_TABLE_NAME = 'table' THEN
+                PERFORM pg_notify('occupancy', 'tables');
+                RETURN NULL;
+            END IF;
+            PERFORM pg_notify('occupancy', string_agg(line, E'\\n'))
+            FROM (
+                SELECT concat_ws(',',
+                           CASE TG_OP WHEN 'INSERT' THEN '+' ELSE '-' END,
+                           table_id,
+                           to_char(lower(period), 'YYYY-MM-DD"T"HH24:MI:SS.US'),
+                           to_char(upper(period), 'YYYY-MM-DD"T"HH24:MI:SS.US')) AS line,
+                       (row_number() OVER () - 1) / 100 AS chunk
+                FROM changed
+                WHERE upper(period) >= LOCALTIMESTAMP - interval '1 day'
+            ) AS lines
+            GROUP BY chunk;
+            RETURN NULL;
+        END $$
+    """)
+    create_triggers("notify_occupancy", "table_occupancy", "reservation_occupancy")
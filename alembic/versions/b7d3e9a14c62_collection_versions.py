@@ -0,0 +1,31 @@
+"""collection version sequences
+
+Revision ID: b7d3e9a14c62
+Revises: 8c41e5b0d2a7
+Create Date: 2026-10-18 01:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d3e9a14c62'
+down_revision: Union[str, None] = '8c41e5b0d2a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence('table_version_seq')))
+    op.execute(sa.schema.CreateSequence(sa.Sequence('reservation_version_seq')))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(sa.schema.DropSequence(sa.Sequence('reservation_version_seq')))
+    op.execute(sa.schema.DropSequence(sa.Sequence('table_version_seq')))
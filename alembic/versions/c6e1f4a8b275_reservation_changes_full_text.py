@@ -0,0 +1,95 @@
+"""reservation changes full text
+
+Revision ID: c6e1f4a8b275
+Revises: a4c9e2f7b613
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e1f4a8b275'
+down_revision: Union[str, None] = 'a4c9e2f7b613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_reservation_changes() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_TABLE_NAME = 'table' THEN
+                PERFORM pg_notify('reservation_changes', 'tables');
+                RETURN NULL;
+            END IF;
+            PERFORM pg_notify('reservation_changes', string_agg(line, E'\\n' ORDER BY line_number))
+            FROM (
+                SELECT line, line_number,
+                       CASE WHEN octet_length(line) > 1000 THEN -line_number
+                            ELSE (sum(CASE WHEN octet_length(line) > 1000
+                                           THEN 0 ELSE octet_length(line) + 1 END) OVER (ORDER BY line_number) - 1)
+                                 / 6000 END AS chunk
+                FROM (
+                    SELECT json_build_array(
+                               CASE TG_OP WHEN 'INSERT' THEN '+' ELSE '-' END,
+                               c.id,
+                               c.table_id,
+                               to_char(lower(c.period), 'YYYY-MM-DD"T"HH24:MI:SS.US'),
+                               to_char(upper(c.period), 'YYYY-MM-DD"T"HH24:MI:SS.US'),
+                               c.duration_minutes,
+                               CASE WHEN sizes.name + sizes.location <= 7800
+                                    THEN c.customer_name END,
+                               CASE WHEN sizes.location <= 7800 THEN t.location END)::text AS line,
+                           row_number() OVER () AS line_number
+                    FROM changed c
+                    LEFT JOIN "table" t ON t.id = c.table_id
+                    CROSS JOIN LATERAL (
+                        SELECT octet_length(to_json(c.customer_name)::text) AS name,
+                               coalesce(octet_length(to_json(t.location)::text), 0) AS location
+                    ) AS sizes
+                    WHERE upper(c.period) >= LOCALTIMESTAMP - interval '1 day'
+                ) AS numbered
+            ) AS lines
+            GROUP BY chunk;
+            RETURN NULL;
+        END $$
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_reservation_changes() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_TABLE_NAME = 'table' THEN
+                PERFORM pg_notify('reservation_changes', 'tables');
+                RETURN NULL;
+            END IF;
+            PERFORM pg_notify('reservation_changes', string_agg(line, E'\\n' ORDER BY line_number))
+            FROM (
+                SELECT line, line_number,
+                       (sum(octet_length(line) + 1) OVER (ORDER BY line_number) - 1) / 6000 AS chunk
+                FROM (
+                    SELECT json_build_array(
+                               CASE TG_OP WHEN 'INSERT' THEN '+' ELSE '-' END,
+                               c.id,
+                               c.table_id,
+                               to_char(lower(c.period), 'YYYY-MM-DD"T"HH24:MI:SS.US'),
+                               to_char(upper(c.period), 'YYYY-MM-DD"T"HH24:MI:SS.US'),
+                               c.duration_minutes,
+                               left(c.customer_name, 100),
+                               left(t.location, 100))::text AS line,
+                           row_number() OVER () AS line_number
+                    FROM changed c
+                    LEFT JOIN "table" t ON t.id = c.table_id
+                    WHERE upper(c.period) >= LOCALTIMESTAMP - interval '1 day'
+                ) AS numbered
+            ) AS lines
+            GROUP BY chunk;
+            RETURN NULL;
+        END $$
+    """)
@@ -0,0 +1,41 @@
+"""reservation archive
+
+Revision ID: e5a7c3d8f914
+Revises: d2e6f1a9b358
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a7c3d8f914'
+down_revision: Union[str, None] = 'd2e6f1a9b358'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'reservation_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('customer_name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('table_id', sa.Integer(), nullable=False),
+        sa.Column('reservation_time', sa.DateTime(), nullable=False),
+        sa.Column('duration_minutes', sa.Integer(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['table_id'], ['table.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_reservation_archive_table_id_time', 'reservation_archive', ['table_id', 'reservation_time'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reservation_archive_table_id_time', table_name='reservation_archive')
+    op.drop_table('reservation_archive')
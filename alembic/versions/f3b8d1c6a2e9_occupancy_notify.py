@@ -0,0 +1,63 @@
+"""occupancy notify triggers
+
+Revision ID: f3b8d1c6a2e9
+Revises: e5a7c3d8f914
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d1c6a2e9'
+down_revision: Union[str, None] = 'e5a7c3d8f914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION notify_occupancy() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_TABLE_NAME = 'table' THEN
+                PERFORM pg_notify('occupancy', 'tables');
+                RETURN NULL;
+            END IF;
+            PERFORM pg_notify('occupancy', string_agg(line, E'\\n'))
+            FROM (
+                SELECT concat_ws(',',
+                           CASE TG_OP WHEN 'INSERT' THEN '+' ELSE '-' END,
+                           table_id,
+                           to_char(lower(period), 'YYYY-MM-DD"T"HH24:MI:SS.US'),
+                           to_char(upper(period), 'YYYY-MM-DD"T"HH24:MI:SS.US')) AS line,
+                       (row_number() OVER () - 1) / 100 AS chunk
+                FROM changed
+                WHERE upper(period) >= LOCALTIMESTAMP - interval '1 day'
+            ) AS lines
+            GROUP BY chunk;
+            RETURN NULL;
+        END $$
+    """)
+    op.execute(
+        'CREATE TRIGGER table_occupancy AFTER INSERT OR DELETE ON "table" '
+        "FOR EACH STATEMENT EXECUTE FUNCTION notify_occupancy()"
+    )
+    op.execute(
+        "CREATE TRIGGER reservation_occupancy_insert AFTER INSERT ON reservation "
+        "REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION notify_occupancy()"
+    )
+    op.execute(
+        "CREATE TRIGGER reservation_occupancy_delete AFTER DELETE ON reservation "
+        "REFERENCING OLD TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION notify_occupancy()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER reservation_occupancy_delete ON reservation")
+    op.execute("DROP TRIGGER reservation_occupancy_insert ON reservation")
+    op.execute('DROP TRIGGER table_occupancy ON "table"')
+    op.execute("DROP FUNCTION notify_occupancy()")
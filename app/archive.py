@@ -0,0 +1,40 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from app.config import Settings, get_settings
+from app.database import dispose_engine
+from app.services.archive import archive_finished_reservations
+
+
+logger = logging.getLogger(__name__)
+
+
+async def run(config: Settings = None, max_batches: int = None) -> int:
+    """
+    Переносит в архив бронирования, закончившиеся больше ARCHIVE_AFTER_DAYS дней назад.
+
+    Запускается по расписанию (cron, CronJob) отдельно от сервера:
+        python -m app.archive
+
+    Returns:
+        int: Число перенесенных бронирований
+    """
+    config = config or get_settings()
+    before = datetime.now() - timedelta(days=config.archive_after_days)
+    logger.info("Архивация бронирований, закончившихся до %s", before)
+    try:
+        total = await archive_finished_reservations(before, config.archive_batch_size, max_batches)
+    finally:
+        await dispose_engine()
+    logger.info("Архивация завершена: перенесено %s бронирований", total)
+    return total
+
+
+if __name__ == "__main__":
+    from app.logging_config import setup_logging
+    parser = argparse.ArgumentParser(description="Перенос завершенных бронирований в reservation_archive")
+    parser.add_argument("--max-batches", type=int, default=None, help="Не больше стольких пачек за запуск")
+    args = parser.parse_args()
+    setup_logging()
+    asyncio.run(run(max_batches=args.max_batches))
@@ -0,0 +1,136 @@
+from dataclasses import dataclass
+from functools import lru_cache
+import os
+from dotenv import load_dotenv
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_list(name: str) -> tuple[str, ...]:
+    value = os.getenv(name) or ""
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Настройки приложения из переменных окружения (и файла .env).
+
+    Атрибуты:
+        database_url (str): URL основной БД (DATABASE_URL).
+        replica_urls (tuple[str, ...]): URL реплик для чтения через запятую, драйвер берется из database_url (DATABASE_REPLICA_URLS).
+        read_your_writes_seconds (float): Сколько секунд после своей записи клиент читает с основной БД, а не с реплик (READ_YOUR_WRITES_SECONDS).
+        pool_size (int): Постоянное число соединений в пуле (DB_POOL_SIZE).
+        max_overflow (int): Сколько соединений можно открыть сверх pool_size (DB_MAX_OVERFLOW).
+        pool_timeout (float): Сколько секунд ждать свободное соединение (DB_POOL_TIMEOUT).
+        pool_recycle (int): Через сколько секунд пересоздавать соединение, -1 — никогда (DB_POOL_RECYCLE).
+        pool_pre_ping (bool): Проверять соединение перед выдачей из пула (DB_POOL_PRE_PING).
+        pool_warmup (int): Сколько соединений открыть при старте воркера, не больше pool_size (DB_POOL_WARMUP).
+        table_cache_ttl (float): Сколько секунд кэш столиков считается свежим, 0 — кэш выключен (TABLE_CACHE_TTL).
+        table_cache_size (int): Сколько запросов к столикам хранит кэш (TABLE_CACHE_SIZE).
+        table_cache_notify (bool): Сбрасывать кэш столиков всех процессов через LISTEN/NOTIFY (TABLE_CACHE_NOTIFY).
+        archive_after_days (int): Через сколько дней после окончания бронирование переносится в архив (ARCHIVE_AFTER_DAYS).
+        archive_batch_size (int): Сколько бронирований переносится в архив одной транзакцией (ARCHIVE_BATCH_SIZE).
+        occupancy_slot_minutes (int): Размер слота индекса занятости столиков в минутах (OCCUPANCY_SLOT_MINUTES).
+        occupancy_horizon_days (int): На сколько дней вперед индекс хранит занятость, 0 — индекс выключен (OCCUPANCY_HORIZON_DAYS).
+        booking_queue (bool): Решать бронирования одного столика пачками в очереди процесса (BOOKING_QUEUE).
+        feed_buffer_size (int): Сколько событий ленты бронирований копится для клиента, пока он не отключен как медленный (FEED_BUFFER_SIZE).
+        feed_heartbeat (float): Через сколько секунд без событий лента отправляет клиенту heartbeat (FEED_HEARTBEAT).
+        idempotency_key_ttl (float): Сколько секунд хранится ответ на запрос с Idempotency-Key (IDEMPOTENCY_KEY_TTL).
+        compression_min_size (int): Ответы от этого размера в байтах сжимаются gzip или brotli, 0 — сжатие выключено (COMPRESSION_MIN_SIZE).
+        request_log_sample_rate (float): Доля запросов (0..1), которые логируются строкой JSON (REQUEST_LOG_SAMPLE_RATE).
+        slow_query_ms (float): Порог медленного SQL-запроса в мс, такие запросы логируются с планом, 0 — выключено (SLOW_QUERY_MS).
+        debug (bool): Режим отладки: ответы получают заголовки с числом и временем SQL-запросов (DEBUG).
+        host (str): Адрес, на котором слушает сервер (HOST).
+        port (int): Порт сервера (PORT).
+        workers (int): Число процессов-воркеров, 0 — по числу доступных CPU (WEB_CONCURRENCY).
+        backlog (int): Длина очереди входящих соединений сокета (BACKLOG).
+        keepalive_timeout (float): Сколько секунд держать простаивающее keep-alive соединение (KEEPALIVE_TIMEOUT).
+        graceful_timeout (float): Сколько секунд воркер дорабатывает начатые запросы при остановке (GRACEFUL_TIMEOUT).
+    """
+    database_url: str
+    replica_urls: tuple[str, ...] = ()
+    read_your_writes_seconds: float = 5.0
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    pool_warmup: int = 2
+    table_cache_ttl: float = 60.0
+    table_cache_size: int = 1024
+    table_cache_notify: bool = True
+    archive_after_days: int = 30
+    archive_batch_size: int = 5000
+    occupancy_slot_minutes: int = 15
+    occupancy_horizon_days: int = 60
+    booking_queue: bool = False
+    feed_buffer_size: int = 256
+    feed_heartbeat: float = 15.0
+    idempotency_key_ttl: float = 86400.0
+    compression_min_size: int = 1024
+    request_log_sample_rate: float = 0.0
+    slow_query_ms: float = 200.0
+    debug: bool = False
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 0
+    backlog: int = 2048
+    keepalive_timeout: float = 5.0
+    graceful_timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            database_url=os.getenv("DATABASE_URL"),
+            replica_urls=_env_list("DATABASE_REPLICA_URLS"),
+            read_your_writes_seconds=_env_float("READ_YOUR_WRITES_SECONDS", cls.read_your_writes_seconds),
+            pool_size=_env_int("DB_POOL_SIZE", cls.pool_size),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", cls.max_overflow),
+            pool_timeout=_env_float("DB_POOL_TIMEOUT", cls.pool_timeout),
+            pool_recycle=_env_int("DB_POOL_RECYCLE", cls.pool_recycle),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", cls.pool_pre_ping),
+            pool_warmup=_env_int("DB_POOL_WARMUP", cls.pool_warmup),
+            table_cache_ttl=_env_float("TABLE_CACHE_TTL", cls.table_cache_ttl),
+            table_cache_size=_env_int("TABLE_CACHE_SIZE", cls.table_cache_size),
+            table_cache_notify=_env_bool("TABLE_CACHE_NOTIFY", cls.table_cache_notify),
+            archive_after_days=_env_int("ARCHIVE_AFTER_DAYS", cls.archive_after_days),
+            archive_batch_size=_env_int("ARCHIVE_BATCH_SIZE", cls.archive_batch_size),
+            occupancy_slot_minutes=_env_int("OCCUPANCY_SLOT_MINUTES", cls.occupancy_slot_minutes),
+            occupancy_horizon_days=_env_int("OCCUPANCY_HORIZON_DAYS", cls.occupancy_horizon_days),
+            booking_queue=_env_bool("BOOKING_QUEUE", cls.booking_queue),
+            feed_buffer_size=_env_int("FEED_BUFFER_SIZE", cls.feed_buffer_size),
+            feed_heartbeat=_env_float("FEED_HEARTBEAT", cls.feed_heartbeat),
+            idempotency_key_ttl=_env_float("IDEMPOTENCY_KEY_TTL", cls.idempotency_key_ttl),
+            compression_min_size=_env_int("COMPRESSION_MIN_SIZE", cls.compression_min_size),
+            request_log_sample_rate=_env_float("REQUEST_LOG_SAMPLE_RATE", cls.request_log_sample_rate),
+            slow_query_ms=_env_float("SLOW_QUERY_MS", cls.slow_query_ms),
+            debug=_env_bool("DEBUG", cls.debug),
+            host=os.getenv("HOST") or cls.host,
+            port=_env_int("PORT", cls.port),
+            workers=_env_int("WEB_CONCURRENCY", cls.workers),
+            backlog=_env_int("BACKLOG", cls.backlog),
+            keepalive_timeout=_env_float("KEEPALIVE_TIMEOUT", cls.keepalive_timeout),
+            graceful_timeout=_env_float("GRACEFUL_TIMEOUT", cls.graceful_timeout),
+        )
+
+
+@lru_cache
+def get_settings() -> Settings:
+    load_dotenv()
+    return Settings.from_env()
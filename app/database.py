@@ -1,15 +1,404 @@
-from sqlmodel import create_engine, Session
+from contextlib import asynccontextmanager
+from functools import lru_cache, partial
+from itertools import count
+from typing import Optional, Union
+import logging
 import os
-from dotenv import load_dotenv
+import time
+import anyio
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import QueuePool
+from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from app.config import Settings, get_settings
+from app.metrics.pool import pool_metrics, InstrumentedAsyncQueuePool
+from app.metrics.queries import current_request_queries, query_metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def is_async_url(url: str) -> bool:
+    """
+    Определяет режим работы с БД по схеме URL.
+
+    postgresql+asyncpg://... — асинхронный драйвер (AsyncEngine/AsyncSession),
+    postgresql+psycopg2://... и postgresql://... — синхронный драйвер.
+    """
+    return make_url(url).get_dialect().is_async
+
+
+def create_db_engine(url: str, config: Optional[Settings] = None):
+    """
+    Создает движок БД под драйвер, указанный в URL, с настройками пула из config.
+
+    В async-режиме ожидание соединения замеряет сам пул (InstrumentedAsyncQueuePool),
+    в sync-режиме — ThreadPoolSession при захвате слота пула.
+
+    Returns:
+        AsyncEngine для асинхронного драйвера, Engine — для синхронного.
+    """
+    config = config or get_settings()
+    pool_options = dict(
+        pool_size=config.pool_size,
+        max_overflow=config.max_overflow,
+        pool_timeout=config.pool_timeout,
+        pool_recycle=config.pool_recycle,
+        pool_pre_ping=config.pool_pre_ping,
+    )
+    if is_async_url(url):
+        return create_async_engine(url, poolclass=InstrumentedAsyncQueuePool, **pool_options)
+    return create_engine(url, poolclass=QueuePool, **pool_options)
+
+
+# Планы строятся только для запросов, которые EXPLAIN принимает
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+
+def _explain(connection, statement: str, parameters) -> str:
+    """
+    План запроса (EXPLAIN без ANALYZE — запрос повторно не выполняется).
+
+    Выполняется отдельным курсором DBAPI того же соединения и мимо событий
+    движка, поэтому сам в метрики не попадает. SAVEPOINT не дает ошибке
+    EXPLAIN прервать транзакцию, в которой работает обработчик.
+    """
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(f"EXPLAIN {statement}", parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except Exception:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            raise
+        cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    finally:
+        cursor.close()
+
+
+def _log_slow_query(connection, statement, parameters, context, executemany, elapsed_ns) -> None:
+    plan = None
+    # Для executemany параметров несколько наборов, а открытый серверный
+    # курсор (stream_results) еще читается — план для них не строится
+    explainable = (
+        not executemany
+        and not context.execution_options.get("stream_results")
+        and statement.lstrip().split(None, 1)[0].upper() in EXPLAINABLE
+    )
+    if explainable:
+        try:
+            plan = _explain(connection, statement, parameters)
+        except Exception as e:
+            logger.warning("Не удалось получить план медленного запроса: %s", e)
+    logger.warning(
+        "Медленный запрос, %.1f мс: %s\n%s",
+        elapsed_ns / 1e6, " ".join(statement.split()), plan or "план недоступен",
+    )
+
+
+def instrument_queries(engine, slow_query_ms: float) -> None:
+    """
+    Подключает к движку замер времени каждого SQL-запроса.
+
+    Время запроса попадает в query_metrics (по нормализованному тексту) и в
+    счетчик текущего HTTP-запроса. Запрос дольше slow_query_ms логируется
+    вместе с планом выполнения; 0 отключает журнал медленных запросов.
+
+    Args:
+        engine: Engine или AsyncEngine
+        slow_query_ms (float): Порог медленного запроса, миллисекунды
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    slow_query_ns = slow_query_ms * 1_000_000
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        context.query_started_ns = time.perf_counter_ns()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        elapsed_ns = time.perf_counter_ns() - context.query_started_ns
+        seconds = elapsed_ns / 1e9
+        slow = bool(slow_query_ns) and elapsed_ns >= slow_query_ns
+        query_metrics.observe(statement, seconds, slow=slow)
+        request_queries = current_request_queries()
+        if request_queries is not None:
+            request_queries.count += 1
+            request_queries.seconds += seconds
+        if slow:
+            _log_slow_query(connection, statement, parameters, context, executemany, elapsed_ns)
+
+
+_engine = None
+_replica_engines: Optional[list] = None
+_replica_turn = count()
+_pool_slots: dict = {}
+
+
+def is_async_mode() -> bool:
+    """Работает ли приложение с асинхронным драйвером (по DATABASE_URL)."""
+    return is_async_url(get_settings().database_url)
+
+
+def get_engine():
+    """
+    Движок БД процесса, создается при первом обращении.
+
+    Импорт модулей приложения не загружает драйвер БД и не создает пул:
+    это происходит в воркере при старте (lifespan) или при первом запросе.
+    После dispose_engine следующий вызов создает новый движок.
+    """
+    global _engine
+    if _engine is None:
+        config = get_settings()
+        _engine = create_db_engine(config.database_url, config)
+        instrument_queries(_engine, config.slow_query_ms)
+    return _engine
+
+
+def get_replica_engines() -> list:
+    """
+    Движки реплик для чтения (DATABASE_REPLICA_URLS), создаются при первом обращении.
+
+    Драйвер реплик всегда тот же, что у основной БД: режим работы с БД один
+    на процесс. Пул каждой реплики настроен так же, как пул основной БД.
+    """
+    global _replica_engines
+    if _replica_engines is None:
+        config = get_settings()
+        drivername = make_url(config.database_url).drivername
+        _replica_engines = []
+        for url in config.replica_urls:
+            engine = create_db_engine(
+                make_url(url).set(drivername=drivername).render_as_string(hide_password=False), config
+            )
+            instrument_queries(engine, config.slow_query_ms)
+            _replica_engines.append(engine)
+    return _replica_engines
+
+
+def get_read_engine():
+    """Движок для чтения: реплики по кругу, без реплик — основная БД."""
+    replicas = get_replica_engines()
+    if not replicas:
+        return get_engine()
+    return replicas[next(_replica_turn) % len(replicas)]
+
+
+def _reset_pool_after_fork() -> None:
+    """
+    Сбрасывает пул в дочернем процессе после fork.
+
+    Воркеры uvicorn запускаются через spawn и создают движок сами, но при
+    fork (gunicorn --preload, multiprocessing) потомок унаследовал бы
+    открытые сокеты соединений родителя. dispose(close=False) заменяет пул
+    пустым, не закрывая унаследованные соединения — ими владеет родитель.
+    """
+    for engine in [_engine, *(_replica_engines or ())]:
+        if engine is not None:
+            getattr(engine, "sync_engine", engine).dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_reset_pool_after_fork)
+
 
+async def dispose_engine() -> None:
+    """Закрывает соединения пулов основной БД и реплик при остановке воркера."""
+    global _engine, _replica_engines
+    engines = [engine for engine in [_engine, *(_replica_engines or ())] if engine is not None]
+    _engine, _replica_engines = None, None
+    _pool_slots.clear()
+    for engine in engines:
+        if hasattr(engine, "sync_engine"):
+            await engine.dispose()
+        else:
+            await run_in_threadpool(engine.dispose)
 
-load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+# Сессия в sync-режиме держит соединение между вызовами в разных потоках.
+# Если все потоки пула заняты ожиданием соединения, то сессии, которые
+# соединения уже держат, не получат поток для продолжения — взаимная
+# блокировка. Поэтому слот пула соединений занимается асинхронно, до входа
+# в поток, и потоки никогда не ждут освобождения соединения. Слоты свои
+# у пула каждого движка (основной БД и каждой реплики).
+def _get_pool_slots(engine) -> anyio.Semaphore:
+    slots = _pool_slots.get(engine)
+    if slots is None:
+        config = get_settings()
+        slots = _pool_slots[engine] = anyio.Semaphore(config.pool_size + config.max_overflow)
+    return slots
 
-engine = create_engine(DATABASE_URL)
 
-def get_session():
-    with Session(engine) as session:
+def get_pool():
+    """Пул соединений текущего движка (для AsyncEngine — его sync_engine)."""
+    engine = get_engine()
+    return getattr(engine, "sync_engine", engine).pool
+
+
+async def _acquire_pool_slot(slots: anyio.Semaphore) -> anyio.Semaphore:
+    timeout = get_settings().pool_timeout
+    started = time.perf_counter()
+    try:
+        with anyio.fail_after(timeout):
+            await slots.acquire()
+    except TimeoutError:
+        pool_metrics.observe_wait(time.perf_counter() - started, timed_out=True)
+        raise PoolTimeoutError(f"Не удалось получить соединение из пула за {timeout} с")
+    pool_metrics.observe_wait(time.perf_counter() - started)
+    return slots
+
+
+class ThreadPoolResult:
+    """
+    Асинхронный интерфейс поверх потокового (server-side cursor) Result.
+
+    Аналог AsyncResult: каждая порция строк читается из курсора в пуле потоков.
+    """
+
+    def __init__(self, result):
+        self.sync_result = result
+
+    async def partitions(self, size=None):
+        partitions = self.sync_result.partitions(size)
+        while partition := await run_in_threadpool(next, partitions, None):
+            yield partition
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_result.close)
+
+
+class ThreadPoolSession:
+    """
+    Асинхронный интерфейс поверх синхронной Session.
+
+    Повторяет методы AsyncSession, которые используются в роутерах и сервисах,
+    и выполняет каждое обращение к БД в пуле потоков Starlette. Благодаря этому
+    обработчики пишутся один раз (async def) и работают с обоими драйверами.
+
+    Args:
+        session (Session): Синхронная сессия
+        slots (anyio.Semaphore, optional): Слоты пула движка сессии, по умолчанию — основной БД
+    """
+
+    def __init__(self, session: Session, slots: Optional[anyio.Semaphore] = None):
+        self.sync_session = session
+        self._slots = slots
+        self._slot: Optional[anyio.Semaphore] = None
+
+    async def _run(self, func, *args):
+        if self._slot is None:
+            slots = self._slots if self._slots is not None else _get_pool_slots(get_engine())
+            self._slot = await _acquire_pool_slot(slots)
+        return await run_in_threadpool(func, *args)
+
+    def add(self, instance) -> None:
+        self.sync_session.add(instance)
+
+    async def execute(self, statement, params=None):
+        return await self._run(self.sync_session.execute, statement, params)
+
+    async def stream(self, statement, params=None) -> ThreadPoolResult:
+        statement = statement.execution_options(stream_results=True)
+        return ThreadPoolResult(await self._run(self.sync_session.execute, statement, params))
+
+    async def get(self, entity, ident):
+        return await self._run(self.sync_session.get, entity, ident)
+
+    async def delete(self, instance) -> None:
+        await self._run(self.sync_session.delete, instance)
+
+    async def commit(self) -> None:
+        await self._run(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await self._run(self.sync_session.rollback)
+
+    async def refresh(self, instance) -> None:
+        await self._run(self.sync_session.refresh, instance)
+
+    async def close(self) -> None:
+        try:
+            await run_in_threadpool(self.sync_session.close)
+        finally:
+            if self._slot is not None:
+                slot, self._slot = self._slot, None
+                slot.release()
+
+
+DBSession = Union[AsyncSession, ThreadPoolSession]
+
+
+@asynccontextmanager
+async def session_scope(replica: bool = False):
+    """
+    Открывает сессию под текущий режим работы с БД и закрывает ее на выходе.
+
+    Используется там, где сессия живет дольше обработчика (потоковые ответы)
+    или вне HTTP-запроса.
+
+    Args:
+        replica (bool): Только для чтения: сессия на очередной реплике
+            (get_read_engine), без реплик — на основной БД
+    """
+    engine = get_read_engine() if replica else get_engine()
+    if is_async_mode():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+    else:
+        session = ThreadPoolSession(Session(engine), _get_pool_slots(engine))
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+# Cookie, которую ReadYourWritesMiddleware ставит клиенту после успешной записи
+LAST_WRITE_COOKIE = "last_write"
+
+
+def wrote_recently(request: Request) -> bool:
+    """Записывал ли клиент данные за последние READ_YOUR_WRITES_SECONDS секунд (по cookie)."""
+    written_at = request.cookies.get(LAST_WRITE_COOKIE)
+    if written_at is None:
+        return False
+    try:
+        return time.time() - float(written_at) < get_settings().read_your_writes_seconds
+    except ValueError:
+        return False
+
+
+async def get_session():
+    """Сессия на основной БД: для записи и чтения, которое должно видеть последние изменения."""
+    async with session_scope() as session:
+        yield session
+
+
+async def get_read_session(request: Request):
+    """
+    Сессия для чтения: списки и поиск свободного времени.
+
+    Запросы идут на реплики по кругу. Клиент, который недавно сам что-то
+    записал, читает с основной БД, пока реплики могут еще не видеть его
+    изменений (read-your-writes).
+    """
+    async with session_scope(replica=not wrote_recently(request)) as session:
         yield session
 
+
+def get_read_session_scope(request: Request):
+    """
+    Зависимость для потоковых ответов: отдает фабрику сессий, а не сессию.
+
+    Сессия из get_read_session закрывается до отправки тела StreamingResponse,
+    поэтому генератор тела открывает собственную сессию через эту фабрику.
+    БД выбирается так же, как для get_read_session.
+    """
+    return partial(session_scope, replica=not wrote_recently(request))
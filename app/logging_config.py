@@ -1,8 +1,11 @@
-from pathlib import Path
+import atexit
+import logging
+import queue
 from logging.config import dictConfig
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
 
 LOG_DIR = Path("logs")
-LOG_DIR.mkdir(exist_ok=True)
 
 LOG_CONFIG = {
     "version": 1,
@@ -65,5 +68,74 @@ LOG_CONFIG = {
     },
 }
 
-def setup_logging():
-    dictConfig(LOG_CONFIG)
\ No newline at end of file
+_listeners: list[QueueListener] = []
+
+# Логгеры, записи которых форматируются в потоке QueueListener, а не при вызове
+DEFERRED_FORMAT_LOGGERS = ("uvicorn.access",)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler, который не форматирует запись в потоке вызова.
+
+    Стандартный prepare() подставляет аргументы и заменяет args на None еще
+    в обработчике запроса, а AccessFormatter uvicorn читает record.args. Только
+    для uvicorn.access: его аргументы — строки и числа, которые не изменятся,
+    пока запись ждет в очереди, и исключений в этих записях не бывает.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def stop_logging() -> None:
+    """Останавливает фоновые потоки логирования, дописав записи из очередей."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
+def _start_queue_listeners(logger_names) -> None:
+    """
+    Переносит обработчики логгеров за очередь.
+
+    Логгеры с одинаковым набором обработчиков (корневой и uvicorn.error)
+    делят одну очередь и один поток QueueListener. Сами обработчики (консоль,
+    файлы с ротацией) вызываются только в этом потоке, а логгер в потоке
+    запроса лишь кладет запись в очередь. Сообщение подставляется при вызове
+    (QueueHandler.prepare): изменяемые аргументы попадают в лог такими, какими
+    были, а запись не держит кадры трассировки исключения. Исключение —
+    DEFERRED_FORMAT_LOGGERS (см. DeferredQueueHandler).
+    """
+    queue_handlers: dict[tuple, QueueHandler] = {}
+    for name in logger_names:
+        logger = logging.getLogger(name or None)
+        handlers = tuple(logger.handlers)
+        if not handlers:
+            continue
+        if handlers not in queue_handlers:
+            records = queue.SimpleQueue()
+            handler_class = DeferredQueueHandler if name in DEFERRED_FORMAT_LOGGERS else QueueHandler
+            queue_handlers[handlers] = handler_class(records)
+            listener = QueueListener(records, *handlers, respect_handler_level=True)
+            listener.start()
+            _listeners.append(listener)
+        logger.handlers = [queue_handlers[handlers]]
+
+
+def setup_logging(config: dict = LOG_CONFIG) -> None:
+    """
+    Настраивает логирование: обработчики из config работают в фоновых потоках.
+
+    Вызов из обработчика запроса не выполняет ввод-вывод и не ждет блокировку
+    ротации файла; записи дописываются при завершении процесса (atexit).
+    Каталоги файлов логов создаются здесь, а не при импорте модуля.
+    """
+    stop_logging()
+    for handler in config["handlers"].values():
+        if "filename" in handler:
+            Path(handler["filename"]).parent.mkdir(parents=True, exist_ok=True)
+    dictConfig(config)
+    _start_queue_listeners(config["loggers"])
+
+
+atexit.register(stop_logging)
@@ -1,31 +1,88 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.responses import HTMLResponse
-import uvicorn
 import logging
 from app.logging_config import setup_logging
+from app.middleware.compression import setup_compression
+from app.middleware.logging_middleware import setup_request_logging
+from app.middleware.read_your_writes import setup_read_your_writes
 from app.routers.tables import router_tab
 from app.routers.reservations import router_res
+from app.routers.metrics import router_metrics
+from app.config import Settings, get_settings
+from app.database import dispose_engine, session_scope
+from app.services.booking_queue import booking_queue
+from app.services.idempotency import purge_expired_keys
+from app.services.occupancy import maintain_occupancy_index, occupancy_index
+from app.services.reservation_feed import reservation_feed
+from app.services.table import table_cache, table_cache_listener
+from app.services.warmup import warm_up_pool
 
 
-setup_logging()
 logger = logging.getLogger(__name__)
 
 
-@asynccontextmanager
-async def lifespan(appi: FastAPI):
-    _ = appi
-    logger.info("Запуск приложения...")
-    yield
-    logger.info("Завершение работы приложения...")
+async def purge_idempotency_keys(ttl: float) -> None:
+    """Удаляет при старте воркера ключи Idempotency-Key с истекшим сроком."""
+    try:
+        async with session_scope() as session:
+            purged = await purge_expired_keys(session, ttl)
+        logger.info("Удалено устаревших ключей Idempotency-Key: %s", purged)
+    except Exception as e:
+        logger.warning("Не удалось удалить устаревшие ключи Idempotency-Key: %s", e)
 
 
-app = FastAPI(lifespan=lifespan)
-app.include_router(router_res)
-app.include_router(router_tab)
+def create_app(config: Settings = None) -> FastAPI:
+    """
+    Собирает приложение: маршруты, телеметрию запросов и lifespan.
+
+    Импорт и сборка не открывают соединений и не настраивают логирование:
+    движок БД создается при первом обращении, а логирование, прогрев пула,
+    слушатели кэша и индекса занятости запускаются в lifespan каждого воркера.
+    """
+    config = config or get_settings()
+    table_cache.configure(config.table_cache_size, config.table_cache_ttl)
+    booking_queue.enabled = config.booking_queue
+    occupancy_index.configure(config.occupancy_slot_minutes, config.occupancy_horizon_days)
+    reservation_feed.configure(config.feed_buffer_size, config.feed_heartbeat)
+
+    @asynccontextmanager
+    async def lifespan(appi: FastAPI):
+        _ = appi
+        setup_logging()
+        logger.info("Запуск приложения...")
+        await warm_up_pool(min(config.pool_warmup, config.pool_size))
+        await purge_idempotency_keys(config.idempotency_key_ttl)
+        listener = None
+        if config.table_cache_notify and table_cache.enabled:
+            listener = table_cache_listener()
+            listener.start()
+        try:
+            async with maintain_occupancy_index():
+                yield
+        finally:
+            if listener is not None:
+                listener.stop()
+            # Пачки бронирований держат соединения: дождаться их до закрытия движка
+            await booking_queue.close()
+            await reservation_feed.close()
+            await dispose_engine()
+            logger.info("Завершение работы приложения...")
+
+    application = FastAPI(lifespan=lifespan)
+    # Сжатие — внутри телеметрии: время ответа включает сжатие
+    if config.compression_min_size:
+        setup_compression(application, config.compression_min_size)
+    setup_request_logging(application, config.request_log_sample_rate, config.debug)
+    if config.replica_urls:
+        setup_read_your_writes(application, config.read_your_writes_seconds)
+    application.include_router(router_res)
+    application.include_router(router_tab)
+    application.include_router(router_metrics)
+    application.add_api_route("/", read_root, response_class=HTMLResponse)
+    return application
 
 
-@app.get("/", response_class=HTMLResponse)
 def read_root():
     logger.info("Accessed root endpoint")
     return """
@@ -38,11 +95,9 @@ def read_root():
     """
 
 
+app = create_app()
+
+
 if __name__ == "__main__":
-    logger.info("Starting server...")
-    uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=8000,
-        log_config=None,
-    )
+    from app.server import run
+    run()
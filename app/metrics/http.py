@@ -0,0 +1,89 @@
+import threading
+from bisect import bisect_left
+from app.metrics.prometheus import family, sample
+
+
+# Границы корзин гистограммы длительности запроса, секунды
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Метка маршрута для запросов, не совпавших ни с одним маршрутом: сырой URL
+# в метке дал бы неограниченное число рядов
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum_seconds", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum_seconds = 0.0
+        self.count = 0
+
+
+class HttpMetrics:
+    """
+    Метрики HTTP-запросов в памяти процесса.
+
+    Гистограмма длительности по (метод, шаблон маршрута) и счетчик ответов
+    по (метод, шаблон маршрута, статус), а также число SQL-запросов по
+    маршруту. Шаблон (/tables/{table_id}), а не сырой URL, держит число
+    рядов ограниченным.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms: dict[tuple[str, str], _Histogram] = {}
+            self._responses: dict[tuple[str, str, int], int] = {}
+            self._queries: dict[tuple[str, str], int] = {}
+
+    def observe(self, method: str, route: str, status: int, duration_ns: int, queries: int = 0) -> None:
+        seconds = duration_ns / 1e9
+        with self._lock:
+            histogram = self._histograms.get((method, route))
+            if histogram is None:
+                histogram = self._histograms[(method, route)] = _Histogram()
+            histogram.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            histogram.sum_seconds += seconds
+            histogram.count += 1
+            key = (method, route, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+            self._queries[(method, route)] = self._queries.get((method, route), 0) + queries
+
+    def prometheus(self) -> list[list[str]]:
+        """Семейства метрик в текстовом формате Prometheus."""
+        with self._lock:
+            histograms = [(key, list(h.counts), h.sum_seconds, h.count) for key, h in self._histograms.items()]
+            responses = list(self._responses.items())
+            queries = list(self._queries.items())
+
+        duration = []
+        for (method, route), counts, sum_seconds, count in sorted(histograms):
+            labels = {"method": method, "route": route}
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, counts):
+                cumulative += bucket_count
+                duration.append(sample("http_request_duration_seconds_bucket", cumulative, {**labels, "le": bound}))
+            duration.append(sample("http_request_duration_seconds_bucket", count, {**labels, "le": "+Inf"}))
+            duration.append(sample("http_request_duration_seconds_sum", round(sum_seconds, 6), labels))
+            duration.append(sample("http_request_duration_seconds_count", count, labels))
+
+        return [
+            family("http_request_duration_seconds", "histogram",
+                   "Длительность обработки HTTP-запроса", duration),
+            family("http_responses_total", "counter", "Число HTTP-ответов", [
+                sample("http_responses_total", value, {"method": method, "route": route, "status": status})
+                for (method, route, status), value in sorted(responses)
+            ]),
+            # Отношение к http_request_duration_seconds_count — SQL-запросов на HTTP-запрос
+            family("http_request_db_queries_total", "counter", "SQL-запросы при обработке HTTP-запросов", [
+                sample("http_request_db_queries_total", value, {"method": method, "route": route})
+                for (method, route), value in sorted(queries)
+            ]),
+        ]
+
+
+http_metrics = HttpMetrics()
@@ -0,0 +1,83 @@
+import threading
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    """
+    Метрики пула соединений: ожидание выдачи соединения и тайм-ауты.
+
+    Текущее число выданных соединений и использование overflow берутся
+    из самого пула в момент снятия снимка (snapshot).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def observe_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self, pool: QueuePool) -> dict:
+        """
+        Возвращает состояние пула и накопленные метрики ожидания.
+
+        Args:
+            pool (QueuePool): Пул соединений движка
+
+        Returns:
+            dict: Размер пула, занятые соединения, overflow и время ожидания
+        """
+        size = pool.size()
+        checked_out = pool.checkedout()
+        with self._lock:
+            waits = self.checkouts + self.timeouts
+            return {
+                "pool_size": size,
+                "max_overflow": pool._max_overflow,
+                "checked_out": checked_out,
+                "checked_in": pool.checkedin(),
+                "overflow_in_use": max(0, checked_out - size),
+                "checkouts_total": self.checkouts,
+                "checkout_timeouts_total": self.timeouts,
+                "checkout_wait_seconds_total": round(self.wait_seconds_total, 6),
+                "checkout_wait_seconds_avg": round(self.wait_seconds_total / waits, 6) if waits else 0.0,
+                "checkout_wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class _TimedCheckoutMixin:
+    """Замеряет, сколько запрос ждал соединение в очереди пула."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.observe_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.observe_wait(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    # Логгер пула — в иерархии sqlalchemy, как у пулов SQLAlchemy: уровень
+    # WARN логгера sqlalchemy скрывает сообщения о пересоздании и закрытии пула
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.InstrumentedAsyncQueuePool"
@@ -0,0 +1,22 @@
+from typing import Iterable
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def sample(name: str, value: float, labels: dict | None = None) -> str:
+    """Строка значения метрики в текстовом формате Prometheus."""
+    if labels:
+        rendered = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+        return f"{name}{{{rendered}}} {value}"
+    return f"{name} {value}"
+
+
+def family(name: str, kind: str, help_text: str, samples: Iterable[str]) -> list[str]:
+    """Семейство метрик: строки HELP и TYPE, затем значения."""
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", *samples]
+
+
+def render(*families: list[str]) -> str:
+    return "\n".join(line for lines in families for line in lines) + "\n"
@@ -0,0 +1,154 @@
+import contextvars
+import re
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, Optional
+from app.metrics.prometheus import family, sample
+
+
+# Сколько разных текстов запросов хранится; остальные учитываются под OTHER_STATEMENT
+MAX_STATEMENTS = 500
+OTHER_STATEMENT = "<other>"
+
+_WHITESPACE = re.compile(r"\s+")
+# Многострочный VALUES (insertmanyvalues) и развернутый IN (...): текст зависит
+# от размера пачки, поэтому списки сворачиваются до первого элемента.
+# Скобки плейсхолдеров psycopg2 (%(name)s) входят в элемент списка.
+_ITEM = r"(?:%\(\w+\)s|[^()])"
+_VALUES_ROWS = re.compile(rf"(\({_ITEM}*\))(?:\s*,\s*\({_ITEM}*\))+")
+_IN_LIST = re.compile(rf"\bIN \(({_ITEM}*?),{_ITEM}*\)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def normalize_statement(statement: str) -> str:
+    """
+    Текст запроса для агрегации: без лишних пробелов, со свернутыми списками значений.
+
+    Параметры в тексте уже заменены плейсхолдерами драйвера, поэтому
+    одинаковые запросы с разными значениями совпадают, а нормализация
+    каждого текста выполняется один раз.
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _VALUES_ROWS.sub(r"\1, ...", statement)
+    return _IN_LIST.sub(r"IN (\1, ...)", statement)
+
+
+class _StatementStats:
+    __slots__ = ("count", "seconds_total", "seconds_max")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds_total = 0.0
+        self.seconds_max = 0.0
+
+
+class QueryMetrics:
+    """
+    Время выполнения SQL-запросов, сгруппированное по нормализованному тексту.
+
+    Заполняется хуками движка before/after_cursor_execute (app/database.py).
+    Время — от отправки запроса драйверу до получения результата, без
+    выборки строк в Python и без COMMIT.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements: dict[str, _StatementStats] = {}
+            self.slow_queries = 0
+
+    def observe(self, statement: str, seconds: float, slow: bool = False) -> None:
+        key = normalize_statement(statement)
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                if len(self._statements) >= MAX_STATEMENTS:
+                    key = OTHER_STATEMENT
+                stats = self._statements.setdefault(key, _StatementStats())
+            stats.count += 1
+            stats.seconds_total += seconds
+            stats.seconds_max = max(stats.seconds_max, seconds)
+            if slow:
+                self.slow_queries += 1
+
+    def snapshot(self, limit: int = 20) -> dict:
+        """
+        Самые затратные запросы по суммарному времени.
+
+        Args:
+            limit (int): Сколько запросов вернуть
+
+        Returns:
+            dict: Общие счетчики и список запросов с числом выполнений и временем
+        """
+        with self._lock:
+            rows = [(key, s.count, s.seconds_total, s.seconds_max) for key, s in self._statements.items()]
+            slow_queries = self.slow_queries
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return {
+            "queries_total": sum(row[1] for row in rows),
+            "seconds_total": round(sum(row[2] for row in rows), 6),
+            "slow_queries_total": slow_queries,
+            "statements": [
+                {
+                    "statement": statement,
+                    "count": count,
+                    "seconds_total": round(total, 6),
+                    "seconds_avg": round(total / count, 6),
+                    "seconds_max": round(maximum, 6),
+                }
+                for statement, count, total, maximum in rows[:limit]
+            ],
+        }
+
+    def prometheus(self) -> list[list[str]]:
+        """Суммарные счетчики запросов в текстовом формате Prometheus."""
+        snapshot = self.snapshot(limit=0)
+        return [
+            family("db_queries_total", "counter", "Выполненные SQL-запросы",
+                   [sample("db_queries_total", snapshot["queries_total"])]),
+            family("db_query_seconds_total", "counter", "Суммарное время SQL-запросов, секунды",
+                   [sample("db_query_seconds_total", snapshot["seconds_total"])]),
+            family("db_slow_queries_total", "counter", "SQL-запросы дольше порога SLOW_QUERY_MS",
+                   [sample("db_slow_queries_total", snapshot["slow_queries_total"])]),
+        ]
+
+
+query_metrics = QueryMetrics()
+
+
+class RequestQueries:
+    """Число и суммарное время SQL-запросов одного HTTP-запроса."""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Счетчик текущего запроса. Контекст копируется в задачи и в потоки
+# run_in_threadpool, а счетчик — изменяемый объект, поэтому запросы из
+# пула потоков и из greenlet asyncpg попадают в счетчик своего HTTP-запроса.
+_request_queries: contextvars.ContextVar[Optional[RequestQueries]] = contextvars.ContextVar(
+    "request_queries", default=None
+)
+
+
+@contextmanager
+def track_request_queries() -> Iterator[RequestQueries]:
+    """Считает SQL-запросы, выполненные внутри блока (и в порожденных им задачах)."""
+    queries = RequestQueries()
+    token = _request_queries.set(queries)
+    try:
+        yield queries
+    finally:
+        _request_queries.reset(token)
+
+
+def current_request_queries() -> Optional[RequestQueries]:
+    return _request_queries.get()
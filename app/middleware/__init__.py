@@ -1 +1,3 @@
-from .logging_middleware import log_requests
+from .compression import CompressionMiddleware, setup_compression
+from .logging_middleware import RequestTelemetryMiddleware, setup_request_logging
+from .read_your_writes import ReadYourWritesMiddleware, setup_read_your_writes
@@ -0,0 +1,155 @@
+import gzip
+import logging
+from typing import Optional
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Brotli необязателен: без него ответы сжимаются только gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Уровни подобраны бенчмарком benchmarks.compression: на списках бронирований
+# gzip 9 и brotli 6 в 2-4 раза дороже по CPU и дают ответ меньше на 10-15%
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+# Тело меньше сжимается прямо в цикле событий: gzip 16 КБ занимает столько же,
+# сколько переход в поток и обратно (~75 мкс). Большие тела сжимаются в пуле
+# потоков (zlib и brotli отпускают GIL) и не задерживают другие запросы
+THREAD_MIN_SIZE = 16 * 1024
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def supported_encodings() -> tuple[str, ...]:
+    """Поддерживаемые кодировки в порядке предпочтения."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Выбирает кодировку ответа по заголовку Accept-Encoding.
+
+    Берется поддерживаемая кодировка с наибольшим q (q=0 — запрет, * — любая
+    не перечисленная); при равных q br предпочтительнее gzip.
+
+    Returns:
+        str | None: "br", "gzip" или None, если сжимать нельзя
+    """
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+
+    best, best_weight = None, 0.0
+    for coding in supported_encodings():
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    ASGI-middleware сжатия ответов gzip или brotli по Accept-Encoding.
+
+    Сжимаются только ответы целиком (одно сообщение тела) текстовых типов
+    не меньше minimum_size байт, без своего Content-Encoding. Потоковые
+    ответы (выгрузка, лента SSE) передаются как есть: буферизация задержала
+    бы события и заняла память на всю выгрузку. Если сжатие не уменьшило
+    тело, уходит исходное. Vary: Accept-Encoding получает каждый ответ,
+    который мог быть сжат, — и отправленный без сжатия клиенту без gzip и br:
+    иначе общий кэш отдаст его клиентам с другим Accept-Encoding.
+
+    Args:
+        app (ASGIApp): Приложение
+        minimum_size (int): Ответы меньше не сжимаются, байты
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Заголовки отправляются вместе с первым телом, когда известен его размер
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            response_start, start = start, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=list(response_start.get("headers", [])))
+            if message.get("more_body") or not self._compressible(headers, body):
+                await send(response_start)
+                await send(message)
+                return
+
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is not None:
+                if len(body) < THREAD_MIN_SIZE:
+                    compressed = compress(body, encoding)
+                else:
+                    compressed = await anyio.to_thread.run_sync(compress, body, encoding)
+                if len(compressed) < len(body):
+                    body = compressed
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+            response_start["headers"] = headers.raw
+            await send(response_start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, headers: MutableHeaders, body: bytes) -> bool:
+        content_type = headers.get("content-type", "")
+        return (
+            len(body) >= self.minimum_size
+            and "content-encoding" not in headers
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+            and not content_type.startswith("text/event-stream")
+        )
+
+
+def setup_compression(app, minimum_size: int) -> None:
+    """
+    Подключает сжатие ответов к FastAPI приложению.
+
+    Args:
+        app (FastAPI): Экземпляр FastAPI приложения
+        minimum_size (int): Ответы меньше не сжимаются, байты
+    """
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size)
+    logger.info("Сжатие ответов подключено (%s) от %s байт", ", ".join(supported_encodings()), minimum_size)
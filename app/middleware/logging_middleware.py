@@ -1,75 +1,110 @@
+import json
 import logging
-from fastapi import Request
+import random
 import time
-from typing import Any
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.metrics.http import UNMATCHED_ROUTE, HttpMetrics, http_metrics
+from app.metrics.queries import RequestQueries, track_request_queries
 
 logger = logging.getLogger(__name__)
 
 
-async def log_requests(request: Request, call_next) -> Any:
+class RequestTelemetryMiddleware:
     """
-    Middleware для логирования входящих HTTP-запросов и ответов.
+    ASGI-middleware телеметрии HTTP-запросов.
 
-    Логирует:
-    - Метод и URL запроса
-    - Клиентский IP-адрес
-    - Время обработки запроса
-    - Статус ответа
-    - Ошибки (если возникают)
+    Для каждого запроса замеряет длительность (perf_counter_ns) до отправки
+    последнего байта ответа и записывает ее в гистограмму маршрута вместе со
+    статусом. Маршрут берется из scope["route"] после обработки — это шаблон
+    пути (/tables/{table_id}), а не сырой URL.
 
-    Args:
-        request (Request): Входящий HTTP-запрос
-        call_next (Callable): Функция для обработки запроса
-
-    Returns:
-        Response: HTTP-ответ
-    """
-    start_time = time.time()
-
-    client_ip = request.client.host if request.client else "unknown"
-
-    try:
-        logger.info(
-            f"Incoming request | IP: {client_ip} | "
-            f"Method: {request.method} | Path: {request.url.path}"
-        )
-
-        response = await call_next(request)
-
-        process_time = (time.time() - start_time) * 1000
-        process_time_str = f"{process_time:.2f}ms"
+    Считает SQL-запросы, выполненные при обработке, — рост их числа на
+    маршруте выдает N+1. В режиме отладки число и время запросов к БД на
+    момент отправки заголовков возвращаются в X-DB-Query-Count и Server-Timing.
 
-        logger.info(
-            f"Completed request | IP: {client_ip} | "
-            f"Method: {request.method} | Path: {request.url.path} | "
-            f"Status: {response.status_code} | Duration: {process_time_str}"
-        )
-
-        return response
-
-    except Exception as exc:
-        error_time = (time.time() - start_time) * 1000
-        error_time_str = f"{error_time:.2f}ms"
-
-        logger.error(
-            f"Request failed | IP: {client_ip} | "
-            f"Method: {request.method} | Path: {request.url.path} | "
-            f"Error: {str(exc)} | Duration: {error_time_str}",
-            exc_info=True
-        )
-
-        raise
+    В отличие от BaseHTTPMiddleware, не оборачивает запрос и ответ в объекты
+    и не запускает тело ответа в отдельной задаче. Строка лога в JSON пишется
+    только для доли запросов sample_rate (по умолчанию — ни для одного).
 
+    Args:
+        app (ASGIApp): Приложение
+        metrics (HttpMetrics): Хранилище метрик
+        sample_rate (float): Доля запросов (0..1), которые логируются
+        debug (bool): Добавлять в ответ заголовки с числом и временем SQL-запросов
+    """
 
-def setup_request_logging(app) -> None:
+    def __init__(
+            self,
+            app: ASGIApp,
+            metrics: HttpMetrics = http_metrics,
+            sample_rate: float = 0.0,
+            debug: bool = False,
+    ):
+        self.app = app
+        self.metrics = metrics
+        self.sample_rate = sample_rate
+        self.debug = debug
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter_ns()
+        status = 500
+
+        with track_request_queries() as queries:
+            async def send_with_status(message: Message) -> None:
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    if self.debug:
+                        message["headers"] = [*message.get("headers", ()), *self._debug_headers(queries)]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                duration_ns = time.perf_counter_ns() - started
+                route = scope.get("route")
+                route_path = route.path if route is not None else UNMATCHED_ROUTE
+                self.metrics.observe(scope["method"], route_path, status, duration_ns, queries.count)
+                if self.sample_rate and random.random() < self.sample_rate:
+                    self._log(scope, route_path, status, duration_ns, queries)
+
+    @staticmethod
+    def _debug_headers(queries: RequestQueries) -> list[tuple[bytes, bytes]]:
+        return [
+            (b"x-db-query-count", str(queries.count).encode()),
+            (b"server-timing", f'db;dur={queries.seconds * 1000:.3f};desc="{queries.count} queries"'.encode()),
+        ]
+
+    @staticmethod
+    def _log(scope: Scope, route_path: str, status: int, duration_ns: int, queries: RequestQueries) -> None:
+        client = scope.get("client")
+        logger.info("%s", json.dumps({
+            "method": scope["method"],
+            "route": route_path,
+            "path": scope["path"],
+            "status": status,
+            "duration_ms": round(duration_ns / 1e6, 3),
+            "db_queries": queries.count,
+            "db_ms": round(queries.seconds * 1000, 3),
+            "client": client[0] if client else None,
+        }, ensure_ascii=False))
+
+
+def setup_request_logging(app, sample_rate: float = 0.0, debug: bool = False) -> None:
     """
-    Настраивает логирование запросов для FastAPI приложения.
+    Подключает телеметрию запросов к FastAPI приложению.
 
     Args:
         app (FastAPI): Экземпляр FastAPI приложения
+        sample_rate (float): Доля запросов, которые логируются строкой JSON
+        debug (bool): Добавлять в ответы заголовки с числом и временем SQL-запросов
 
     Note:
-        Добавляет middleware log_requests к приложению
+        Добавляет RequestTelemetryMiddleware к приложению
     """
-    app.middleware("http")(log_requests)
-    logger.info("Request logging middleware successfully configured")
+    app.add_middleware(RequestTelemetryMiddleware, sample_rate=sample_rate, debug=debug)
+    logger.info("Телеметрия запросов подключена, доля логируемых запросов %s", sample_rate)
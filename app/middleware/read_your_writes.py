@@ -0,0 +1,56 @@
+import logging
+import math
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.database import LAST_WRITE_COOKIE
+
+logger = logging.getLogger(__name__)
+
+# Методы, которые только читают данные
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI-middleware, отмечающее клиентов, которые только что записали данные.
+
+    Ответ на успешный (статус < 400) запрос с методом записи получает cookie
+    LAST_WRITE_COOKIE со временем записи и сроком жизни window секунд. Пока
+    она есть, get_read_session читает для клиента с основной БД, и клиент
+    видит свою запись, даже если реплики от нее отстают. Остальные клиенты
+    продолжают читать с реплик.
+
+    Args:
+        app (ASGIApp): Приложение
+        window (float): Сколько секунд после записи клиент читает с основной БД
+    """
+
+    def __init__(self, app: ASGIApp, window: float):
+        self.app = app
+        self.max_age = math.ceil(window)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = (f"{LAST_WRITE_COOKIE}={time.time():.3f}; Max-Age={self.max_age}; "
+                          f"Path=/; HttpOnly; SameSite=Lax")
+                message["headers"] = [*message.get("headers", ()), (b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+def setup_read_your_writes(app, window: float) -> None:
+    """
+    Подключает к FastAPI приложению отметку клиентов после записи.
+
+    Args:
+        app (FastAPI): Экземпляр FastAPI приложения
+        window (float): Сколько секунд после записи клиент читает с основной БД
+    """
+    app.add_middleware(ReadYourWritesMiddleware, window=window)
+    logger.info("Чтение с реплик подключено, после записи клиент читает с основной БД %s с", window)
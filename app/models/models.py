@@ -1,8 +1,77 @@
 from datetime import datetime
 from sqlmodel import SQLModel, Field, Column, DateTime
-from sqlalchemy.dialects.postgresql import ExcludeConstraint
-from sqlalchemy import text
-from typing import Optional
+from sqlalchemy.dialects.postgresql import ExcludeConstraint, TSRANGE
+from sqlalchemy import DDL, Computed, Index, Sequence, Text, event, func
+from typing import Any, Optional
+
+
+# Полуоткрытый интервал [начало, конец) бронирования
+RESERVATION_PERIOD_SQL = (
+    "tsrange(reservation_time, reservation_time + duration_minutes * interval '1 minute')"
+)
+
+# Маркеры изменений коллекций для ETag списков: обработчики записи вызывают
+# nextval после commit, а GET сравнивает last_value с If-None-Match
+TABLE_VERSION_SEQ = Sequence("table_version_seq", metadata=SQLModel.metadata)
+RESERVATION_VERSION_SEQ = Sequence("reservation_version_seq", metadata=SQLModel.metadata)
+
+# Канал LISTEN/NOTIFY изменений броней: его слушают индекс занятости
+# (app/services/occupancy.py) и лента событий (app/services/reservation_feed.py).
+# Триггеры уровня оператора сообщают о вставленных и удаленных бронях, которые
+# еще не закончились (сутки запаса): по строке JSON на бронь
+# ["+" или "-", id, table_id, начало, конец, duration_minutes, customer_name,
+# location], строки собираются в уведомления до RESERVATION_CHANGES_NOTIFY_BYTES
+# байт (предел payload — 8000). Строка длиннее RESERVATION_CHANGES_SHARED_BYTES
+# уходит отдельным уведомлением. Имя и расположение передаются целиком; если
+# вместе (в JSON) они длиннее RESERVATION_CHANGES_TEXT_BYTES, вместо имени
+# передается null, а если и одно расположение длиннее — null вместо обоих:
+# строка все равно должна поместиться в уведомление, иначе откатится сама
+# запись брони. Об изменении столиков — строка "tables"
+RESERVATION_CHANGES_CHANNEL = "reservation_changes"
+RESERVATION_CHANGES_NOTIFY_BYTES = 6000
+RESERVATION_CHANGES_SHARED_BYTES = 1000
+RESERVATION_CHANGES_TEXT_BYTES = 7800
+
+RESERVATION_CHANGES_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION notify_reservation_changes() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'table' THEN
+        PERFORM pg_notify('{RESERVATION_CHANGES_CHANNEL}', 'tables');
+        RETURN NULL;
+    END IF;
+    PERFORM pg_notify('{RESERVATION_CHANGES_CHANNEL}', string_agg(line, E'\\n' ORDER BY line_number))
+    FROM (
+        SELECT line, line_number,
+               CASE WHEN octet_length(line) > {RESERVATION_CHANGES_SHARED_BYTES} THEN -line_number
+                    ELSE (sum(CASE WHEN octet_length(line) > {RESERVATION_CHANGES_SHARED_BYTES}
+                                   THEN 0 ELSE octet_length(line) + 1 END) OVER (ORDER BY line_number) - 1)
+                         / {RESERVATION_CHANGES_NOTIFY_BYTES} END AS chunk
+        FROM (
+            SELECT json_build_array(
+                       CASE TG_OP WHEN 'INSERT' THEN '+' ELSE '-' END,
+                       c.id,
+                       c.table_id,
+                       to_char(lower(c.period), 'YYYY-MM-DD"T"HH24:MI:SS.US'),
+                       to_char(upper(c.period), 'YYYY-MM-DD"T"HH24:MI:SS.US'),
+                       c.duration_minutes,
+                       CASE WHEN sizes.name + sizes.location <= {RESERVATION_CHANGES_TEXT_BYTES}
+                            THEN c.customer_name END,
+                       CASE WHEN sizes.location <= {RESERVATION_CHANGES_TEXT_BYTES} THEN t.location END)::text AS line,
+                   row_number() OVER () AS line_number
+            FROM changed c
+            LEFT JOIN "table" t ON t.id = c.table_id
+            CROSS JOIN LATERAL (
+                SELECT octet_length(to_json(c.customer_name)::text) AS name,
+                       coalesce(octet_length(to_json(t.location)::text), 0) AS location
+            ) AS sizes
+            WHERE upper(c.period) >= LOCALTIMESTAMP - interval '1 day'
+        ) AS numbered
+    ) AS lines
+    GROUP BY chunk;
+    RETURN NULL;
+END $$
+"""
+
 
 class Table(SQLModel, table=True):
     """
@@ -19,6 +88,11 @@ class Table(SQLModel, table=True):
     seats: int = Field(gt=0, description="Количество мест должно быть больше 0")
     location: str
 
+    __table_args__ = (
+        # Фильтр по расположению с keyset-пагинацией по id
+        Index("ix_table_location_id", "location", "id"),
+    )
+
 
 class Reservation(SQLModel, table=True):
     """
@@ -30,10 +104,12 @@ class Reservation(SQLModel, table=True):
         Table_id (int): ID столика, на который делается бронирование.
         Reservation_time (datetime): Дата и время начала бронирования.
         Duration_minutes (int): Длительность бронирования в минутах (должна быть больше 0).
+        Period (tsrange): Вычисляемый (STORED) интервал бронирования, заполняется БД.
 
     Ограничения:
         - Исключающее ограничение не допускает пересечений бронирований по времени для одного и того же столика.
-          Это реализовано через PostgreSQL ExcludeConstraint с использованием диапазона времени.
+          Это реализовано через PostgreSQL ExcludeConstraint по (table_id, period); его GiST-индекс
+          используется и для поиска пересечений оператором &&.
     """
     id: Optional[int] = Field(default=None, primary_key=True)
     customer_name: str
@@ -43,14 +119,94 @@ class Reservation(SQLModel, table=True):
         description="Начало бронирования"
     )
     duration_minutes: int = Field(gt=0, description="Длительность должна быть больше 0 минут")
+    period: Optional[Any] = Field(
+        default=None,
+        sa_column=Column(TSRANGE, Computed(RESERVATION_PERIOD_SQL, persisted=True)),
+        description="Интервал бронирования, вычисляется БД"
+    )
 
     __table_args__ = (
         ExcludeConstraint(
             ('table_id', '='),
-            (
-                text("tsrange(reservation_time, reservation_time + duration_minutes * interval '1 minute')"),
-                '&&'
-            ),
+            ('period', '&&'),
             name="no_overlapping_reservations"
         ),
+        # Keyset-пагинация списка бронирований: общий список и фильтр по столику
+        Index("ix_reservation_time_id", "reservation_time", "id"),
+        Index("ix_reservation_table_id_time_id", "table_id", "reservation_time", "id"),
+    )
+
+
+class ReservationArchive(SQLModel, table=True):
+    """
+    Завершенное бронирование, перенесенное из reservation архивацией.
+
+    Архив не участвует в проверке пересечений и в списках API, поэтому у него
+    нет вычисляемого интервала и исключающего ограничения.
+
+    Атрибуты:
+        id (int): ID бронирования в таблице reservation.
+        Customer_name (str): Имя клиента.
+        Table_id (int): ID столика.
+        Reservation_time (datetime): Дата и время начала бронирования.
+        Duration_minutes (int): Длительность бронирования в минутах.
+        Archived_at (datetime): Время переноса в архив, заполняется БД.
+    """
+    __tablename__ = "reservation_archive"
+
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    customer_name: str
+    table_id: int = Field(foreign_key="table.id")
+    reservation_time: datetime = Field(sa_column=Column(DateTime(), nullable=False))
+    duration_minutes: int
+    archived_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(), server_default=func.now(), nullable=False),
+    )
+
+    __table_args__ = (
+        Index("ix_reservation_archive_table_id_time", "table_id", "reservation_time"),
+    )
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """
+    Сохраненный ответ на запрос с заголовком Idempotency-Key.
+
+    Повтор запроса с тем же ключом получает сохраненный ответ без обращения
+    к бронированиям. Запись действует IDEMPOTENCY_KEY_TTL секунд.
+
+    Атрибуты:
+        key (str): Значение заголовка Idempotency-Key.
+        request_hash (str): SHA-256 тела исходного запроса.
+        status_code (int): HTTP-статус сохраненного ответа.
+        response (str): JSON-тело сохраненного ответа.
+        created_at (datetime): Время сохранения, заполняется БД.
+    """
+    __tablename__ = "idempotency_key"
+
+    key: str = Field(primary_key=True, max_length=255)
+    request_hash: str = Field(max_length=64)
+    status_code: int
+    response: str = Field(sa_column=Column(Text, nullable=False))
+    created_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(), server_default=func.now(), nullable=False, index=True),
     )
+
+
+# Функция создается вместе с "table" (он создается раньше reservation).
+# Переходная таблица задается для одного события, поэтому триггеров брони два
+event.listen(Table.__table__, "after_create", DDL(RESERVATION_CHANGES_FUNCTION_SQL))
+event.listen(Table.__table__, "after_create", DDL(
+    'CREATE TRIGGER table_changes AFTER INSERT OR DELETE ON "table" '
+    "FOR EACH STATEMENT EXECUTE FUNCTION notify_reservation_changes()"
+))
+event.listen(Reservation.__table__, "after_create", DDL(
+    "CREATE TRIGGER reservation_changes_insert AFTER INSERT ON reservation "
+    "REFERENCING NEW TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION notify_reservation_changes()"
+))
+event.listen(Reservation.__table__, "after_create", DDL(
+    "CREATE TRIGGER reservation_changes_delete AFTER DELETE ON reservation "
+    "REFERENCING OLD TABLE AS changed FOR EACH STATEMENT EXECUTE FUNCTION notify_reservation_changes()"
+))
@@ -0,0 +1,133 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
+from app.database import get_pool
+from app.metrics import prometheus
+from app.metrics.http import http_metrics
+from app.metrics.pool import pool_metrics
+from app.metrics.queries import query_metrics
+from app.services.booking_queue import booking_queue
+from app.services.occupancy import occupancy_index
+from app.services.reservation_feed import reservation_feed
+from app.services.table import table_cache
+
+
+router_metrics = APIRouter(
+    prefix="/metrics",
+    tags=["Метрики"],
+)
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router_metrics.get(
+    "",
+    summary="Метрики в формате Prometheus",
+    description=(
+        "Гистограммы длительности и счетчики ответов по шаблонам маршрутов, "
+        "SQL-запросы, состояние пула соединений, кэша столиков и очереди бронирований текущего процесса"
+    ),
+    response_class=PlainTextResponse,
+    response_description="Метрики в текстовом формате Prometheus",
+)
+async def get_metrics():
+    """
+    Возвращает метрики процесса в текстовом формате Prometheus.
+
+    Returns:
+        PlainTextResponse: Метрики HTTP, SQL-запросов, пула соединений, кэша столиков
+            и очереди бронирований
+    """
+    pool = pool_metrics.snapshot(get_pool())
+    cache = table_cache.stats()
+    queue = booking_queue.stats()
+    occupancy = occupancy_index.stats()
+    feed = reservation_feed.stats()
+    gauges = [
+        ("db_pool_size", "gauge", "Размер пула соединений", pool["pool_size"]),
+        ("db_pool_checked_out", "gauge", "Выданные соединения пула", pool["checked_out"]),
+        ("db_pool_overflow_in_use", "gauge", "Соединения сверх pool_size", pool["overflow_in_use"]),
+        ("db_pool_checkouts_total", "counter", "Выдачи соединений из пула", pool["checkouts_total"]),
+        ("db_pool_checkout_timeouts_total", "counter", "Тайм-ауты ожидания соединения",
+         pool["checkout_timeouts_total"]),
+        ("db_pool_checkout_wait_seconds_total", "counter", "Суммарное ожидание соединения, секунды",
+         pool["checkout_wait_seconds_total"]),
+        ("table_cache_size", "gauge", "Записи в кэше столиков", cache["size"]),
+        ("table_cache_hits_total", "counter", "Попадания в кэш столиков", cache["hits"]),
+        ("table_cache_misses_total", "counter", "Промахи кэша столиков", cache["misses"]),
+        ("table_cache_invalidations_total", "counter", "Сбросы кэша столиков", cache["invalidations"]),
+        ("booking_queue_submitted_total", "counter", "Бронирования, поставленные в очередь", queue["submitted"]),
+        ("booking_queue_batches_total", "counter", "Пачки бронирований, отправленные в БД", queue["batches"]),
+        ("booking_queue_rejected_total", "counter", "Бронирования очереди, отклоненные без вставки",
+         queue["rejected"]),
+        ("booking_queue_pending", "gauge", "Бронирования, ждущие своей пачки", queue["pending"]),
+        ("occupancy_index_tables", "gauge", "Столики в индексе занятости", occupancy["tables"]),
+        ("occupancy_index_reservations", "gauge", "Брони в индексе занятости", occupancy["reservations"]),
+        ("occupancy_index_bitmap_bytes", "gauge", "Размер счетчиков слотов индекса занятости",
+         occupancy["bitmap_bytes"]),
+        ("reservation_feed_subscribers", "gauge", "Клиенты ленты бронирований", feed["subscribers"]),
+        ("reservation_feed_events_total", "counter", "Изменения броней, полученные лентой", feed["published"]),
+        ("reservation_feed_dropped_total", "counter", "Клиенты ленты, отключенные за медленное чтение",
+         feed["dropped"]),
+    ]
+    body = prometheus.render(
+        *http_metrics.prometheus(),
+        *query_metrics.prometheus(),
+        *(prometheus.family(name, kind, help_text, [prometheus.sample(name, value)])
+          for name, kind, help_text, value in gauges),
+    )
+    return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router_metrics.get(
+    "/pool",
+    summary="Метрики пула соединений",
+    description="Размер пула, занятые соединения, использование overflow и время ожидания соединения",
+    response_description="Снимок состояния пула соединений",
+)
+async def get_pool_metrics():
+    """
+    Возвращает снимок состояния пула соединений с БД.
+
+    Returns:
+        dict: Метрики пула (см. PoolMetrics.snapshot)
+    """
+    return pool_metrics.snapshot(get_pool())
+
+
+@router_metrics.get(
+    "/cache",
+    summary="Метрики кэша столиков",
+    description="Попадания, промахи, сбросы и текущий размер кэша столиков",
+    response_description="Счетчики кэша столиков",
+)
+async def get_cache_metrics():
+    """
+    Возвращает счетчики кэша столиков.
+
+    Returns:
+        dict: Метрики кэша (см. TTLCache.stats)
+    """
+    return {"tables": table_cache.stats()}
+
+
+@router_metrics.get(
+    "/queries",
+    summary="Метрики SQL-запросов",
+    description=(
+        "Число выполнений, суммарное, среднее и максимальное время SQL-запросов, "
+        "сгруппированных по нормализованному тексту; самые затратные — первыми"
+    ),
+    response_description="Самые затратные SQL-запросы",
+)
+async def get_query_metrics(limit: int = Query(20, ge=1, le=500, description="Сколько запросов вернуть")):
+    """
+    Возвращает самые затратные SQL-запросы по суммарному времени.
+
+    Args:
+        limit (int): Сколько запросов вернуть
+
+    Returns:
+        dict: Метрики запросов (см. QueryMetrics.snapshot)
+    """
+    return query_metrics.snapshot(limit)
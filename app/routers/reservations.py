@@ -1,9 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session
-from app.models.models import Reservation, Table
-from app.schemas.reservation import ReservationCreate, ReservationResponse
-from app.database import get_session
-from app.services.reservation import check_reservation_conflict
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from app.config import get_settings
+from app.models.models import RESERVATION_VERSION_SEQ, Reservation
+from app.schemas.common import RequestDatetime
+from app.schemas.reservation import BulkReservationResult, BulkStatus, ReservationCreate, ReservationResponse
+from app.database import DBSession, get_read_session, get_read_session_scope, get_session
+from app.services.booking_queue import booking_queue
+from app.services.bulk import BULK_MAX_ITEMS, insert_reservations
+from app.services.etag import bump_versions, collection_version, etag_matches, weak_etag
+from app.services.idempotency import (
+    IdempotencyKeyReusedError,
+    replay_response,
+    request_fingerprint,
+    save_response,
+)
+from app.services.occupancy import occupancy_index
+from app.services.reservation_feed import reservation_feed
+from app.services.serialization import (
+    RESERVATION_COLUMNAR,
+    RESERVATION_ROW,
+    RESERVATION_ROWS,
+    ListFormat,
+    columnar_rows_response,
+    json_rows_response,
+)
+from app.services.export import (
+    MEDIA_TYPES,
+    ExportFormat,
+    reservation_export_query,
+    stream_export,
+)
+from app.services.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    InvalidCursorError,
+    decode_cursor,
+    split_page,
+)
+from app.services.reservation import (
+    EXCLUSION_VIOLATION,
+    FOREIGN_KEY_VIOLATION,
+    insert_reservation,
+    integrity_error_code,
+    list_reservations,
+)
 import logging
 
 
@@ -22,93 +66,336 @@ router_res = APIRouter(
 @router_res.get(
     "/",
     response_model=list[ReservationResponse],
-    summary="Получить список всех бронирований",
-    description="Возвращает полный список всех бронирований в системе",
+    summary="Получить список бронирований",
+    description=(
+        "Возвращает страницу бронирований, упорядоченных по времени начала. "
+        "Если есть следующая страница, ее курсор передается в заголовке X-Next-Cursor. "
+        "Ответ содержит слабый ETag коллекции; при совпадении If-None-Match возвращается 304. "
+        "format=columnar возвращает страницу по столбцам: {\"id\": [...], \"customer_name\": [...], ...}. "
+        "Бронирования, перенесенные в архив (закончились больше ARCHIVE_AFTER_DAYS дней назад), "
+        "в список не входят"
+    ),
     response_description="Список объектов бронирований",
+    responses={304: {"description": "Бронирования не изменились"}},
 )
-def get_reservations(session: Session = Depends(get_session)):
+async def get_reservations(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+        cursor: Optional[str] = Query(None, description="Курсор из заголовка X-Next-Cursor"),
+        table_id: Optional[int] = Query(None, description="Только бронирования столика"),
+        start: Optional[RequestDatetime] = Query(None, description="Начало брони не раньше"),
+        end: Optional[RequestDatetime] = Query(None, description="Начало брони раньше"),
+        location: Optional[str] = Query(None, description="Расположение столика"),
+        list_format: ListFormat = Query(ListFormat.json, alias="format", description="Формат ответа: json или columnar"),
+        if_none_match: Optional[str] = Header(None),
+        session: DBSession = Depends(get_read_session),
+):
     """
-    Получает список всех бронирований.
+    Получает страницу бронирований с фильтрами.
+
+    Список читает только таблицу reservation: архивные бронирования не возвращаются.
+
+    Args:
+        limit (int): Размер страницы (не больше MAX_PAGE_SIZE)
+        cursor (str, optional): Курсор следующей страницы
+        table_id, start, end, location: Фильтры выборки
+        list_format (ListFormat): json — массив объектов, columnar — столбцы
+        if_none_match (str, optional): ETag, полученный клиентом ранее
 
     Returns:
-        list[ReservationResponse]: Список всех бронирований в системе
+        Response: JSON-список бронирований страницы (поля ReservationResponse), те же
+            данные по столбцам или пустой ответ 304
+
+    Raises:
+        HTTPException: 400 если курсор некорректен
     """
     logger.info("Запрос на получение списка бронирований")
     try:
-        reservations = session.query(Reservation).all()
-        logger.info(f"Успешно получено {len(reservations)} бронирований")
-        return reservations
+        after = decode_cursor(cursor, datetime, int) if cursor else None
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+    try:
+        etag = weak_etag("reservations", await collection_version(session, RESERVATION_VERSION_SEQ))
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        headers = {"ETag": etag}
+
+        rows = await list_reservations(
+            session, limit + 1, after,
+            table_id=table_id, start=start, end=end, location=location,
+        )
+        reservations, next_cursor = split_page(
+            rows, limit, key=lambda r: (r["reservation_time"], r["id"])
+        )
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        logger.info("Успешно получено %s бронирований", len(reservations))
+        if list_format is ListFormat.columnar:
+            return columnar_rows_response(RESERVATION_COLUMNAR, reservations, headers)
+        return json_rows_response(RESERVATION_ROWS, reservations, headers)
     except Exception as e:
-        logger.error(f"Ошибка при получении бронирований: {str(e)}")
+        logger.error("Ошибка при получении бронирований: %s", e)
         raise HTTPException(status_code=500, detail=f"Ошибка при получении бронирований: {str(e)}")
 
 
+@router_res.get(
+    "/export",
+    summary="Выгрузить бронирования",
+    description=(
+        "Потоковая выгрузка бронирований в NDJSON или CSV. Строки читаются серверным "
+        "курсором и отправляются порциями, поэтому память не зависит от объема выгрузки. "
+        "Архивные бронирования (закончились больше ARCHIVE_AFTER_DAYS дней назад) выгружаются "
+        "только с include_archived=true"
+    ),
+    response_description="Файл NDJSON или CSV",
+    response_class=StreamingResponse,
+)
+async def export_reservations(
+        export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format", description="Формат выгрузки"),
+        table_id: Optional[int] = Query(None, description="Только бронирования столика"),
+        start: Optional[RequestDatetime] = Query(None, description="Начало брони не раньше"),
+        end: Optional[RequestDatetime] = Query(None, description="Начало брони раньше"),
+        location: Optional[str] = Query(None, description="Расположение столика"),
+        include_archived: bool = Query(False, description="Добавить бронирования из архива"),
+        open_session=Depends(get_read_session_scope),
+):
+    """
+    Выгружает бронирования потоком.
+
+    Args:
+        export_format (ExportFormat): ndjson или csv
+        table_id, start, end, location: Фильтры выборки
+        include_archived (bool): Выгрузить и бронирования из reservation_archive
+        open_session: Фабрика сессий для генератора тела ответа
+
+    Returns:
+        StreamingResponse: Выгрузка порциями по EXPORT_CHUNK_ROWS строк
+    """
+    logger.info("Запрос на выгрузку бронирований в формате %s", export_format.value)
+    statement = reservation_export_query(
+        include_archived, table_id=table_id, start=start, end=end, location=location,
+    )
+    return StreamingResponse(
+        stream_export(open_session, statement, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="reservations.{export_format.value}"'
+        },
+    )
+
+
+@router_res.get(
+    "/events",
+    summary="Лента изменений бронирований",
+    description=(
+        "Поток Server-Sent Events: created и deleted при создании и удалении бронирований во всех "
+        "процессах API. Первым приходит событие ready; без изменений раз в FEED_HEARTBEAT секунд "
+        "приходит комментарий. Клиент, не успевающий читать, получает dropped и отключается"
+    ),
+    response_description="text/event-stream",
+    response_class=StreamingResponse,
+)
+async def stream_reservation_events(
+        table_id: Optional[int] = Query(None, description="Только бронирования столика"),
+        location: Optional[str] = Query(None, description="Расположение столика"),
+):
+    """
+    Подписывает клиента на изменения бронирований.
+
+    Args:
+        table_id, location: Фильтры событий
+
+    Returns:
+        StreamingResponse: События SSE до отключения клиента
+    """
+    logger.info("Подписка на ленту бронирований: столик %s, расположение %s", table_id, location)
+    return StreamingResponse(
+        reservation_feed.events(table_id, location),
+        media_type="text/event-stream",
+        # Прокси не должны буферизовать поток
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router_res.post(
     "/",
     response_model=ReservationResponse,
     status_code=201,
     summary="Создать новое бронирование",
-    description="Создает новое бронирование с проверкой доступности столика",
+    description=(
+        "Создает новое бронирование одним запросом; занятость столика проверяет ограничение БД. "
+        "С заголовком Idempotency-Key ответ сохраняется, и повтор запроса с тем же ключом "
+        "получает его (с заголовком Idempotent-Replayed) без повторного бронирования"
+    ),
     response_description="Созданное бронирование",
     responses={
         201: {"description": "Бронирование успешно создано"},
         404: {"description": "Столик не найден"},
         400: {"description": "Конфликт временного слота"},
+        422: {"description": "Idempotency-Key уже использован с другим запросом"},
     },
 )
-def create_reservation(
+async def create_reservation(
         reservation: ReservationCreate,
-        session: Session = Depends(get_session)
+        idempotency_key: Optional[str] = Header(None, min_length=1, max_length=255),
+        session: DBSession = Depends(get_session)
 ):
     """
     Создает новое бронирование.
 
     Args:
         reservation (ReservationCreate): Данные для создания бронирования
-        session (Session): Сессия базы данных
+        idempotency_key (str, optional): Ключ, под которым сохраняется ответ для повторов
+        session (DBSession): Сессия базы данных
 
     Returns:
-        ReservationResponse: Созданное бронирование
+        ReservationResponse: Созданное бронирование или сохраненный ответ на повтор
 
     Raises:
         HTTPException: 404 если столик не найден
         HTTPException: 400 если временной слот занят
+        HTTPException: 422 если ключ уже использован с другим телом запроса
     """
-    logger.info(
-        f"Запрос на создание бронирования: {reservation.dict()}"
-    )
+    logger.info("Запрос на создание бронирования: %s", reservation)
 
-    table = session.get(Table, reservation.table_id)
-    if not table:
-        logger.warning(f"Столик {reservation.table_id} не найден")
-        raise HTTPException(status_code=404, detail=f"Столик {reservation.table_id} не найден")
+    ttl = get_settings().idempotency_key_ttl
+    fingerprint = request_fingerprint(reservation) if idempotency_key else None
+
+    async def replay() -> Optional[Response]:
+        if not idempotency_key:
+            return None
+        try:
+            return await replay_response(session, idempotency_key, fingerprint, ttl)
+        except IdempotencyKeyReusedError:
+            logger.warning("Ключ %s уже использован с другим запросом", idempotency_key)
+            raise HTTPException(status_code=422, detail="Idempotency-Key уже использован с другим запросом")
+
+    replayed = await replay()
+    if replayed is not None:
+        return replayed
+
+    if booking_queue.enabled and not idempotency_key:
+        return await create_reservation_queued(reservation)
+
+    body = None
+    saved = True
+    try:
+        row = await insert_reservation(session, reservation)
+        if idempotency_key:
+            body = RESERVATION_ROW.dump_json(row._asdict())
+            saved = await save_response(session, idempotency_key, fingerprint, 201, body, ttl)
+        if saved:
+            await session.commit()
+        else:
+            await session.rollback()
+    except IntegrityError as e:
+        await session.rollback()
+        code = integrity_error_code(e)
+        if code == FOREIGN_KEY_VIOLATION:
+            logger.warning("Столик %s не найден", reservation.table_id)
+            raise HTTPException(status_code=404, detail=f"Столик {reservation.table_id} не найден")
+        if code == EXCLUSION_VIOLATION:
+            # Слот мог занять параллельный запрос с тем же ключом
+            replayed = await replay()
+            if replayed is not None:
+                return replayed
+            logger.warning(
+                "Конфликт времени для столика %s на %s",
+                reservation.table_id, reservation.reservation_time,
+            )
+            raise HTTPException(status_code=400, detail="Временной слот занят")
+        logger.error("Ошибка при создании бронирования: %s", e)
+        raise HTTPException(status_code=500, detail=f"Ошибка при создании бронирования: {str(e)}")
+    except Exception as e:
+        await session.rollback()
+        logger.error("Ошибка при создании бронирования: %s", e)
+        raise HTTPException(status_code=500, detail=f"Ошибка при создании бронирования: {str(e)}")
+
+    if not saved:
+        # Запрос с тем же ключом успел создать бронирование раньше
+        return await replay()
+
+    occupancy_index.add_reservation(row._asdict())
+    await bump_versions(session, RESERVATION_VERSION_SEQ)
+    logger.info("Бронирование создано: ID %s", row.id)
+    if body is not None:
+        return Response(body, status_code=201, media_type="application/json")
+    return row._asdict()
+
+
+async def create_reservation_queued(reservation: ReservationCreate) -> dict:
+    """
+    Создает бронирование через очередь столика (BOOKING_QUEUE).
+
+    Запрос, проигравший пересечение внутри пачки, получает 400 без обращения к БД.
+
+    Raises:
+        HTTPException: 404 если столик не найден
+        HTTPException: 400 если временной слот занят
+    """
+    try:
+        result = await booking_queue.submit(reservation)
+    except Exception as e:
+        logger.error("Ошибка при создании бронирования: %s", e)
+        raise HTTPException(status_code=500, detail=f"Ошибка при создании бронирования: {str(e)}")
 
-    if check_reservation_conflict(
-            session,
-            reservation.table_id,
-            reservation.reservation_time,
-            reservation.duration_minutes
-    ):
+    if result["status"] == BulkStatus.table_not_found:
+        logger.warning("Столик %s не найден", reservation.table_id)
+        raise HTTPException(status_code=404, detail=f"Столик {reservation.table_id} не найден")
+    if result["status"] == BulkStatus.conflict:
         logger.warning(
-            f"Конфликт времени для столика {reservation.table_id} "
-            f"на {reservation.reservation_time}"
+            "Конфликт времени для столика %s на %s",
+            reservation.table_id, reservation.reservation_time,
         )
         raise HTTPException(status_code=400, detail="Временной слот занят")
+    occupancy_index.add_reservation(result["reservation"])
+    logger.info("Бронирование создано: ID %s", result["reservation"]["id"])
+    return result["reservation"]
+
+
+@router_res.post(
+    "/bulk",
+    response_model=list[BulkReservationResult],
+    summary="Создать бронирования пачкой",
+    description=(
+        f"Создает до {BULK_MAX_ITEMS} бронирований одним запросом к БД. Занятый слот "
+        "или несуществующий столик не прерывают пачку: результат возвращается по каждой строке"
+    ),
+    response_description="Результат по каждому бронированию в порядке запроса",
+)
+async def create_reservations_bulk(
+        reservations: list[ReservationCreate] = Body(..., min_length=1, max_length=BULK_MAX_ITEMS),
+        session: DBSession = Depends(get_session),
+):
+    """
+    Создает несколько бронирований за один запрос.
+
+    Args:
+        reservations (list[ReservationCreate]): Данные бронирований
+        session (DBSession): Сессия базы данных
+
+    Returns:
+        list[BulkReservationResult]: index, status (created, conflict,
+            table_not_found) и созданное бронирование
+    """
+    logger.info("Запрос на создание %s бронирований", len(reservations))
 
     try:
-        # Тут серриализацию явную добавил, чтобы наверника
-        reservation_dict = reservation.dict()
-        reservation_dict['reservation_time'] = reservation_dict['reservation_time'].isoformat()
-        db_reservation = Reservation(**reservation.dict())
-        session.add(db_reservation)
-        session.commit()
-        session.refresh(db_reservation)
-        logger.info(f"Бронирование создано: ID {db_reservation.id}")
-        return db_reservation
+        results = await insert_reservations(session, reservations)
+        await session.commit()
+        await bump_versions(session, RESERVATION_VERSION_SEQ)
     except Exception as e:
-        session.rollback()
-        logger.error(f"Ошибка при создании бронирования: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Ошибка при создании бронирования: {str(e)}")
+        await session.rollback()
+        logger.error("Ошибка при создании бронирований: %s", e)
+        raise HTTPException(status_code=500, detail=f"Ошибка при создании бронирований: {str(e)}")
+
+    created = 0
+    for result in results:
+        if result["status"] == BulkStatus.created:
+            occupancy_index.add_reservation(result["reservation"])
+            created += 1
+    logger.info("Создано %s из %s бронирований", created, len(results))
+    return results
 
 
 @router_res.delete(
@@ -121,16 +408,16 @@ def create_reservation(
         404: {"description": "Бронирование не найдено"},
     },
 )
-def delete_reservation(
+async def delete_reservation(
         reservation_id: int,
-        session: Session = Depends(get_session)
+        session: DBSession = Depends(get_session)
 ):
     """
     Удаляет бронирование по ID.
 
     Args:
         reservation_id (int): ID бронирования для удаления
-        session (Session): Сессия базы данных
+        session (DBSession): Сессия базы данных
 
     Returns:
         dict: Сообщение об успешном удалении
@@ -138,19 +425,23 @@ def delete_reservation(
     Raises:
         HTTPException: 404 если бронирование не найдено
     """
-    logger.info(f"Запрос на удаление бронирования ID {reservation_id}")
+    logger.info("Запрос на удаление бронирования ID %s", reservation_id)
 
-    reservation = session.get(Reservation, reservation_id)
+    reservation = await session.get(Reservation, reservation_id)
     if not reservation:
-        logger.warning(f"Бронирование {reservation_id} не найдено")
+        logger.warning("Бронирование %s не найдено", reservation_id)
         raise HTTPException(status_code=404, detail=f"Бронирование {reservation_id} не найдено")
 
+    row = reservation.model_dump()
     try:
-        session.delete(reservation)
-        session.commit()
-        logger.info(f"Бронирование {reservation_id} успешно удалено")
-        return {"message": "Бронирование успешно удалено"}
+        await session.delete(reservation)
+        await session.commit()
+        await bump_versions(session, RESERVATION_VERSION_SEQ)
     except Exception as e:
-        session.rollback()
-        logger.error(f"Ошибка при удалении бронирования {reservation_id}: {str(e)}")
+        await session.rollback()
+        logger.error("Ошибка при удалении бронирования %s: %s", reservation_id, e)
         raise HTTPException(status_code=500, detail=f"Ошибка при удалении бронирования {reservation_id}: {str(e)}")
+
+    occupancy_index.remove_reservation(row)
+    logger.info("Бронирование %s успешно удалено", reservation_id)
+    return {"message": "Бронирование успешно удалено"}
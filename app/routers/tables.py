@@ -1,8 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session
-from app.models.models import Table
-from app.schemas.table import TableCreate, TableResponse
-from app.database import get_session
+from datetime import timedelta
+from typing import Annotated, Optional
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from app.models.models import TABLE_VERSION_SEQ, Table
+from app.schemas.common import RequestDatetime
+from app.schemas.table import NextFreeSlot, TableAvailability, TableCreate, TableResponse
+from app.database import DBSession, get_read_session, get_session
+from app.services.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    NEXT_CURSOR_HEADER,
+    InvalidCursorError,
+    decode_cursor,
+    split_page,
+)
+from app.services.bulk import BULK_MAX_ITEMS, insert_tables
+from app.services.etag import bump_versions, collection_version, etag_matches, weak_etag
+from app.services.occupancy import find_first_free_slot, find_free_tables
+from app.services.serialization import (
+    TABLE_AVAILABILITY_ROWS,
+    TABLE_COLUMNAR,
+    TABLE_ROWS,
+    ListFormat,
+    columnar_rows_response,
+    json_rows_response,
+)
+from app.services.table import (
+    find_available_tables,
+    list_tables_cached,
+    notify_tables_changed,
+    table_cache,
+)
 import logging
 
 
@@ -21,27 +48,215 @@ router_tab = APIRouter(
 @router_tab.get(
     "/",
     response_model=list[TableResponse],
-    summary="Получить список всех столиков",
-    description="Возвращает полный список всех столиков в ресторане",
+    summary="Получить список столиков",
+    description=(
+        "Возвращает страницу столиков, упорядоченных по id. "
+        "Если есть следующая страница, ее курсор передается в заголовке X-Next-Cursor. "
+        "Ответ содержит слабый ETag коллекции; при совпадении If-None-Match возвращается 304. "
+        "format=columnar возвращает страницу по столбцам: {\"id\": [...], \"name\": [...], ...}"
+    ),
     response_description="Список объектов столиков",
+    responses={304: {"description": "Столики не изменились"}},
 )
-def get_tables(session: Session = Depends(get_session)):
+async def get_tables(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+        cursor: Optional[str] = Query(None, description="Курсор из заголовка X-Next-Cursor"),
+        location: Optional[str] = Query(None, description="Расположение столика"),
+        list_format: ListFormat = Query(ListFormat.json, alias="format", description="Формат ответа: json или columnar"),
+        if_none_match: Optional[str] = Header(None),
+        session: DBSession = Depends(get_read_session),
+):
     """
-    Получает список всех столиков.
+    Получает страницу столиков.
+
+    Args:
+        limit (int): Размер страницы (не больше MAX_PAGE_SIZE)
+        cursor (str, optional): Курсор следующей страницы
+        location (str, optional): Фильтр по расположению
+        list_format (ListFormat): json — массив объектов, columnar — столбцы
+        if_none_match (str, optional): ETag, полученный клиентом ранее
 
     Returns:
-        list[TableResponse]: Список всех столиков в системе
+        Response: JSON-список столиков страницы (поля TableResponse), те же данные
+            по столбцам или пустой ответ 304
+
+    Raises:
+        HTTPException: 400 если курсор некорректен
     """
     logger.info("Запрос на получение списка столиков")
     try:
-        tables = session.query(Table).all()
-        logger.info(f"Успешно получено {len(tables)} столиков")
-        return tables
+        after = decode_cursor(cursor, int) if cursor else None
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+    try:
+        version = await collection_version(session, TABLE_VERSION_SEQ)
+        etag = weak_etag("tables", version)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        headers = {"ETag": etag}
+
+        rows = await list_tables_cached(
+            session, limit + 1, after[0] if after else None, location=location, version=version
+        )
+        tables, next_cursor = split_page(rows, limit, key=lambda t: (t["id"],))
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        logger.info("Успешно получено %s столиков", len(tables))
+        if list_format is ListFormat.columnar:
+            return columnar_rows_response(TABLE_COLUMNAR, tables, headers)
+        return json_rows_response(TABLE_ROWS, tables, headers)
     except Exception as e:
-        logger.error(f"Ошибка при получении столиков: {str(e)}")
+        logger.error("Ошибка при получении столиков: %s", e)
         raise HTTPException(status_code=500, detail=f"Ошибка при получении столиков: {str(e)}")
 
 
+@router_tab.get(
+    "/availability",
+    response_model=list[TableAvailability],
+    summary="Найти свободные столики",
+    description=(
+        "Возвращает столики с нужным числом мест и их свободные интервалы в окне [start, end). "
+        "Интервалы вычисляются одним запросом к БД"
+    ),
+    response_description="Столики со свободными интервалами",
+)
+async def get_table_availability(
+        start: Annotated[RequestDatetime, Query(description="Начало окна поиска")],
+        end: Annotated[RequestDatetime, Query(description="Конец окна поиска")],
+        seats: int = Query(1, ge=1, description="Минимальное число мест"),
+        location: Optional[str] = Query(None, description="Расположение столика"),
+        session: DBSession = Depends(get_read_session),
+):
+    """
+    Ищет свободное время столиков в заданном окне.
+
+    Args:
+        start (datetime): Начало окна
+        end (datetime): Конец окна
+        seats (int): Минимальное число мест
+        location (str, optional): Фильтр по расположению
+
+    Returns:
+        Response: JSON-список столиков со свободными интервалами (поля TableAvailability)
+
+    Raises:
+        HTTPException: 400 если окно пустое (start >= end)
+    """
+    logger.info("Запрос свободных столиков: %s - %s, мест от %s, расположение %s", start, end, seats, location)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="Начало окна должно быть раньше конца")
+
+    try:
+        tables = await find_available_tables(session, start, end, seats, location)
+        logger.info("Найдено %s подходящих столиков", len(tables))
+        return json_rows_response(TABLE_AVAILABILITY_ROWS, tables)
+    except Exception as e:
+        logger.error("Ошибка при поиске свободных столиков: %s", e)
+        raise HTTPException(status_code=500, detail=f"Ошибка при поиске свободных столиков: {str(e)}")
+
+
+@router_tab.get(
+    "/free",
+    response_model=list[TableResponse],
+    summary="Столики, свободные в интервале",
+    description=(
+        "Возвращает столики с нужным числом мест, свободные весь интервал [start, end). "
+        "Внутри горизонта индекса занятости ответ дается из памяти без запроса к БД"
+    ),
+    response_description="Свободные столики",
+)
+async def get_free_tables(
+        start: Annotated[RequestDatetime, Query(description="Начало интервала")],
+        end: Annotated[RequestDatetime, Query(description="Конец интервала")],
+        seats: int = Query(1, ge=1, description="Минимальное число мест"),
+        location: Optional[str] = Query(None, description="Расположение столика"),
+        list_format: ListFormat = Query(ListFormat.json, alias="format", description="Формат ответа: json или columnar"),
+        session: DBSession = Depends(get_read_session),
+):
+    """
+    Ищет столики, свободные весь интервал.
+
+    Args:
+        start (datetime): Начало интервала
+        end (datetime): Конец интервала
+        seats (int): Минимальное число мест
+        location (str, optional): Фильтр по расположению
+        list_format (ListFormat): json — массив объектов, columnar — столбцы
+
+    Returns:
+        Response: JSON-список свободных столиков (поля TableResponse) или те же данные по столбцам
+
+    Raises:
+        HTTPException: 400 если интервал пустой (start >= end)
+    """
+    logger.info("Запрос столиков, свободных %s - %s, мест от %s, расположение %s", start, end, seats, location)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="Начало интервала должно быть раньше конца")
+
+    try:
+        tables = await find_free_tables(session, start, end, seats, location)
+        logger.info("Свободно %s столиков", len(tables))
+        if list_format is ListFormat.columnar:
+            return columnar_rows_response(TABLE_COLUMNAR, tables)
+        return json_rows_response(TABLE_ROWS, tables)
+    except Exception as e:
+        logger.error("Ошибка при поиске свободных столиков: %s", e)
+        raise HTTPException(status_code=500, detail=f"Ошибка при поиске свободных столиков: {str(e)}")
+
+
+@router_tab.get(
+    "/{table_id}/next-free",
+    response_model=NextFreeSlot,
+    summary="Ближайшее свободное время столика",
+    description=(
+        "Возвращает ближайшее время не раньше after, с которого столик свободен duration_minutes минут "
+        "и бронь заканчивается не позже until (по умолчанию — сутки после after). "
+        "Внутри горизонта индекса занятости время — граница слота индекса"
+    ),
+    response_description="Начало свободного интервала или null",
+    responses={404: {"description": "Столик не найден"}},
+)
+async def get_next_free_slot(
+        table_id: int,
+        after: Annotated[RequestDatetime, Query(description="Искать не раньше")],
+        duration_minutes: int = Query(..., ge=1, description="Длительность брони в минутах"),
+        until: Optional[RequestDatetime] = Query(None, description="Бронь должна закончиться не позже"),
+        session: DBSession = Depends(get_read_session),
+):
+    """
+    Ищет ближайшее свободное время столика.
+
+    Args:
+        table_id (int): ID столика
+        after (datetime): Начало поиска
+        duration_minutes (int): Длительность брони
+        until (datetime, optional): Конец поиска
+
+    Returns:
+        NextFreeSlot: table_id и start — начало свободного интервала или None
+
+    Raises:
+        HTTPException: 400 если конец поиска не позже начала
+        HTTPException: 404 если столик не найден
+    """
+    until = until or after + timedelta(days=1)
+    logger.info("Запрос ближайшего свободного времени столика %s: %s - %s, %s мин",
+                table_id, after, until, duration_minutes)
+    if after >= until:
+        raise HTTPException(status_code=400, detail="Начало поиска должно быть раньше конца")
+
+    try:
+        found, start = await find_first_free_slot(session, table_id, after, duration_minutes, until)
+    except Exception as e:
+        logger.error("Ошибка при поиске свободного времени столика %s: %s", table_id, e)
+        raise HTTPException(status_code=500, detail=f"Ошибка при поиске свободного времени: {str(e)}")
+    if not found:
+        logger.warning("Столик %s не найден", table_id)
+        raise HTTPException(status_code=404, detail=f"Столик {table_id} не найден")
+    return {"table_id": table_id, "start": start}
+
+
 @router_tab.post(
     "/",
     response_model=TableResponse,
@@ -53,32 +268,83 @@ def get_tables(session: Session = Depends(get_session)):
         201: {"description": "Столик успешно создан"},
     },
 )
-def create_table(table: TableCreate, session: Session = Depends(get_session)):
+async def create_table(table: TableCreate, session: DBSession = Depends(get_session)):
     """
     Создает новый столик.
 
     Args:
         table (TableCreate): Данные для создания столика
-        session (Session): Сессия базы данных
+        session (DBSession): Сессия базы данных
 
     Returns:
         TableResponse: Созданный столик
     """
-    logger.info(f"Запрос на создание столика: {table.dict()}")
+    logger.info("Запрос на создание столика: %s", table)
 
     try:
         db_table = Table(**table.dict())
         session.add(db_table)
-        session.commit()
-        session.refresh(db_table)
-        logger.info(f"Столик создан: ID {db_table.id} - {db_table.name}")
+        await notify_tables_changed(session)
+        await session.commit()
+        table_cache.invalidate()
+        await bump_versions(session, TABLE_VERSION_SEQ)
+        await session.refresh(db_table)
+        logger.info("Столик создан: ID %s - %s", db_table.id, db_table.name)
         return db_table
     except Exception as e:
-        session.rollback()
-        logger.error(f"Ошибка при создании столика: {str(e)}")
+        await session.rollback()
+        logger.error("Ошибка при создании столика: %s", e)
         raise HTTPException(status_code=400, detail=f"Ошибка при создании столика: {str(e)}")
 
 
+@router_tab.post(
+    "/bulk",
+    response_model=list[TableResponse],
+    status_code=201,
+    summary="Создать столики пачкой",
+    description=(
+        f"Создает до {BULK_MAX_ITEMS} столиков в одной транзакции многострочными "
+        "INSERT ... RETURNING. Столики возвращаются в порядке запроса"
+    ),
+    response_description="Созданные столики",
+    responses={
+        201: {"description": "Столики успешно созданы"},
+    },
+)
+async def create_tables_bulk(
+        tables: list[TableCreate] = Body(..., min_length=1, max_length=BULK_MAX_ITEMS),
+        session: DBSession = Depends(get_session),
+):
+    """
+    Создает несколько столиков за один запрос.
+
+    Args:
+        tables (list[TableCreate]): Данные столиков
+        session (DBSession): Сессия базы данных
+
+    Returns:
+        list[TableResponse]: Созданные столики в порядке запроса
+
+    Raises:
+        HTTPException: 400 если пачку не удалось вставить (она откатывается целиком)
+    """
+    logger.info("Запрос на создание %s столиков", len(tables))
+
+    try:
+        rows = await insert_tables(session, tables)
+        await notify_tables_changed(session)
+        await session.commit()
+        table_cache.invalidate()
+        await bump_versions(session, TABLE_VERSION_SEQ)
+    except Exception as e:
+        await session.rollback()
+        logger.error("Ошибка при создании столиков: %s", e)
+        raise HTTPException(status_code=400, detail=f"Ошибка при создании столиков: {str(e)}")
+
+    logger.info("Создано %s столиков", len(rows))
+    return [row._asdict() for row in rows]
+
+
 @router_tab.delete(
     "/{table_id}",
     summary="Удалить столик",
@@ -89,13 +355,13 @@ def create_table(table: TableCreate, session: Session = Depends(get_session)):
         404: {"description": "Столик не найден"},
     },
 )
-def delete_table(table_id: int, session: Session = Depends(get_session)):
+async def delete_table(table_id: int, session: DBSession = Depends(get_session)):
     """
     Удаляет столик по ID.
 
     Args:
         table_id (int): ID столика для удаления
-        session (Session): Сессия базы данных
+        session (DBSession): Сессия базы данных
 
     Returns:
         dict: Сообщение об успешном удалении
@@ -103,19 +369,22 @@ def delete_table(table_id: int, session: Session = Depends(get_session)):
     Raises:
         HTTPException: 404 если столик не найден
     """
-    logger.info(f"Запрос на удаление столика ID {table_id}")
+    logger.info("Запрос на удаление столика ID %s", table_id)
 
-    table = session.get(Table, table_id)
+    table = await session.get(Table, table_id)
     if not table:
-        logger.warning(f"Столик {table_id} не найден")
+        logger.warning("Столик %s не найден", table_id)
         raise HTTPException(status_code=404, detail=f"Столик {table_id} не найден")
 
     try:
-        session.delete(table)
-        session.commit()
-        logger.info(f"Столик {table_id} успешно удален")
+        await session.delete(table)
+        await notify_tables_changed(session)
+        await session.commit()
+        table_cache.invalidate()
+        await bump_versions(session, TABLE_VERSION_SEQ)
+        logger.info("Столик %s успешно удален", table_id)
         return {"message": "Столик успешно удален"}
     except Exception as e:
-        session.rollback()
-        logger.error(f"Ошибка при удалении столика {table_id}: {str(e)}")
+        await session.rollback()
+        logger.error("Ошибка при удалении столика %s: %s", table_id, e)
         raise HTTPException(status_code=400, detail=f"Ошибка при удалении столика {table_id}: {str(e)}")
@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+from typing import Annotated
+from pydantic import AfterValidator
+
+
+def naive_utc(value: datetime) -> datetime:
+    """
+    Время с часовым поясом переводит в UTC без пояса; время без пояса не меняет.
+
+    Столбцы броней — timestamp without time zone, и psycopg2 приводит время
+    с поясом к UTC сессии. Сравнивать, вычитать и передавать в tsrange можно
+    только такие значения, поэтому время из запроса приводится к ним сразу.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# datetime запроса (тело или параметр): "...Z" и "...+03:00" — как naive_utc.
+# Обязательный параметр объявляется Annotated[RequestDatetime, Query(...)]:
+# при значении по умолчанию Query(...) FastAPI не вызывает валидатор
+RequestDatetime = Annotated[datetime, AfterValidator(naive_utc)]
@@ -1,10 +1,14 @@
+from enum import Enum
+from typing import Optional
 from pydantic import BaseModel
 from datetime import datetime
+from typing_extensions import TypedDict
+from app.schemas.common import RequestDatetime
 
 class ReservationCreate(BaseModel):
     customer_name: str
     table_id: int
-    reservation_time: datetime
+    reservation_time: RequestDatetime
     duration_minutes: int
 
     class Config:
@@ -14,3 +18,29 @@ class ReservationCreate(BaseModel):
 
 class ReservationResponse(ReservationCreate):
     id: int
+
+class ReservationRow(TypedDict):
+    """Строка выборки бронирования для быстрой сериализации (поля ReservationResponse)."""
+    id: int
+    customer_name: str
+    table_id: int
+    reservation_time: datetime
+    duration_minutes: int
+
+class ReservationColumns(TypedDict):
+    """Страница бронирований по столбцам (?format=columnar): имя поля ReservationResponse и значения строк."""
+    id: list[int]
+    customer_name: list[str]
+    table_id: list[int]
+    reservation_time: list[datetime]
+    duration_minutes: list[int]
+
+class BulkStatus(str, Enum):
+    created = "created"
+    conflict = "conflict"
+    table_not_found = "table_not_found"
+
+class BulkReservationResult(BaseModel):
+    index: int
+    status: BulkStatus
+    reservation: Optional[ReservationResponse] = None
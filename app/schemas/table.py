@@ -1,4 +1,7 @@
+from datetime import datetime
+from typing import Optional
 from pydantic import BaseModel
+from typing_extensions import TypedDict
 
 class TableCreate(BaseModel):
     name: str
@@ -7,3 +10,35 @@ class TableCreate(BaseModel):
 
 class TableResponse(TableCreate):
     id: int
+
+class FreeInterval(BaseModel):
+    start: datetime
+    end: datetime
+
+class TableAvailability(TableResponse):
+    free: list[FreeInterval]
+
+class NextFreeSlot(BaseModel):
+    table_id: int
+    start: Optional[datetime]
+
+class TableRow(TypedDict):
+    """Строка выборки столика для быстрой сериализации (поля TableResponse)."""
+    id: int
+    name: str
+    seats: int
+    location: str
+
+class TableColumns(TypedDict):
+    """Страница столиков по столбцам (?format=columnar): имя поля TableResponse и значения строк."""
+    id: list[int]
+    name: list[str]
+    seats: list[int]
+    location: list[str]
+
+class FreeIntervalRow(TypedDict):
+    start: datetime
+    end: datetime
+
+class TableAvailabilityRow(TableRow):
+    free: list[FreeIntervalRow]
@@ -0,0 +1,90 @@
+import importlib.util
+import logging
+import os
+import uvicorn
+from app.config import Settings, get_settings
+
+
+logger = logging.getLogger(__name__)
+
+APP = "app.main:app"
+
+
+def available_cpus() -> int:
+    """
+    Число CPU, доступных процессу.
+
+    Учитывает привязку к ядрам (sched_getaffinity) и квоту cgroup v2
+    (cpu.max): в контейнере с --cpus=2 на 16-ядерной машине вернет 2.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def worker_count(config: Settings) -> int:
+    """Число воркеров: WEB_CONCURRENCY или, если 0, по одному на доступный CPU."""
+    return config.workers if config.workers > 0 else available_cpus()
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def server_options(config: Settings) -> dict:
+    """
+    Параметры uvicorn.run для запуска в production.
+
+    uvloop и httptools используются, если установлены (на Windows uvloop
+    нет), иначе — стандартный цикл asyncio и парсер h11.
+
+    Воркеры стартуют через spawn и импортируют приложение заново, поэтому
+    движок БД и его пул создаются в каждом воркере отдельно и соединения
+    не переходят между процессами.
+    """
+    return dict(
+        host=config.host,
+        port=config.port,
+        workers=worker_count(config),
+        loop="uvloop" if _installed("uvloop") else "asyncio",
+        http="httptools" if _installed("httptools") else "h11",
+        backlog=config.backlog,
+        timeout_keep_alive=config.keepalive_timeout,
+        timeout_graceful_shutdown=config.graceful_timeout,
+        # Логирование настраивает приложение (app.logging_config) в каждом воркере
+        log_config=None,
+        proxy_headers=True,
+    )
+
+
+def run(config: Settings = None) -> None:
+    """
+    Запускает приложение в нескольких процессах-воркерах.
+
+    SIGTERM/SIGINT: воркеры перестают принимать соединения, дорабатывают
+    начатые запросы до GRACEFUL_TIMEOUT и закрывают пул соединений в
+    lifespan приложения.
+    """
+    config = config or get_settings()
+    options = server_options(config)
+    connections = options["workers"] * (config.pool_size + config.max_overflow)
+    logger.info(
+        "Запуск сервера %s:%s: воркеров %s, цикл %s, HTTP %s, соединений с БД до %s",
+        options["host"], options["port"], options["workers"], options["loop"], options["http"], connections,
+    )
+    uvicorn.run(APP, **options)
+
+
+if __name__ == "__main__":
+    from app.logging_config import setup_logging
+    setup_logging()
+    run()
@@ -0,0 +1,81 @@
+import logging
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import text
+from app.database import DBSession, session_scope
+from app.models.models import RESERVATION_VERSION_SEQ
+from app.services.etag import bump_versions
+
+
+logger = logging.getLogger(__name__)
+
+
+# Одна пачка переносится одним запросом: DELETE ... RETURNING передает строки
+# в INSERT архива в той же транзакции. Кандидаты выбираются по индексу
+# ix_reservation_time_id; SKIP LOCKED не ждет строки, которые сейчас
+# меняет приложение, — они уйдут в архив следующим запуском.
+ARCHIVE_BATCH_QUERY = text("""
+    WITH moved AS (
+        DELETE FROM reservation
+        WHERE id IN (
+            SELECT id FROM reservation
+            WHERE reservation_time < :before AND upper(period) <= :before
+            ORDER BY reservation_time, id
+            LIMIT :batch_size
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, customer_name, table_id, reservation_time, duration_minutes
+    )
+    INSERT INTO reservation_archive (id, customer_name, table_id, reservation_time, duration_minutes)
+    SELECT id, customer_name, table_id, reservation_time, duration_minutes FROM moved
+""")
+
+
+async def archive_batch(session: DBSession, before: datetime, batch_size: int) -> int:
+    """
+    Переносит в reservation_archive до batch_size бронирований, закончившихся до before.
+
+    Returns:
+        int: Число перенесенных бронирований
+    """
+    result = await session.execute(ARCHIVE_BATCH_QUERY, {"before": before, "batch_size": batch_size})
+    return result.rowcount
+
+
+async def archive_finished_reservations(
+        before: datetime,
+        batch_size: int,
+        max_batches: Optional[int] = None,
+        open_session=session_scope,
+) -> int:
+    """
+    Переносит завершенные бронирования в архив пачками.
+
+    Каждая пачка — отдельная короткая транзакция, поэтому архивация не держит
+    блокировки долго и ее можно прервать в любой момент. Проверка пересечений
+    и списки бронирований работают только с оставшимися (текущими и будущими)
+    бронированиями и меньшим GiST-индексом.
+
+    Args:
+        before: Переносятся бронирования, закончившиеся не позже этого момента
+        batch_size: Бронирований в одной транзакции
+        max_batches: Ограничение числа пачек за запуск, None — пока есть что переносить
+        open_session: Фабрика сессий (session_scope)
+
+    Returns:
+        int: Число перенесенных бронирований
+    """
+    total = 0
+    batches = 0
+    async with open_session() as session:
+        while max_batches is None or batches < max_batches:
+            moved = await archive_batch(session, before, batch_size)
+            await session.commit()
+            total += moved
+            batches += 1
+            logger.info("Перенесено в архив %s бронирований (всего %s)", moved, total)
+            if moved < batch_size:
+                break
+        if total:
+            await bump_versions(session, RESERVATION_VERSION_SEQ)
+    return total
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable
+from sqlalchemy import text
+from app.database import DBSession, session_scope
+from app.models.models import RESERVATION_VERSION_SEQ
+from app.schemas.common import naive_utc
+from app.schemas.reservation import BulkStatus, ReservationCreate
+from app.services.bulk import insert_reservations
+from app.services.etag import bump_versions
+
+
+logger = logging.getLogger(__name__)
+
+# Максимум бронирований, которые решаются одной транзакцией
+BOOKING_BATCH_MAX = 500
+
+
+# Занятость столика в окне пачки (GiST-индекс no_overlapping_reservations)
+OCCUPANCY_QUERY = text("""
+    SELECT lower(period) AS start, upper(period) AS end
+    FROM reservation
+    WHERE table_id = :table_id AND period && tsrange(:start, :end)
+""")
+
+
+def reservation_end(reservation: ReservationCreate) -> datetime:
+    return reservation.reservation_time + timedelta(minutes=reservation.duration_minutes)
+
+
+async def table_occupancy(session: DBSession, table_id: int,
+                          reservations: list[ReservationCreate]) -> list[tuple[datetime, datetime]]:
+    """Интервалы броней столика, пересекающие окно от первого начала до последнего конца пачки."""
+    result = await session.execute(OCCUPANCY_QUERY, {
+        "table_id": table_id,
+        "start": min(reservation.reservation_time for reservation in reservations),
+        "end": max(reservation_end(reservation) for reservation in reservations),
+    })
+    return [(row.start, row.end) for row in result.all()]
+
+
+def split_overlapping(
+        reservations: list[ReservationCreate],
+        occupied: Iterable[tuple[datetime, datetime]] = (),
+) -> tuple[list[int], list[int]]:
+    """
+    Делит бронирования одного столика на непересекающиеся и проигравшие.
+
+    Бронирования рассматриваются в порядке поступления: пересекающееся с
+    занятым интервалом или с принятым раньше бронированием проигрывает.
+
+    Args:
+        occupied: Уже занятые интервалы [начало, конец) столика
+
+    Returns:
+        tuple[list[int], list[int]]: Позиции принятых и проигравших бронирований
+    """
+    accepted, rejected = [], []
+    intervals = list(occupied)
+    for position, reservation in enumerate(reservations):
+        start, end = reservation.reservation_time, reservation_end(reservation)
+        if any(start < other_end and other_start < end for other_start, other_end in intervals):
+            rejected.append(position)
+        else:
+            accepted.append(position)
+            intervals.append((start, end))
+    return accepted, rejected
+
+
+class BookingQueue:
+    """
+    Очередь бронирований процесса: запросы к одному столику решаются пачками.
+
+    Пока пачка столика решается, новые запросы к нему копятся и уходят
+    следующей пачкой, поэтому на горячий столик приходится одно соединение,
+    а не по соединению на запрос. Пачка читает занятость столика в своем окне
+    одним запросом; запросы, пересекающие занятые интервалы или друг друга,
+    отклоняются без собственных обращений к БД, остальные вставляются одним
+    INSERT (insert_reservations). Бронь, созданную между чтением и вставкой
+    другим процессом, отсекает ограничение no_overlapping_reservations.
+    """
+
+    def __init__(self, open_session=session_scope, max_batch: int = BOOKING_BATCH_MAX):
+        self.enabled = False
+        self.max_batch = max_batch
+        self._open_session = open_session
+        self._pending: dict[int, list[tuple[ReservationCreate, asyncio.Future]]] = {}
+        self._tasks: dict[int, asyncio.Task] = {}
+        self.submitted = 0
+        self.batches = 0
+        self.rejected = 0
+
+    async def submit(self, reservation: ReservationCreate) -> dict:
+        """
+        Ставит бронирование в очередь столика и ждет решения его пачки.
+
+        Время брони приводится к UTC без пояса (naive_utc): его сравнивают с
+        границами period из БД, и оно же попадает в результат.
+
+        Returns:
+            dict: {"status", "reservation"} как в результате insert_reservations
+        """
+        if reservation.reservation_time.tzinfo is not None:
+            reservation = reservation.model_copy(
+                update={"reservation_time": naive_utc(reservation.reservation_time)}
+            )
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(reservation.table_id, []).append((reservation, future))
+        self.submitted += 1
+        if reservation.table_id not in self._tasks:
+            self._tasks[reservation.table_id] = loop.create_task(self._drain(reservation.table_id))
+        return await future
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """
+        Дожидается начатых пачек при завершении воркера.
+
+        Пачки, не решенные за timeout секунд, отменяются: их запросы получают
+        ошибку, а соединения возвращаются в пул до закрытия движка.
+        """
+        tasks = list(self._tasks.values())
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            logger.warning("Очередь бронирований: отменено пачек при завершении: %s", len(pending))
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _drain(self, table_id: int) -> None:
+        batch = []
+        try:
+            while self._pending.get(table_id):
+                batch = self._pending[table_id][:self.max_batch]
+                del self._pending[table_id][:self.max_batch]
+                await self._settle(table_id, batch)
+        finally:
+            del self._tasks[table_id]
+            # Пачка, прерванная отменой, и запросы, не попавшие в пачки
+            for _, future in batch + self._pending.pop(table_id, []):
+                if not future.done():
+                    future.set_exception(RuntimeError("Очередь бронирований остановлена"))
+
+    async def _settle(self, table_id: int, batch: list[tuple[ReservationCreate, asyncio.Future]]) -> None:
+        reservations = [reservation for reservation, _ in batch]
+        self.batches += 1
+        try:
+            async with self._open_session() as session:
+                occupied = await table_occupancy(session, table_id, reservations)
+                accepted, rejected = split_overlapping(reservations, occupied)
+                results = []
+                if accepted:
+                    results = await insert_reservations(session, [reservations[i] for i in accepted])
+                    await session.commit()
+                    if any(result["status"] == BulkStatus.created for result in results):
+                        await bump_versions(session, RESERVATION_VERSION_SEQ)
+        except Exception as e:
+            logger.error("Ошибка при решении пачки бронирований столика %s: %s", table_id, e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.rejected += len(rejected)
+        logger.info("Пачка бронирований столика %s: запросов %s, отклонено без вставки %s",
+                    table_id, len(batch), len(rejected))
+        for position in rejected:
+            _resolve(batch[position][1], {"status": BulkStatus.conflict, "reservation": None})
+        for position, result in zip(accepted, results):
+            _resolve(batch[position][1], result)
+
+    def stats(self) -> dict:
+        return {
+            "submitted": self.submitted,
+            "batches": self.batches,
+            "rejected": self.rejected,
+            "pending": sum(len(pending) for pending in self._pending.values()),
+        }
+
+
+def _resolve(future: asyncio.Future, result: dict) -> None:
+    # Клиент мог отключиться, не дождавшись ответа
+    if not future.done():
+        future.set_result(result)
+
+
+booking_queue = BookingQueue()
@@ -0,0 +1,122 @@
+from sqlalchemy import insert, text
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from app.database import DBSession
+from app.models.models import Table
+from app.schemas.reservation import BulkStatus, ReservationCreate
+from app.schemas.table import TableCreate
+from app.services.reservation import EXCLUSION_VIOLATION, FOREIGN_KEY_VIOLATION, integrity_error_code
+from app.services.table import TABLE_COLUMNS
+
+
+# Максимум объектов в одном запросе массового создания
+BULK_MAX_ITEMS = 10_000
+
+
+# Входные строки разворачиваются из массивов (по одному параметру на столбец),
+# поэтому запрос не зависит от размера пачки. id выдаются заранее через
+# nextval, чтобы сопоставить RETURNING с позицией строки во входных данных.
+#
+# Быстрый вариант — обычная вставка: любая конфликтная строка откатывает
+# пачку целиком. Построчный вариант отсеивает строки без столика, а
+# пересечения пропускает через ON CONFLICT DO NOTHING по ограничению
+# no_overlapping_reservations — в том числе пересечения строк одной пачки:
+# выигрывает более ранняя. Проверка ON CONFLICT заметно дороже обычной вставки.
+BULK_RESERVATIONS_SQL = """
+    WITH items AS (
+        SELECT *
+        FROM unnest(
+            CAST(:customer_names AS text[]),
+            CAST(:table_ids AS int[]),
+            CAST(:reservation_times AS timestamp[]),
+            CAST(:durations AS int[])
+        ) WITH ORDINALITY AS item(customer_name, table_id, reservation_time, duration_minutes, position)
+    ),
+    accepted AS (
+        SELECT nextval(pg_get_serial_sequence('reservation', 'id')) AS id, ordered.*
+        FROM (
+            SELECT * FROM items
+            {table_filter}
+            ORDER BY position
+        ) AS ordered
+    ),
+    inserted AS (
+        INSERT INTO reservation (id, customer_name, table_id, reservation_time, duration_minutes)
+        SELECT id, customer_name, table_id, reservation_time, duration_minutes
+        FROM accepted
+        ORDER BY position
+        {on_conflict}
+        RETURNING id
+    )
+    SELECT items.position, accepted.id IS NOT NULL AS table_exists, inserted.id
+    FROM items
+    LEFT JOIN accepted ON accepted.position = items.position
+    LEFT JOIN inserted ON inserted.id = accepted.id
+    ORDER BY items.position
+"""
+
+BULK_RESERVATIONS_FAST_QUERY = text(BULK_RESERVATIONS_SQL.format(table_filter="", on_conflict=""))
+
+BULK_RESERVATIONS_QUERY = text(BULK_RESERVATIONS_SQL.format(
+    table_filter='WHERE EXISTS (SELECT 1 FROM "table" t WHERE t.id = items.table_id)',
+    on_conflict="ON CONFLICT DO NOTHING",
+))
+
+
+async def insert_tables(session: DBSession, tables: list[TableCreate]) -> list[Row]:
+    """
+    Вставляет столики многострочными INSERT ... RETURNING.
+
+    SQLAlchemy собирает executemany в пачки VALUES (insertmanyvalues), а
+    sort_by_parameter_order гарантирует, что строки RETURNING идут в порядке входных данных.
+
+    Returns:
+        list[Row]: Созданные столики (id, name, seats, location)
+    """
+    statement = insert(Table).returning(*TABLE_COLUMNS, sort_by_parameter_order=True)
+    result = await session.execute(statement, [table.model_dump() for table in tables])
+    return result.all()
+
+
+async def insert_reservations(session: DBSession, reservations: list[ReservationCreate]) -> list[dict]:
+    """
+    Вставляет бронирования одним запросом и возвращает результат по каждой строке.
+
+    Занятый слот или несуществующий столик не прерывают пачку: такие строки
+    пропускаются и получают статус conflict или table_not_found.
+
+    Сначала пачка вставляется обычным INSERT внутри SAVEPOINT; только если
+    он нарушил ограничение, пачка повторяется построчным вариантом запроса.
+
+    Returns:
+        list[dict]: {"index", "status", "reservation"} в порядке входных данных;
+            reservation заполнен только для созданных строк
+    """
+    params = {
+        "customer_names": [r.customer_name for r in reservations],
+        "table_ids": [r.table_id for r in reservations],
+        "reservation_times": [r.reservation_time for r in reservations],
+        "durations": [r.duration_minutes for r in reservations],
+    }
+    await session.execute(text("SAVEPOINT bulk_reservations"))
+    try:
+        result = await session.execute(BULK_RESERVATIONS_FAST_QUERY, params)
+    except IntegrityError as e:
+        if integrity_error_code(e) not in (EXCLUSION_VIOLATION, FOREIGN_KEY_VIOLATION):
+            raise
+        await session.execute(text("ROLLBACK TO SAVEPOINT bulk_reservations"))
+        result = await session.execute(BULK_RESERVATIONS_QUERY, params)
+
+    results = []
+    for row, reservation in zip(result.all(), reservations):
+        index = row.position - 1
+        if row.id is not None:
+            results.append({
+                "index": index,
+                "status": BulkStatus.created,
+                "reservation": {"id": row.id, **reservation.model_dump()},
+            })
+        else:
+            status = BulkStatus.conflict if row.table_exists else BulkStatus.table_not_found
+            results.append({"index": index, "status": status, "reservation": None})
+    return results
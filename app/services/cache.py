@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class TTLCache:
+    """
+    Кэш в памяти процесса: записи живут ttl секунд, число записей ограничено
+    maxsize (вытесняется давно не использованная — LRU).
+
+    Потокобезопасен: сброс приходит и из потока слушателя LISTEN/NOTIFY.
+    Каждый сброс увеличивает поколение кэша, и значение, загрузка которого
+    началась до сброса, не сохраняется — устаревшие данные не возвращаются
+    в кэш после инвалидации.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def configure(self, maxsize: int, ttl: float) -> None:
+        """Меняет размер и время жизни записей; текущие записи сбрасываются."""
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+        self.invalidate()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.maxsize > 0
+
+    def _lookup(self, key: Hashable) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def _store(self, key: Hashable, value: Any, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Возвращает значение из кэша или загружает его через loader (read-through).
+
+        Args:
+            key: Ключ записи
+            loader: Корутина без аргументов, читающая значение из БД
+
+        Returns:
+            Значение из кэша или результат loader
+        """
+        if not self.enabled:
+            return await loader()
+        found, value = self._lookup(key)
+        if found:
+            return value
+        generation = self._generation
+        value = await loader()
+        self._store(key, value, generation)
+        return value
+
+    def invalidate(self) -> None:
+        """Сбрасывает все записи."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        """Счетчики попаданий и промахов, текущий размер и настройки кэша."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
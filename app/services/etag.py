@@ -0,0 +1,57 @@
+import logging
+from typing import Optional
+from sqlalchemy import Sequence, select, text
+from app.database import DBSession
+
+
+logger = logging.getLogger(__name__)
+
+
+async def collection_version(session: DBSession, sequence: Sequence) -> int:
+    """
+    Текущая версия коллекции — последнее выданное значение ее последовательности.
+
+    Чтение last_value не блокирует и не затрагивает строки таблиц, поэтому
+    проверка If-None-Match стоит одного легкого запроса.
+    """
+    result = await session.execute(
+        text(f"SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {sequence.name}")
+    )
+    return result.scalar_one()
+
+
+async def bump_versions(session: DBSession, *sequences: Sequence) -> None:
+    """
+    Увеличивает версии коллекций после commit изменения.
+
+    nextval не откатывается вместе с транзакцией, поэтому вызывается только
+    после commit: иначе клиент мог бы получить новую версию вместе со старыми
+    данными и закэшировать их. Ошибка здесь не отменяет уже зафиксированную
+    запись и только логируется.
+    """
+    try:
+        await session.execute(select(*(sequence.next_value() for sequence in sequences)))
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        logger.warning("Не удалось обновить версии коллекций: %s", e)
+
+
+def weak_etag(collection: str, version: int) -> str:
+    return f'W/"{collection}-{version}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Совпадает ли If-None-Match с ETag (слабое сравнение, RFC 9110).
+
+    Args:
+        if_none_match: Значение заголовка: "*" или список ETag через запятую
+        etag: Текущий ETag коллекции
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Callable
+from sqlalchemy.engine import Row
+from sqlalchemy import union_all
+from sqlmodel import select
+from app.models.models import Reservation, ReservationArchive
+from app.services.reservation import RESERVATION_COLUMNS, filter_reservations
+
+
+# Сколько строк читается из курсора и отправляется клиенту за один раз
+EXPORT_CHUNK_ROWS = 1000
+
+EXPORT_FIELDS = [column.key for column in RESERVATION_COLUMNS]
+
+# Те же поля из архива; архив сохраняет id бронирования, поэтому id не пересекаются
+ARCHIVE_COLUMNS = (
+    ReservationArchive.id,
+    ReservationArchive.customer_name,
+    ReservationArchive.table_id,
+    ReservationArchive.reservation_time,
+    ReservationArchive.duration_minutes,
+)
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv; charset=utf-8",
+}
+
+
+def reservation_export_query(include_archived: bool = False, **filters):
+    """
+    Выборка бронирований для выгрузки: только поля ответа, порядок по id.
+
+    Args:
+        include_archived: Добавить бронирования из reservation_archive
+    """
+    statement = filter_reservations(select(*RESERVATION_COLUMNS), **filters)
+    if not include_archived:
+        return statement.order_by(Reservation.id)
+    archived = filter_reservations(select(*ARCHIVE_COLUMNS), model=ReservationArchive, **filters)
+    combined = union_all(statement, archived).subquery()
+    return select(*combined.c).order_by(combined.c.id)
+
+
+def _export_values(row: Row) -> list:
+    """Значения строки в порядке EXPORT_FIELDS; время — в ISO-формате, как в API."""
+    return [value.isoformat() if isinstance(value, datetime) else value for value in row]
+
+
+def encode_ndjson(rows: list[Row]) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, _export_values(row))), ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode()
+
+
+def encode_csv(rows: list[Row], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(_export_values(row) for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def stream_export(
+        open_session: Callable,
+        statement,
+        export_format: ExportFormat,
+        chunk_rows: int = EXPORT_CHUNK_ROWS,
+) -> AsyncIterator[bytes]:
+    """
+    Отдает выгрузку порциями по chunk_rows строк.
+
+    Строки читаются серверным курсором (yield_per), поэтому в памяти
+    одновременно находится не больше одной порции независимо от объема.
+
+    Args:
+        open_session: Фабрика сессий (database.session_scope)
+        statement: Выборка из reservation_export_query
+        export_format: Формат выгрузки
+        chunk_rows: Размер порции в строках
+    """
+    if export_format is ExportFormat.csv:
+        yield encode_csv([], header=True)
+    encode = encode_csv if export_format is ExportFormat.csv else encode_ndjson
+
+    async with open_session() as session:
+        result = await session.stream(statement.execution_options(yield_per=chunk_rows))
+        try:
+            async for partition in result.partitions():
+                yield encode(partition)
+        finally:
+            await result.close()
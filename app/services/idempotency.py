@@ -0,0 +1,119 @@
+import hashlib
+import logging
+from typing import Optional
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.engine import Row
+from app.database import DBSession
+
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+# Заголовок ответа, отданного из сохраненного, а не выполненного заново
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyKeyReusedError(Exception):
+    """Ключ уже использован с другим телом запроса."""
+
+
+def request_fingerprint(payload: BaseModel) -> str:
+    """SHA-256 тела запроса: повтор должен совпадать с исходным запросом."""
+    return hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+
+async def find_response(session: DBSession, key: str, ttl: float) -> Optional[Row]:
+    """
+    Сохраненный ответ по ключу или None, если его нет или срок хранения истек.
+
+    Один запрос по первичному ключу.
+
+    Returns:
+        Row: request_hash, status_code, response
+    """
+    result = await session.execute(
+        text("""
+            SELECT request_hash, status_code, response FROM idempotency_key
+            WHERE key = :key AND created_at > now() - make_interval(secs => :ttl)
+        """),
+        {"key": key, "ttl": ttl},
+    )
+    return result.one_or_none()
+
+
+async def save_response(
+        session: DBSession,
+        key: str,
+        request_hash: str,
+        status_code: int,
+        body: bytes,
+        ttl: float,
+) -> bool:
+    """
+    Сохраняет ответ в транзакции сессии — вместе с изменением, которое он описывает.
+
+    Если ключ уже сохранил параллельный запрос с тем же ключом, вставка ждет
+    его commit и ничего не меняет; запись с истекшим сроком перезаписывается.
+
+    Returns:
+        bool: False, если ключ занят действующей записью
+    """
+    result = await session.execute(
+        text("""
+            INSERT INTO idempotency_key (key, request_hash, status_code, response)
+            VALUES (:key, :request_hash, :status_code, :response)
+            ON CONFLICT (key) DO UPDATE SET
+                request_hash = EXCLUDED.request_hash,
+                status_code = EXCLUDED.status_code,
+                response = EXCLUDED.response,
+                created_at = now()
+            WHERE idempotency_key.created_at <= now() - make_interval(secs => :ttl)
+            RETURNING key
+        """),
+        {
+            "key": key,
+            "request_hash": request_hash,
+            "status_code": status_code,
+            "response": body.decode(),
+            "ttl": ttl,
+        },
+    )
+    return result.first() is not None
+
+
+async def replay_response(session: DBSession, key: str, request_hash: str, ttl: float) -> Optional[Response]:
+    """
+    Ответ на повтор запроса из сохраненного, если ключ уже использован.
+
+    Raises:
+        IdempotencyKeyReusedError: Ключ сохранен для запроса с другим телом
+    """
+    stored = await find_response(session, key, ttl)
+    if stored is None:
+        return None
+    if stored.request_hash != request_hash:
+        raise IdempotencyKeyReusedError(key)
+    logger.info("Повтор запроса с ключом %s, возвращен сохраненный ответ", key)
+    return Response(
+        stored.response,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+async def purge_expired_keys(session: DBSession, ttl: float) -> int:
+    """
+    Удаляет ключи с истекшим сроком хранения (индекс по created_at).
+
+    Returns:
+        int: Число удаленных ключей
+    """
+    result = await session.execute(
+        text("DELETE FROM idempotency_key WHERE created_at <= now() - make_interval(secs => :ttl)"),
+        {"ttl": ttl},
+    )
+    await session.commit()
+    return result.rowcount
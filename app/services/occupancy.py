@@ -0,0 +1,476 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Mapping, Optional
+import anyio
+from sqlalchemy import text
+from app.config import get_settings
+from app.database import DBSession, session_scope
+from app.models.models import RESERVATION_CHANGES_CHANNEL
+from app.schemas.table import TableRow
+from app.services.pg_notify import PgNotifyListener
+from app.services.reservation_changes import TABLES_CHANGED, parse_changes
+from app.services.table import find_available_tables
+
+
+logger = logging.getLogger(__name__)
+
+# Как часто индекс перечитывается целиком: сдвигает горизонт вперед и
+# исправляет расхождения, если уведомление было потеряно
+OCCUPANCY_RELOAD_SECONDS = 3600.0
+
+# Таблицы bytes.translate: счетчики слотов меняются на 1 в C, без цикла по слотам
+INCREMENT = bytes(min(count + 1, 255) for count in range(256))
+DECREMENT = bytes(max(count - 1, 0) for count in range(256))
+
+OCCUPANCY_TABLES_QUERY = text('SELECT id, name, seats, location FROM "table" ORDER BY id')
+
+# Брони, пересекающие горизонт индекса (GiST-индекс no_overlapping_reservations)
+OCCUPANCY_RESERVATIONS_QUERY = text("""
+    SELECT table_id, lower(period) AS start, upper(period) AS end
+    FROM reservation
+    WHERE period && tsrange(:start, :end)
+""")
+
+
+@dataclass
+class TableSlots:
+    """Занятость одного столика: счетчики по слотам и точные интервалы броней."""
+    row: TableRow
+    counts: bytearray
+    # Брони как числа pack_interval: одно int на бронь вместо пары в словаре
+    intervals: set[int] = field(default_factory=set)
+
+
+# Секунды от origin сдвигаются, чтобы бронь, начавшаяся до горизонта, тоже упаковалась
+INTERVAL_BIAS = 1 << 31
+
+
+def pack_interval(start_s: int, end_s: int) -> int:
+    return (start_s + INTERVAL_BIAS) << 32 | (end_s + INTERVAL_BIAS)
+
+
+def unpack_interval(packed: int) -> tuple[int, int]:
+    return (packed >> 32) - INTERVAL_BIAS, (packed & 0xFFFFFFFF) - INTERVAL_BIAS
+
+
+class OccupancyIndex:
+    """
+    Занятость столиков в памяти процесса на горизонт в horizon_days дней.
+
+    Горизонт делится на слоты по slot_minutes минут; у каждого столика есть
+    массив (bytearray) с числом броней, задевающих слот. Счетчик, а не бит,
+    нужен потому, что две короткие соседние брони могут делить один слот.
+    Свободный интервал — это нули во всех его слотах: проверка выполняется
+    в C (bytearray.count, bytearray.find) без обращения к БД. Если интервал
+    задевает слот лишь частично, ответ уточняется по точным интервалам броней.
+
+    Индекс только ускоряет ответы о доступности: бронирование создает
+    ограничение no_overlapping_reservations, а индекс может отставать от БД
+    на время доставки уведомления. Изменения применяются идемпотентно, поэтому
+    одно и то же изменение можно получить и от обработчика запроса, и от
+    уведомления. Потокобезопасен: изменения приходят из потока слушателя.
+    """
+
+    def __init__(self, slot_minutes: int = 15, horizon_days: int = 60):
+        self._lock = threading.Lock()
+        self.configure(slot_minutes, horizon_days)
+
+    def configure(self, slot_minutes: int, horizon_days: int) -> None:
+        """Меняет размер слота и горизонт; индекс сбрасывается до следующей загрузки."""
+        with self._lock:
+            self.slot_seconds = slot_minutes * 60
+            self.slots = horizon_days * 86400 // self.slot_seconds if slot_minutes > 0 else 0
+            self.origin: Optional[datetime] = None
+            self._tables: dict[int, TableSlots] = {}
+            self._pending: Optional[list[tuple[str, Any]]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.slots > 0
+
+    @property
+    def ready(self) -> bool:
+        return self.origin is not None
+
+    @property
+    def horizon_end(self) -> Optional[datetime]:
+        if self.origin is None:
+            return None
+        return self.origin + timedelta(seconds=self.slots * self.slot_seconds)
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        """Индекс загружен, и интервал [start, end) целиком внутри горизонта."""
+        origin, horizon_end = self.origin, self.horizon_end
+        return origin is not None and origin <= start and end <= horizon_end
+
+    def has_table(self, table_id: int) -> bool:
+        return table_id in self._tables
+
+    def _seconds(self, moment: datetime) -> int:
+        return int((moment - self.origin).total_seconds())
+
+    def _span(self, start_s: int, end_s: int) -> tuple[int, int]:
+        """Слоты, которые задевает [start_s, end_s), в пределах горизонта."""
+        first = max(0, start_s // self.slot_seconds)
+        last = min(self.slots, -(-end_s // self.slot_seconds))
+        return first, last
+
+    # --- изменения ---
+
+    def begin_reload(self) -> None:
+        """Начинает копить изменения, пришедшие во время чтения индекса из БД."""
+        with self._lock:
+            self._pending = []
+
+    def abort_reload(self) -> None:
+        with self._lock:
+            self._pending = None
+
+    def load(
+            self,
+            origin: datetime,
+            tables: Iterable[TableRow],
+            reservations: Iterable[tuple[int, datetime, datetime]],
+    ) -> None:
+        """
+        Заменяет индекс прочитанным из БД.
+
+        Изменения, полученные после begin_reload, применяются к новому индексу
+        повторно: часть из них может не попасть в снимок, прочитанный из БД.
+
+        Args:
+            origin: Начало горизонта (граница слота)
+            tables: Строки столиков
+            reservations: (table_id, начало, конец) броней, пересекающих горизонт
+        """
+        with self._lock:
+            self.origin = origin
+            self._tables = {
+                row["id"]: TableSlots(row=dict(row), counts=bytearray(self.slots))
+                for row in tables
+            }
+            for table_id, start, end in reservations:
+                self._add(table_id, start, end)
+            for change, args in self._pending or ():
+                getattr(self, change)(*args)
+            self._pending = None
+
+    def _record(self, change: str, *args) -> bool:
+        """Запоминает изменение для повтора после загрузки; False — индекс не загружен."""
+        if self._pending is not None:
+            self._pending.append((change, args))
+        return self.origin is not None
+
+    def _add(self, table_id: int, start: datetime, end: datetime) -> None:
+        table = self._tables.get(table_id)
+        if table is None:
+            return
+        start_s, end_s = self._seconds(start), self._seconds(end)
+        packed = pack_interval(start_s, end_s)
+        first, last = self._span(start_s, end_s)
+        if packed in table.intervals or first >= last:
+            return
+        table.intervals.add(packed)
+        table.counts[first:last] = table.counts[first:last].translate(INCREMENT)
+
+    def _remove(self, table_id: int, start: datetime, end: datetime) -> None:
+        table = self._tables.get(table_id)
+        if table is None:
+            return
+        start_s, end_s = self._seconds(start), self._seconds(end)
+        packed = pack_interval(start_s, end_s)
+        if packed not in table.intervals:
+            return
+        table.intervals.remove(packed)
+        first, last = self._span(start_s, end_s)
+        table.counts[first:last] = table.counts[first:last].translate(DECREMENT)
+
+    def add(self, table_id: int, start: datetime, end: datetime) -> None:
+        """Отмечает бронь [start, end) столика; повторное добавление ничего не меняет."""
+        with self._lock:
+            if self._record("_add", table_id, start, end):
+                self._add(table_id, start, end)
+
+    def remove(self, table_id: int, start: datetime, end: datetime) -> None:
+        """Снимает бронь [start, end) столика, если она есть в индексе."""
+        with self._lock:
+            if self._record("_remove", table_id, start, end):
+                self._remove(table_id, start, end)
+
+    def add_reservation(self, reservation: Mapping[str, Any]) -> None:
+        """
+        add() по строке бронирования (table_id, reservation_time, duration_minutes).
+
+        Вызывается обработчиком после COMMIT, поэтому ошибка только пишется
+        в лог: запись уже сделана, а изменение придет и уведомлением триггера.
+        """
+        self._apply_reservation("add", reservation)
+
+    def remove_reservation(self, reservation: Mapping[str, Any]) -> None:
+        """remove() по строке бронирования; ошибка, как в add_reservation, только пишется в лог."""
+        self._apply_reservation("remove", reservation)
+
+    def _apply_reservation(self, change: str, reservation: Mapping[str, Any]) -> None:
+        try:
+            start = reservation["reservation_time"]
+            end = start + timedelta(minutes=reservation["duration_minutes"])
+            getattr(self, change)(reservation["table_id"], start, end)
+        except Exception as e:
+            logger.error("Индекс занятости: не удалось применить бронь столика %s: %s",
+                         reservation.get("table_id"), e)
+
+    def apply_notification(self, payload: str) -> bool:
+        """
+        Применяет уведомление канала reservation_changes (см. parse_changes).
+
+        Returns:
+            bool: True, если изменились столики и индекс нужно перечитать
+        """
+        if payload == TABLES_CHANGED:
+            return True
+        for change in parse_changes(payload):
+            if change.created:
+                self.add(change.table_id, change.start, change.end)
+            else:
+                self.remove(change.table_id, change.start, change.end)
+        return False
+
+    # --- запросы (интервал должен быть внутри горизонта, см. covers) ---
+
+    def _is_free(self, table: TableSlots, start_s: int, end_s: int) -> bool:
+        first, last = self._span(start_s, end_s)
+        counts = table.counts
+        if counts.count(0, first, last) == last - first:
+            return True
+        # Слоты, целиком лежащие внутри интервала: любая бронь в них пересекается с ним
+        inner_first = -(-start_s // self.slot_seconds)
+        inner_last = end_s // self.slot_seconds
+        if inner_first < inner_last and counts.count(0, inner_first, inner_last) != inner_last - inner_first:
+            return False
+        return not any(
+            other_start < end_s and start_s < other_end
+            for other_start, other_end in map(unpack_interval, table.intervals)
+        )
+
+    def is_free(self, table_id: int, start: datetime, end: datetime) -> Optional[bool]:
+        """
+        Свободен ли столик в [start, end).
+
+        Returns:
+            Optional[bool]: None, если столика нет в индексе
+        """
+        with self._lock:
+            table = self._tables.get(table_id)
+            if table is None:
+                return None
+            return self._is_free(table, self._seconds(start), self._seconds(end))
+
+    def free_tables(
+            self,
+            start: datetime,
+            end: datetime,
+            seats: int = 1,
+            location: Optional[str] = None,
+    ) -> list[TableRow]:
+        """Столики с не меньше чем seats местами, свободные весь интервал [start, end), по возрастанию id."""
+        # Столики загружаются в порядке id (OCCUPANCY_TABLES_QUERY)
+        with self._lock:
+            start_s, end_s = self._seconds(start), self._seconds(end)
+            return [
+                table.row
+                for table in self._tables.values()
+                if table.row["seats"] >= seats
+                and (location is None or table.row["location"] == location)
+                and self._is_free(table, start_s, end_s)
+            ]
+
+    def first_free(self, table_id: int, after: datetime, duration_minutes: int,
+                   until: datetime) -> Optional[datetime]:
+        """
+        Первое начало слота не раньше after, с которого столик свободен duration_minutes.
+
+        Поиск идет по целым слотам (bytearray.find подряд идущих нулей), поэтому
+        ответ — граница слота, и бронь [ответ, +duration) заканчивается не позже until.
+
+        Returns:
+            Optional[datetime]: Начало свободного интервала или None, если его нет
+        """
+        with self._lock:
+            table = self._tables.get(table_id)
+            if table is None:
+                return None
+            first = -(-self._seconds(after) // self.slot_seconds)
+            needed = -(-duration_minutes * 60 // self.slot_seconds)
+            last = min(self.slots, self._seconds(until) // self.slot_seconds)
+            if needed <= 0 or first + needed > last:
+                return None
+            slot = table.counts.find(bytes(needed), first, last)
+            if slot < 0:
+                return None
+            return self.origin + timedelta(seconds=slot * self.slot_seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tables": len(self._tables),
+                "reservations": sum(len(table.intervals) for table in self._tables.values()),
+                "slots": self.slots,
+                "bitmap_bytes": self.slots * len(self._tables),
+            }
+
+
+def horizon_origin(now: datetime) -> datetime:
+    """Начало горизонта — полночь текущего дня."""
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+async def load_occupancy(session: DBSession, index: OccupancyIndex, now: Optional[datetime] = None) -> None:
+    """
+    Читает столики и брони горизонта из БД и заменяет ими индекс.
+
+    Два запроса: все столики и брони, пересекающие горизонт (по GiST-индексу).
+    """
+    origin = horizon_origin(now or datetime.now())
+    index.begin_reload()
+    try:
+        tables = [row._asdict() for row in await session.execute(OCCUPANCY_TABLES_QUERY)]
+        end = origin + timedelta(seconds=index.slots * index.slot_seconds)
+        result = await session.execute(OCCUPANCY_RESERVATIONS_QUERY, {"start": origin, "end": end})
+        reservations = result.all()
+    except BaseException:
+        index.abort_reload()
+        raise
+    index.load(origin, tables, reservations)
+
+
+async def reload_occupancy_index() -> None:
+    """Перечитывает occupancy_index; ошибка оставляет прежний индекс и пишется в лог."""
+    started = time.perf_counter()
+    try:
+        async with session_scope() as session:
+            await load_occupancy(session, occupancy_index)
+            await session.rollback()
+    except Exception as e:
+        logger.warning("Не удалось загрузить индекс занятости столиков: %s", e)
+        return
+    stats = occupancy_index.stats()
+    logger.info("Индекс занятости загружен: столиков %s, броней %s за %.0f мс",
+                stats["tables"], stats["reservations"], (time.perf_counter() - started) * 1000)
+
+
+async def find_free_tables(
+        session: DBSession,
+        start: datetime,
+        end: datetime,
+        seats: int = 1,
+        location: Optional[str] = None,
+) -> list[TableRow]:
+    """
+    Столики, свободные весь интервал [start, end).
+
+    Отвечает индекс занятости, если интервал внутри его горизонта, иначе —
+    запрос доступности к БД (find_available_tables): столик свободен, если
+    его единственный свободный интервал совпадает с окном.
+
+    Returns:
+        list[TableRow]: Столики по возрастанию id
+    """
+    if occupancy_index.covers(start, end):
+        return occupancy_index.free_tables(start, end, seats, location)
+    tables = await find_available_tables(session, start, end, seats, location)
+    return [
+        {"id": table["id"], "name": table["name"], "seats": table["seats"], "location": table["location"]}
+        for table in tables
+        if table["free"] == [{"start": start, "end": end}]
+    ]
+
+
+async def find_first_free_slot(
+        session: DBSession,
+        table_id: int,
+        after: datetime,
+        duration_minutes: int,
+        until: datetime,
+) -> tuple[bool, Optional[datetime]]:
+    """
+    Ближайшее время не раньше after, с которого столик свободен duration_minutes.
+
+    Индекс отвечает с точностью до слота (OCCUPANCY_SLOT_MINUTES), запрос к БД
+    (вне горизонта индекса или для столика, которого индекс еще не знает) — точно.
+
+    Returns:
+        tuple[bool, Optional[datetime]]: Найден ли столик и начало свободного
+            интервала, который заканчивается не позже until (None — такого нет)
+    """
+    if occupancy_index.covers(after, until) and occupancy_index.has_table(table_id):
+        return True, occupancy_index.first_free(table_id, after, duration_minutes, until)
+    tables = await find_available_tables(session, after, until, table_id=table_id)
+    if not tables:
+        return False, None
+    duration = timedelta(minutes=duration_minutes)
+    for interval in tables[0]["free"]:
+        if interval["end"] - interval["start"] >= duration:
+            return True, interval["start"]
+    return True, None
+
+
+@asynccontextmanager
+async def maintain_occupancy_index(reload_interval: float = OCCUPANCY_RELOAD_SECONDS):
+    """
+    Держит occupancy_index воркера в актуальном состоянии, пока открыт контекст.
+
+    Слушатель канала RESERVATION_CHANGES_CHANNEL применяет изменения броней из всех
+    процессов (их отправляет триггер БД), после изменения столиков и после
+    переподключения слушателя индекс перечитывается целиком, а раз в
+    reload_interval — по расписанию, чтобы горизонт сдвигался вперед.
+    """
+    if not occupancy_index.enabled:
+        yield
+        return
+
+    loop = asyncio.get_running_loop()
+    reload_requested = asyncio.Event()
+
+    def request_reload() -> None:
+        loop.call_soon_threadsafe(reload_requested.set)
+
+    def on_notification(payload: str) -> None:
+        if occupancy_index.apply_notification(payload):
+            request_reload()
+
+    def on_subscribe() -> None:
+        # Первую загрузку делает сам контекст; перечитывать нужно после переподключения
+        if occupancy_index.ready:
+            request_reload()
+
+    async def reload_when_requested() -> None:
+        while True:
+            with anyio.move_on_after(reload_interval):
+                await reload_requested.wait()
+            reload_requested.clear()
+            await reload_occupancy_index()
+
+    listener = PgNotifyListener(
+        get_settings().database_url, RESERVATION_CHANGES_CHANNEL,
+        callback=on_notification, on_subscribe=on_subscribe,
+    )
+    listener.start()
+    try:
+        # Загрузка после подписки: изменения, сделанные во время чтения, не теряются
+        await anyio.to_thread.run_sync(listener.wait_listening, 5.0)
+        await reload_occupancy_index()
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(reload_when_requested)
+            yield
+            tg.cancel_scope.cancel()
+    finally:
+        await anyio.to_thread.run_sync(listener.stop)
+
+
+# Размер слота и горизонт из настроек задает create_app (occupancy_index.configure)
+occupancy_index = OccupancyIndex()
@@ -0,0 +1,65 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """Курсор не удалось разобрать (поврежден или от другого списка)."""
+
+
+def encode_cursor(*values) -> str:
+    """
+    Упаковывает ключ последней строки страницы в непрозрачный курсор.
+
+    datetime сохраняется в ISO-формате, остальные значения — как есть (JSON).
+    """
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """
+    Распаковывает курсор и приводит значения к типам ключа сортировки.
+
+    Args:
+        cursor (str): Курсор из заголовка X-Next-Cursor предыдущей страницы
+        *types: Типы значений ключа, например (datetime, int)
+
+    Raises:
+        InvalidCursorError: Если курсор поврежден или не соответствует ключу
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise InvalidCursorError(cursor)
+        return tuple(
+            datetime.fromisoformat(value) if type_ is datetime else type_(value)
+            for type_, value in zip(types, values)
+        )
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursorError(cursor) from e
+
+
+def split_page(rows: list, limit: int, key) -> tuple[list, str | None]:
+    """
+    Отделяет страницу от лишней строки, запрошенной сверх limit.
+
+    Запрос выбирает limit + 1 строк: если лишняя строка есть, страница
+    не последняя, и курсор строится по ключу последней строки страницы.
+
+    Returns:
+        tuple: (строки страницы, курсор следующей страницы или None)
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(*key(page[-1]))
@@ -0,0 +1,106 @@
+import logging
+import select
+import threading
+from typing import Callable, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from app.database import DBSession
+
+
+logger = logging.getLogger(__name__)
+
+
+def libpq_dsn(database_url: str) -> str:
+    """URL SQLAlchemy (с любым драйвером) в строку подключения libpq для psycopg2."""
+    return make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+async def notify(session: DBSession, channel: str, payload: str = "") -> None:
+    """
+    Отправляет NOTIFY в транзакции сессии.
+
+    PostgreSQL доставляет уведомление только после COMMIT и не доставляет
+    при откате, поэтому слушатели узнают лишь о зафиксированных изменениях.
+    """
+    await session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+
+
+class PgNotifyListener:
+    """
+    Слушает канал PostgreSQL LISTEN/NOTIFY в отдельном потоке.
+
+    Держит собственное соединение psycopg2 вне пула приложения. При разрыве
+    соединения переподключается. После каждой подписки вызывается
+    on_subscribe: уведомления, отправленные, пока слушателя не было,
+    потеряны, и подписчик должен считать свое состояние устаревшим.
+    """
+
+    def __init__(
+            self,
+            database_url: str,
+            channel: str,
+            callback: Callable[[str], None],
+            on_subscribe: Optional[Callable[[], None]] = None,
+            reconnect_delay: float = 1.0,
+            poll_interval: float = 1.0,
+    ):
+        self.dsn = libpq_dsn(database_url)
+        self.channel = channel
+        self.callback = callback
+        self.on_subscribe = on_subscribe
+        self.reconnect_delay = reconnect_delay
+        self.poll_interval = poll_interval
+        self._stopped = threading.Event()
+        self._listening = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name=f"pg-listen-{self.channel}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wait_listening(self, timeout: float) -> bool:
+        """Ждет, пока слушатель подпишется на канал (для тестов и прогрева)."""
+        return self._listening.wait(timeout)
+
+    def _run(self) -> None:
+        # Драйвер нужен только слушателю: импорт модуля не загружает psycopg2
+        import psycopg2
+
+        while not self._stopped.is_set():
+            connection = None
+            try:
+                connection = psycopg2.connect(self.dsn)
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                if self.on_subscribe is not None:
+                    self.on_subscribe()
+                self._listening.set()
+                logger.info("Подписка на канал %s установлена", self.channel)
+                self._listen(connection)
+            except Exception as e:
+                self._listening.clear()
+                logger.warning("Слушатель канала %s отключился: %s", self.channel, e)
+                self._stopped.wait(self.reconnect_delay)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+    def _listen(self, connection) -> None:
+        while not self._stopped.is_set():
+            if select.select([connection], [], [], self.poll_interval) == ([], [], []):
+                continue
+            connection.poll()
+            while connection.notifies:
+                notification = connection.notifies.pop(0)
+                try:
+                    self.callback(notification.payload)
+                except Exception as e:
+                    logger.error("Ошибка обработки уведомления %s: %s", self.channel, e)
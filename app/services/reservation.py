@@ -1,10 +1,36 @@
-from sqlmodel import Session
-from sqlalchemy import text
+from typing import Optional
+from sqlalchemy import insert, text, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
 from datetime import datetime, timedelta
+from app.database import DBSession
+from app.models.models import Reservation, Table
+from app.schemas.reservation import ReservationCreate, ReservationRow
+from app.services.serialization import rows_as_dicts
 
 
-def check_reservation_conflict(session: Session, table_id: int,
-                             reservation_time: datetime, duration: int) -> bool:
+# SQLSTATE-коды PostgreSQL, которые возвращает вставка бронирования
+FOREIGN_KEY_VIOLATION = "23503"
+EXCLUSION_VIOLATION = "23P01"
+
+RESERVATION_COLUMNS = (
+    Reservation.id,
+    Reservation.customer_name,
+    Reservation.table_id,
+    Reservation.reservation_time,
+    Reservation.duration_minutes,
+)
+
+
+async def check_reservation_conflict(session: DBSession, table_id: int,
+                                     reservation_time: datetime, duration: int) -> bool:
+    """
+    Проверяет, пересекается ли интервал [reservation_time, +duration) с бронями столика.
+
+    Условие `period && tsrange(...)` обслуживает GiST-индекс ограничения
+    no_overlapping_reservations, поэтому проверка не зависит от объема истории.
+    """
     start = reservation_time
     end = start + timedelta(minutes=duration)
 
@@ -12,20 +38,100 @@ def check_reservation_conflict(session: Session, table_id: int,
         SELECT EXISTS (
             SELECT 1 FROM reservation
             WHERE table_id = :table_id
-            AND (
-                (reservation_time <= :end AND 
-                 reservation_time + (duration_minutes * INTERVAL '1 minute') >= :start)
-            )
+            AND period && tsrange(:start, :end)
         )
     """)
 
-    result = session.execute(
+    result = await session.execute(
         query,
         {
             'table_id': table_id,
             'start': start,
             'end': end
         }
-    ).scalar()
+    )
+
+    return bool(result.scalar())
+
+
+def integrity_error_code(exc: IntegrityError) -> str | None:
+    """SQLSTATE нарушенного ограничения (одинаково для psycopg2 и asyncpg)."""
+    return getattr(exc.orig, "pgcode", None)
+
+
+async def insert_reservation(session: DBSession, reservation: ReservationCreate) -> Row:
+    """
+    Вставляет бронирование одним запросом INSERT ... RETURNING.
+
+    Существование столика и отсутствие пересечений не проверяются заранее:
+    их гарантируют внешний ключ и ограничение no_overlapping_reservations,
+    поэтому вставка корректна и при конкурентных запросах.
+
+    Raises:
+        IntegrityError: FOREIGN_KEY_VIOLATION — столика нет,
+            EXCLUSION_VIOLATION — временной слот занят
+    """
+    statement = (
+        insert(Reservation)
+        .values(**reservation.model_dump())
+        .returning(*RESERVATION_COLUMNS)
+    )
+    result = await session.execute(statement)
+    return result.one()
+
+
+def filter_reservations(
+        statement,
+        table_id: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        location: Optional[str] = None,
+        model=Reservation,
+):
+    """
+    Добавляет к выборке бронирований фильтры списка и выгрузки.
+
+    Args:
+        model: Reservation или ReservationArchive — чьи столбцы фильтровать
+        table_id: Только бронирования столика
+        start: Начало брони не раньше start
+        end: Начало брони раньше end
+        location: Только столики в этом расположении
+    """
+    if location is not None:
+        statement = statement.join(Table, Table.id == model.table_id).where(Table.location == location)
+    if table_id is not None:
+        statement = statement.where(model.table_id == table_id)
+    if start is not None:
+        statement = statement.where(model.reservation_time >= start)
+    if end is not None:
+        statement = statement.where(model.reservation_time < end)
+    return statement
+
+
+async def list_reservations(
+        session: DBSession,
+        limit: int,
+        after: Optional[tuple[datetime, int]] = None,
+        **filters,
+) -> list[ReservationRow]:
+    """
+    Возвращает страницу бронирований, упорядоченных по (reservation_time, id).
+
+    Выбираются столбцы, а не объекты ORM: строки сразу идут в ответ.
+
+    Продолжение страницы ищется по ключу (keyset), а не через OFFSET, поэтому
+    стоимость запроса не растет с номером страницы. Индексы:
+    ix_reservation_time_id и ix_reservation_table_id_time (с фильтром table_id).
+
+    Args:
+        after: Ключ (reservation_time, id) последней строки предыдущей страницы
+        **filters: Фильтры filter_reservations
+    """
+    statement = filter_reservations(select(*RESERVATION_COLUMNS), **filters)
+    if after is not None:
+        statement = statement.where(tuple_(Reservation.reservation_time, Reservation.id) > tuple_(*after))
+    statement = statement.order_by(Reservation.reservation_time, Reservation.id).limit(limit)
 
-    return bool(result)
\ No newline at end of file
+    result = await session.execute(statement)
+    return rows_as_dicts(result)
@@ -0,0 +1,40 @@
+import json
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+
+# Уведомление триггера notify_reservation_changes об изменении столиков (а не броней)
+TABLES_CHANGED = "tables"
+
+
+class ReservationChange(NamedTuple):
+    """Вставленная или удаленная бронь из уведомления канала reservation_changes."""
+    created: bool
+    id: int
+    table_id: int
+    start: datetime
+    end: datetime
+    duration_minutes: int
+    customer_name: str
+    location: Optional[str]
+
+
+def parse_changes(payload: str) -> list[ReservationChange]:
+    """
+    Разбирает уведомление триггера notify_reservation_changes.
+
+    Returns:
+        list[ReservationChange]: Изменения броней; для уведомления об изменении
+            столиков (TABLES_CHANGED) — пустой список
+    """
+    if payload == TABLES_CHANGED:
+        return []
+    changes = []
+    for line in payload.splitlines():
+        change, reservation_id, table_id, start, end, duration, customer_name, location = json.loads(line)
+        changes.append(ReservationChange(
+            change == "+", reservation_id, table_id,
+            datetime.fromisoformat(start), datetime.fromisoformat(end),
+            duration, customer_name, location,
+        ))
+    return changes
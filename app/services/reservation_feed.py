@@ -0,0 +1,184 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Optional
+import anyio
+from app.config import Settings, get_settings
+from app.models.models import RESERVATION_CHANGES_CHANNEL
+from app.services.pg_notify import PgNotifyListener
+from app.services.reservation_changes import ReservationChange, parse_changes
+
+
+logger = logging.getLogger(__name__)
+
+
+def reservation_event(change: ReservationChange) -> str:
+    """Событие SSE: created или deleted с бронью (поля ReservationResponse) и расположением столика."""
+    data = {
+        "id": change.id,
+        "customer_name": change.customer_name,
+        "table_id": change.table_id,
+        "reservation_time": change.start.isoformat(),
+        "duration_minutes": change.duration_minutes,
+        "location": change.location,
+    }
+    return f"event: {'created' if change.created else 'deleted'}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class FeedSubscriber:
+    """Клиент ленты: фильтры и ограниченный буфер еще не отправленных изменений."""
+
+    def __init__(self, buffer_size: int, table_id: Optional[int] = None, location: Optional[str] = None):
+        self.queue: asyncio.Queue[ReservationChange] = asyncio.Queue(buffer_size)
+        self.table_id = table_id
+        self.location = location
+        self.dropped = asyncio.Event()
+
+    def matches(self, change: ReservationChange) -> bool:
+        return ((self.table_id is None or change.table_id == self.table_id)
+                and (self.location is None or change.location == self.location))
+
+
+class ReservationFeed:
+    """
+    Лента изменений броней процесса для подписчиков SSE.
+
+    Изменения приходят из канала RESERVATION_CHANGES_CHANNEL (их отправляют
+    триггеры БД в транзакции любого процесса), поэтому лента одинакова на всех
+    воркерах, и процесс, принявший бронь, не должен никому ее пересылать.
+    Слушатель LISTEN запускается с первым подписчиком и останавливается с
+    последним: без подписчиков лента не держит соединений и потоков.
+
+    Каждому подписчику — свой буфер на buffer_size изменений. Подписчик,
+    который не успевает их забирать, отключается, а не копит память и не
+    задерживает остальных. После переподключения слушателя отключаются все
+    подписчики: изменения за время разрыва потеряны, и клиенты должны
+    заново загрузить список.
+    """
+
+    def __init__(self, buffer_size: int = Settings.feed_buffer_size, heartbeat: float = Settings.feed_heartbeat):
+        self.buffer_size = buffer_size
+        self.heartbeat = heartbeat
+        self._subscribers: set[FeedSubscriber] = set()
+        self._listener: Optional[PgNotifyListener] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = asyncio.Lock()
+        self._subscriptions = 0
+        self.published = 0
+        self.dropped = 0
+
+    def configure(self, buffer_size: int, heartbeat: float) -> None:
+        self.buffer_size = buffer_size
+        self.heartbeat = heartbeat
+
+    async def _start(self) -> bool:
+        """Запускает слушателя; False, если подписка на канал не установлена за 5 с."""
+        self._loop = asyncio.get_running_loop()
+        self._subscriptions = 0
+        self._listener = PgNotifyListener(
+            get_settings().database_url, RESERVATION_CHANGES_CHANNEL,
+            callback=self._on_notification, on_subscribe=self._on_subscribe,
+        )
+        self._listener.start()
+        if not await anyio.to_thread.run_sync(self._listener.wait_listening, 5.0):
+            logger.error("Лента бронирований: подписка на %s не установлена за 5 с", RESERVATION_CHANGES_CHANNEL)
+            await self._stop()
+            return False
+        return True
+
+    async def _stop(self) -> None:
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            await anyio.to_thread.run_sync(listener.stop)
+
+    def _on_notification(self, payload: str) -> None:
+        # Поток слушателя: разбор здесь, раздача — в цикле событий
+        changes = parse_changes(payload)
+        if changes and self._loop is not None:
+            self._loop.call_soon_threadsafe(self.publish, changes)
+
+    def _on_subscribe(self) -> None:
+        # Поток слушателя: первая подписка — запуск, следующие — переподключения
+        self._subscriptions += 1
+        if self._subscriptions > 1 and self._loop is not None:
+            self._loop.call_soon_threadsafe(self.drop_all)
+
+    def drop_all(self) -> None:
+        """Отключает всех подписчиков: изменения, пропущенные слушателем, им уже не доставить."""
+        subscribers, self._subscribers = self._subscribers, set()
+        for subscriber in subscribers:
+            subscriber.dropped.set()
+        self.dropped += len(subscribers)
+        if subscribers:
+            logger.warning("Лента бронирований: слушатель переподключился, отключено подписчиков: %s",
+                           len(subscribers))
+
+    def publish(self, changes: list[ReservationChange]) -> None:
+        """Раздает изменения подходящим подписчикам; переполненные буферы отключаются."""
+        for change in changes:
+            self.published += 1
+            for subscriber in list(self._subscribers):
+                if not subscriber.matches(change):
+                    continue
+                try:
+                    subscriber.queue.put_nowait(change)
+                except asyncio.QueueFull:
+                    self._subscribers.discard(subscriber)
+                    subscriber.dropped.set()
+                    self.dropped += 1
+                    logger.warning("Лента бронирований: подписчик отключен, буфер %s переполнен",
+                                   self.buffer_size)
+
+    async def events(self, table_id: Optional[int] = None, location: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Поток событий SSE для одного клиента.
+
+        Первым идет событие ready — после него клиент не пропустит изменений
+        и может загрузить текущий список (GET /reservations/). Пока изменений
+        нет, раз в heartbeat секунд отправляется комментарий: прокси не
+        закрывают соединение, а сервер замечает ушедших клиентов. Клиент,
+        отключенный за медленное чтение или из-за переподключения слушателя,
+        получает событие dropped; если подписаться на канал не удалось,
+        dropped приходит вместо ready.
+
+        Args:
+            table_id: Только изменения броней этого столика
+            location: Только изменения броней столиков в этом расположении
+        """
+        subscriber = FeedSubscriber(self.buffer_size, table_id, location)
+        async with self._lock:
+            listening = self._listener is not None or await self._start()
+            if listening:
+                self._subscribers.add(subscriber)
+        if not listening:
+            yield "event: dropped\ndata: {}\n\n"
+            return
+        try:
+            yield "event: ready\ndata: {}\n\n"
+            while True:
+                if subscriber.dropped.is_set():
+                    yield "event: dropped\ndata: {}\n\n"
+                    return
+                change = None
+                with anyio.move_on_after(self.heartbeat):
+                    change = await subscriber.queue.get()
+                yield ": heartbeat\n\n" if change is None else reservation_event(change)
+        finally:
+            self._subscribers.discard(subscriber)
+            # Клиент отключился: отмена не должна прервать остановку слушателя
+            with anyio.CancelScope(shield=True):
+                async with self._lock:
+                    if not self._subscribers:
+                        await self._stop()
+
+    async def close(self) -> None:
+        """Останавливает слушателя при завершении воркера."""
+        async with self._lock:
+            await self._stop()
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self._subscribers), "published": self.published, "dropped": self.dropped}
+
+
+# Размер буфера и интервал heartbeat из настроек задает create_app (reservation_feed.configure)
+reservation_feed = ReservationFeed()
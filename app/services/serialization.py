@@ -0,0 +1,76 @@
+from enum import Enum
+from typing import Mapping, Optional
+from fastapi import Response
+from pydantic import TypeAdapter
+from app.schemas.reservation import ReservationColumns, ReservationRow
+from app.schemas.table import TableAvailabilityRow, TableColumns, TableRow
+
+
+# Сериализаторы списков строк. dump_json не валидирует данные, а пишет
+# JSON напрямую из словарей средствами pydantic-core: строки из БД уже
+# имеют нужные типы, поэтому повторная валидация через response_model и
+# проход jsonable_encoder + json.dumps не нужны.
+RESERVATION_ROW = TypeAdapter(ReservationRow)
+RESERVATION_ROWS = TypeAdapter(list[ReservationRow])
+TABLE_ROWS = TypeAdapter(list[TableRow])
+TABLE_AVAILABILITY_ROWS = TypeAdapter(list[TableAvailabilityRow])
+RESERVATION_COLUMNAR = TypeAdapter(ReservationColumns)
+TABLE_COLUMNAR = TypeAdapter(TableColumns)
+
+
+class ListFormat(str, Enum):
+    """Формат ответа со списком: массив объектов или столбцы."""
+    json = "json"
+    columnar = "columnar"
+
+
+def rows_as_dicts(result) -> list[dict]:
+    """
+    Строки результата выборки столбцов в словари {столбец: значение}.
+
+    dict(zip(...)) заметно дешевле Row._asdict() и экземпляров модели.
+    """
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result.all()]
+
+
+def json_rows_response(
+        adapter: TypeAdapter,
+        rows: list[dict],
+        headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    Ответ со списком строк, сериализованным одним вызовом dump_json.
+
+    Args:
+        adapter (TypeAdapter): Сериализатор списка (RESERVATION_ROWS, TABLE_ROWS, ...)
+        rows (list[dict]): Строки с полями модели ответа
+        headers (Mapping, optional): Заголовки ответа
+
+    Returns:
+        Response: application/json
+    """
+    return Response(adapter.dump_json(rows), media_type="application/json", headers=headers)
+
+
+def columnar_rows_response(
+        adapter: TypeAdapter,
+        rows: list[dict],
+        headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    Ответ со списком строк по столбцам: {"поле": [значения строк], ...}.
+
+    Имена полей передаются один раз, а не в каждой строке, а однотипные
+    значения столбца идут подряд — ответ короче и лучше сжимается.
+
+    Args:
+        adapter (TypeAdapter): Сериализатор столбцов (RESERVATION_COLUMNAR, TABLE_COLUMNAR)
+        rows (list[dict]): Строки с полями модели ответа
+        headers (Mapping, optional): Заголовки ответа
+
+    Returns:
+        Response: application/json
+    """
+    columns = {field: [row[field] for row in rows] for field in adapter.core_schema["fields"]}
+    return Response(adapter.dump_json(columns), media_type="application/json", headers=headers)
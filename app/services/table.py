@@ -0,0 +1,165 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import text
+from sqlmodel import select
+from app.config import Settings, get_settings
+from app.database import DBSession
+from app.models.models import Table
+from app.schemas.table import TableAvailabilityRow, TableRow
+from app.services.cache import TTLCache
+from app.services.pg_notify import PgNotifyListener, notify
+from app.services.serialization import rows_as_dicts
+
+
+# Канал LISTEN/NOTIFY, через который процессы приложения сбрасывают кэш столиков
+TABLE_CATALOG_CHANNEL = "table_catalog"
+
+# Размер и TTL из настроек задает create_app (table_cache.configure)
+table_cache = TTLCache(maxsize=Settings.table_cache_size, ttl=Settings.table_cache_ttl)
+
+TABLE_COLUMNS = (Table.id, Table.name, Table.seats, Table.location)
+
+
+async def list_tables(
+        session: DBSession,
+        limit: int,
+        after_id: Optional[int] = None,
+        location: Optional[str] = None,
+) -> list[TableRow]:
+    """
+    Возвращает страницу столиков, упорядоченных по id.
+
+    Выбираются столбцы, а не объекты ORM: строки сразу идут в ответ.
+
+    Args:
+        after_id: id последнего столика предыдущей страницы
+        location: Только столики в этом расположении (индекс ix_table_location)
+    """
+    statement = select(*TABLE_COLUMNS)
+    if location is not None:
+        statement = statement.where(Table.location == location)
+    if after_id is not None:
+        statement = statement.where(Table.id > after_id)
+    statement = statement.order_by(Table.id).limit(limit)
+
+    result = await session.execute(statement)
+    return rows_as_dicts(result)
+
+
+async def list_tables_cached(
+        session: DBSession,
+        limit: int,
+        after_id: Optional[int] = None,
+        location: Optional[str] = None,
+        version: Optional[int] = None,
+) -> list[TableRow]:
+    """
+    Страница столиков через кэш table_cache (read-through).
+
+    Столики меняются редко, поэтому страница кэшируется целиком по параметрам
+    запроса. Записи живут TABLE_CACHE_TTL секунд и сбрасываются при любом
+    изменении столиков (см. notify_tables_changed).
+
+    Args:
+        version: Версия коллекции (table_version_seq) — часть ключа, чтобы страница,
+            отданная с новым ETag, не бралась из кэша до прихода уведомления
+    """
+    async def load() -> list[TableRow]:
+        return await list_tables(session, limit, after_id, location)
+
+    return await table_cache.get_or_load(("list", version, limit, after_id, location), load)
+
+
+async def notify_tables_changed(session: DBSession) -> None:
+    """
+    Сообщает всем процессам приложения, что столики изменились.
+
+    Вызывается в транзакции изменения до commit: уведомление уйдет только
+    вместе с зафиксированными данными. Свой кэш процесс сбрасывает сам после
+    commit (table_cache.invalidate()), не дожидаясь уведомления.
+    """
+    await notify(session, TABLE_CATALOG_CHANNEL)
+
+
+def table_cache_listener() -> PgNotifyListener:
+    """Слушатель, сбрасывающий table_cache по уведомлениям других процессов."""
+    return PgNotifyListener(
+        get_settings().database_url,
+        TABLE_CATALOG_CHANNEL,
+        callback=lambda payload: table_cache.invalidate(),
+        on_subscribe=table_cache.invalidate,
+    )
+
+
+AVAILABILITY_QUERY = """
+    WITH bounds AS (
+        SELECT tsrange(CAST(:start AS timestamp), CAST(:end AS timestamp)) AS window_range
+    )
+    SELECT t.id, t.name, t.seats, t.location,
+           ARRAY(SELECT lower(slot) FROM unnest(free.slots) AS slot ORDER BY 1) AS slot_starts,
+           ARRAY(SELECT upper(slot) FROM unnest(free.slots) AS slot ORDER BY 1) AS slot_ends
+    FROM "table" t
+    CROSS JOIN bounds
+    CROSS JOIN LATERAL (
+        SELECT tsmultirange(bounds.window_range) - COALESCE(
+            (SELECT range_agg(r.period) FROM reservation r
+             WHERE r.table_id = t.id AND r.period && bounds.window_range),
+            tsmultirange()
+        ) AS slots
+    ) AS free
+    WHERE t.seats >= :seats {filters}
+    ORDER BY t.id
+"""
+
+
+async def find_available_tables(
+        session: DBSession,
+        start: datetime,
+        end: datetime,
+        seats: int = 1,
+        location: Optional[str] = None,
+        table_id: Optional[int] = None,
+) -> list[TableAvailabilityRow]:
+    """
+    Возвращает подходящие столики и их свободные интервалы в окне [start, end).
+
+    Свободное время считается одним запросом: из окна (tsmultirange) вычитается
+    объединение броней столика (range_agg по period), а брони каждого столика
+    выбираются по GiST-индексу ограничения no_overlapping_reservations.
+    Интервалы возвращаются массивами, по одной строке на столик.
+
+    Args:
+        start: Начало окна поиска
+        end: Конец окна поиска
+        seats: Минимальное число мест
+        location: Только столики в этом расположении
+        table_id: Только этот столик
+
+    Returns:
+        list[TableAvailabilityRow]: Столики по возрастанию id с полем free — списком
+            интервалов {"start", "end"}; у полностью занятого столика он пуст
+    """
+    params = {"start": start, "end": end, "seats": seats}
+    filters = ""
+    if location is not None:
+        filters += " AND t.location = :location"
+        params["location"] = location
+    if table_id is not None:
+        filters += " AND t.id = :table_id"
+        params["table_id"] = table_id
+
+    result = await session.execute(text(AVAILABILITY_QUERY.format(filters=filters)), params)
+
+    return [
+        {
+            "id": row.id,
+            "name": row.name,
+            "seats": row.seats,
+            "location": row.location,
+            "free": [
+                {"start": slot_start, "end": slot_end}
+                for slot_start, slot_end in zip(row.slot_starts, row.slot_ends)
+            ],
+        }
+        for row in result
+    ]
@@ -0,0 +1,72 @@
+import logging
+import time
+from datetime import datetime, timedelta
+import anyio
+from sqlalchemy.exc import IntegrityError
+from app.database import DBSession, session_scope
+from app.models.models import RESERVATION_VERSION_SEQ, TABLE_VERSION_SEQ
+from app.schemas.reservation import ReservationCreate
+from app.services.etag import collection_version
+from app.services.reservation import insert_reservation, list_reservations
+from app.services.table import find_available_tables, list_tables
+
+
+logger = logging.getLogger(__name__)
+
+# Параметры прогрева: текст запросов тот же, что у маршрутов, а строк нет
+WARM_UP_TIME = datetime(2000, 1, 1)
+WARM_UP_SEATS = 2 ** 31 - 1
+
+
+async def run_hot_statements(session: DBSession) -> None:
+    """
+    Выполняет запросы горячих маршрутов.
+
+    Первое выполнение запроса компилирует его в SQLAlchemy (кэш компиляции
+    движка) и, для asyncpg, подготавливает оператор на соединении. Данные не
+    меняются: запросы на чтение ничего не находят, а INSERT бронирования
+    (insert_reservation) ссылается на несуществующий столик и отклоняется
+    внешним ключом — он идет последним, после него транзакция откатывается.
+    """
+    await collection_version(session, TABLE_VERSION_SEQ)
+    await collection_version(session, RESERVATION_VERSION_SEQ)
+    await list_tables(session, limit=1)
+    await list_reservations(session, limit=1)
+    await list_reservations(session, limit=1, after=(WARM_UP_TIME, 0))
+    await find_available_tables(session, WARM_UP_TIME, WARM_UP_TIME + timedelta(hours=1), seats=WARM_UP_SEATS)
+    try:
+        await insert_reservation(session, ReservationCreate(
+            customer_name="warm-up", table_id=0, reservation_time=WARM_UP_TIME, duration_minutes=1,
+        ))
+    except IntegrityError:
+        pass
+
+
+async def warm_up_pool(connections: int) -> None:
+    """
+    Открывает connections соединений пула и прогревает на них горячие запросы.
+
+    Вызывается при старте воркера, чтобы первые запросы не платили за
+    установку соединений и компиляцию SQL. Ошибка прогрева не мешает
+    старту: соединения откроются по мере запросов.
+
+    Args:
+        connections: Сколько соединений открыть одновременно, 0 — не прогревать
+    """
+    if connections <= 0:
+        return
+    started = time.perf_counter()
+
+    async def warm_up_connection() -> None:
+        async with session_scope() as session:
+            await run_hot_statements(session)
+            await session.rollback()
+
+    try:
+        async with anyio.create_task_group() as tg:
+            for _ in range(connections):
+                tg.start_soon(warm_up_connection)
+    except Exception as e:
+        logger.warning("Прогрев пула соединений не удался: %s", e)
+        return
+    logger.info("Пул прогрет: %s соединений за %.0f мс", connections, (time.perf_counter() - started) * 1000)
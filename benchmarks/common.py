@@ -0,0 +1,133 @@
+"""
+Общие утилиты нагрузочных бенчмарков: запуск сервера и замер латентности.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Перцентиль p (0..100) по методу ближайшего ранга."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+@dataclass
+class LoadResult:
+    requests: int
+    errors: int
+    duration_s: float
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    error_rate: float = 0.0
+    statuses: dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+async def run_load(
+        client: httpx.AsyncClient,
+        send: Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]],
+        concurrency: int,
+        duration: float,
+) -> LoadResult:
+    """
+    Гоняет `concurrency` параллельных клиентов в течение `duration` секунд.
+
+    Args:
+        client: HTTP-клиент, общий для всех воркеров
+        send: корутина, отправляющая один запрос; получает номер итерации
+        concurrency: число параллельных воркеров
+        duration: длительность прогона в секундах
+
+    Returns:
+        LoadResult: rps, перцентили латентности, число ошибок (5xx и сетевые)
+            и число ответов по статусам ("error" — сетевые ошибки)
+    """
+    latencies: list[float] = []
+    statuses: Counter[str] = Counter()
+    errors = 0
+    counter = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors, counter
+        while time.perf_counter() < deadline:
+            counter += 1
+            started = time.perf_counter()
+            try:
+                response = await send(client, counter)
+                statuses[str(response.status_code)] += 1
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                statuses["error"] += 1
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return LoadResult(
+        requests=len(latencies),
+        errors=errors,
+        duration_s=round(elapsed, 3),
+        rps=round(len(latencies) / elapsed, 1),
+        p50_ms=round(percentile(latencies, 50), 2),
+        p95_ms=round(percentile(latencies, 95), 2),
+        p99_ms=round(percentile(latencies, 99), 2),
+        error_rate=round(errors / len(latencies), 4) if latencies else 0.0,
+        statuses=dict(sorted(statuses.items())),
+    )
+
+
+@contextmanager
+def run_server(database_url: str, port: int, extra_env: dict | None = None):
+    """
+    Запускает приложение в отдельном процессе uvicorn и ждет готовности.
+
+    Yields:
+        str: базовый URL запущенного сервера
+    """
+    env = {**os.environ, "DATABASE_URL": database_url, **(extra_env or {})}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(base_url + "/", timeout=0.5)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError("Сервер не запустился")
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
@@ -0,0 +1,106 @@
+"""
+Размер ответа со списком бронирований и цена его кодирования.
+
+Для страницы из --rows бронирований (синтетические строки, как их выбирает
+list_reservations) сравниваются формат json (массив объектов) и columnar
+(столбцы) без сжатия, с gzip и brotli разных уровней: байты тела, время
+сериализации и сжатия на CPU и время передачи по каналу --link-mbit Мбит/с.
+
+Запуск:
+    python -m benchmarks.compression --rows 1000 10000
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.middleware.compression import BROTLI_QUALITY, GZIP_LEVEL
+from app.services.serialization import RESERVATION_COLUMNAR, RESERVATION_ROWS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+NAMES = ["Иван Петров", "Анна Смирнова", "Олег Кузнецов", "Мария Попова", "John Smith", "Елена Васильева"]
+
+
+def make_rows(count: int) -> list[dict]:
+    random.seed(count)
+    start = datetime(2030, 1, 1, 12)
+    return [
+        {
+            "id": 100_000 + i,
+            "customer_name": random.choice(NAMES),
+            "table_id": random.randint(1, 200),
+            "reservation_time": start + timedelta(minutes=15 * (i // 20)),
+            "duration_minutes": random.choice((60, 90, 120)),
+        }
+        for i in range(count)
+    ]
+
+
+def best_time(func, *args, repeat: int = 5) -> float:
+    """Лучшее из repeat время вызова, миллисекунды."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def encode_json(rows: list[dict]) -> bytes:
+    return RESERVATION_ROWS.dump_json(rows)
+
+
+def encode_columnar(rows: list[dict]) -> bytes:
+    fields = RESERVATION_COLUMNAR.core_schema["fields"]
+    return RESERVATION_COLUMNAR.dump_json({field: [row[field] for row in rows] for field in fields})
+
+
+def compressors() -> dict:
+    result = {"identity": lambda body: body}
+    for level in (1, GZIP_LEVEL, 9):
+        result[f"gzip-{level}"] = lambda body, level=level: gzip.compress(body, level, mtime=0)
+    if brotli is not None:
+        for quality in (1, BROTLI_QUALITY, 6, 11):
+            result[f"br-{quality}"] = lambda body, quality=quality: brotli.compress(body, quality=quality)
+    return result
+
+
+def run(rows_count: int, link_mbit: float) -> list[dict]:
+    rows = make_rows(rows_count)
+    results = []
+    for format_name, encode in (("json", encode_json), ("columnar", encode_columnar)):
+        body = encode(rows)
+        encode_ms = best_time(encode, rows)
+        for encoding, compress in compressors().items():
+            compressed = compress(body)
+            compress_ms = best_time(compress, body, repeat=1 if encoding == "br-11" else 5)
+            results.append({
+                "rows": rows_count,
+                "format": format_name,
+                "encoding": encoding,
+                "bytes": len(compressed),
+                "encode_ms": round(encode_ms, 2),
+                "compress_ms": round(compress_ms, 2),
+                "transfer_ms": round(len(compressed) * 8 / (link_mbit * 1000), 1),
+            })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--link-mbit", type=float, default=2.0, help="Пропускная способность канала, Мбит/с")
+    args = parser.parse_args()
+    results = [result for rows in args.rows for result in run(rows, args.link_mbit)]
+    for result in results:
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+Нагрузочный прогон API бронирования: наполнение БД, сценарии нагрузки и
+отчет в JSON для сравнения прогонов между собой.
+"""
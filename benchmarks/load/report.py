@@ -0,0 +1,73 @@
+"""
+Отчет нагрузочного прогона и сравнение с отчетом предыдущего прогона.
+"""
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+from benchmarks.common import ROOT_DIR
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(config: dict, scenarios: dict[str, dict]) -> dict:
+    """
+    Собирает отчет: параметры прогона, окружение и результаты сценариев.
+
+    Args:
+        config (dict): Параметры прогона (объемы, конкурентность, seed, ...)
+        scenarios (dict): Результаты сценариев (LoadResult.as_dict)
+    """
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "config": config,
+        "scenarios": scenarios,
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> tuple[dict, list[str]]:
+    """
+    Сравнивает сценарии двух отчетов.
+
+    Регрессией считается падение rps, рост p95/p99 больше чем на долю
+    tolerance или рост доли ошибок.
+
+    Args:
+        baseline (dict): Отчет предыдущего прогона
+        current (dict): Отчет текущего прогона
+        tolerance (float): Допустимое относительное ухудшение (0.1 — 10%)
+
+    Returns:
+        tuple: Изменения по сценариям (в долях) и список регрессий
+    """
+    changes, regressions = {}, []
+    for name, result in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        delta = {
+            metric: round((result[metric] - before[metric]) / before[metric], 4) if before[metric] else None
+            for metric in ("rps", "p50_ms", "p95_ms", "p99_ms")
+        }
+        changes[name] = delta
+        if delta["rps"] is not None and delta["rps"] < -tolerance:
+            regressions.append(f"{name}: rps {before['rps']} -> {result['rps']}")
+        for metric in ("p95_ms", "p99_ms"):
+            if delta[metric] is not None and delta[metric] > tolerance:
+                regressions.append(f"{name}: {metric} {before[metric]} -> {result[metric]}")
+        if result["error_rate"] > before.get("error_rate", 0.0):
+            regressions.append(f"{name}: error_rate {before.get('error_rate', 0.0)} -> {result['error_rate']}")
+    return changes, regressions
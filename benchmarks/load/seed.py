@@ -0,0 +1,107 @@
+"""
+Наполнение БД для нагрузочного прогона.
+
+Столики создаются с расположением LOCATION, у каждого — серия
+непересекающихся бронирований по SLOT начиная с BASE_TIME. Перед
+наполнением прежние данные прогона удаляются, поэтому каждый сценарий
+стартует с одинакового состояния.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlmodel import SQLModel, create_engine
+
+from app.models.models import Table, Reservation  # noqa: F401 — регистрация моделей
+
+
+LOCATION = "bench-load"
+BASE_TIME = datetime(2200, 1, 1)
+SLOT = timedelta(hours=2)
+
+CLEANUP_QUERIES = (
+    text('DELETE FROM reservation USING "table" t WHERE reservation.table_id = t.id AND t.location = :location'),
+    text('DELETE FROM "table" WHERE location = :location'),
+)
+
+SEED_TABLES_QUERY = text("""
+    INSERT INTO "table" (name, seats, location)
+    SELECT 'load-' || n, 2 + n % 5, :location
+    FROM generate_series(1, :tables) AS n
+    ORDER BY n
+    RETURNING id
+""")
+
+# Бронирования раскладываются по столикам по кругу: i-я бронь столика
+# занимает i-й слот, поэтому строки не пересекаются
+SEED_RESERVATIONS_QUERY = text("""
+    INSERT INTO reservation (customer_name, table_id, reservation_time, duration_minutes)
+    SELECT
+        'load-' || n,
+        ids[1 + n % cardinality(ids)],
+        CAST(:base AS timestamp) + (n / cardinality(ids)) * CAST(:slot AS interval),
+        60
+    FROM generate_series(0, :reservations - 1) AS n,
+         (SELECT CAST(:table_ids AS int[]) AS ids) AS t
+    ORDER BY n
+    RETURNING id
+""")
+
+
+@dataclass
+class SeedData:
+    table_ids: list[int]
+    reservation_ids: list[int]
+    # Число занятых слотов у каждого столика: слоты после него свободны
+    slots_per_table: int
+
+
+def sync_url(database_url: str) -> str:
+    return make_url(database_url).set(drivername="postgresql+psycopg2").render_as_string(hide_password=False)
+
+
+def seed(database_url: str, tables: int, reservations: int) -> SeedData:
+    """
+    Удаляет данные прежнего прогона и создает столики и бронирования.
+
+    Args:
+        database_url (str): URL БД (драйвер заменяется на psycopg2)
+        tables (int): Число столиков
+        reservations (int): Число бронирований
+
+    Returns:
+        SeedData: id созданных строк в порядке создания
+    """
+    engine = create_engine(sync_url(database_url))
+    SQLModel.metadata.create_all(engine)
+    try:
+        with engine.begin() as connection:
+            for query in CLEANUP_QUERIES:
+                connection.execute(query, {"location": LOCATION})
+            table_ids = list(connection.execute(
+                SEED_TABLES_QUERY, {"tables": tables, "location": LOCATION}
+            ).scalars())
+            reservation_ids = list(connection.execute(SEED_RESERVATIONS_QUERY, {
+                "reservations": reservations,
+                "table_ids": table_ids,
+                "base": BASE_TIME,
+                "slot": SLOT,
+            }).scalars()) if reservations else []
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text('ANALYZE "table"'))
+            connection.execute(text("ANALYZE reservation"))
+    finally:
+        engine.dispose()
+    return SeedData(table_ids, reservation_ids, -(-reservations // tables))
+
+
+def cleanup(database_url: str) -> None:
+    """Удаляет данные прогона."""
+    engine = create_engine(sync_url(database_url))
+    try:
+        with engine.begin() as connection:
+            for query in CLEANUP_QUERIES:
+                connection.execute(query, {"location": LOCATION})
+    finally:
+        engine.dispose()
@@ -0,0 +1,111 @@
+"""
+Сценарии нагрузки.
+
+Каждый сценарий — корутина send(client, i) для benchmarks.common.run_load.
+Случайные решения принимаются генератором, зависящим только от seed
+прогона и номера итерации i, поэтому последовательность запросов
+повторяется от прогона к прогону (порядок выполнения между
+параллельными воркерами, конечно, зависит от планировщика).
+"""
+import random
+from collections import deque
+from datetime import timedelta
+from typing import Awaitable, Callable
+
+import httpx
+
+from benchmarks.load.seed import BASE_TIME, LOCATION, SLOT, SeedData
+
+
+Send = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+# Доли операций смешанного сценария
+MIXED_WEIGHTS = {"read": 80, "book": 15, "delete": 5}
+
+
+class Workloads:
+    """
+    Сценарии поверх данных одного наполнения.
+
+    Args:
+        data (SeedData): Созданные столики и бронирования
+        seed (int): Зерно генератора случайных чисел
+        hot_tables (int): Сколько столиков получают весь поток бронирований в booking_storm
+        hot_slots (int): Среди скольких слотов выбирается время брони в booking_storm
+    """
+
+    def __init__(self, data: SeedData, seed: int, hot_tables: int = 5, hot_slots: int = 20):
+        self.data = data
+        self.seed = seed
+        self.hot_table_ids = data.table_ids[:hot_tables]
+        self.hot_slots = hot_slots
+        # Бронирования удаляются по одному разу: каждую забирает один запрос
+        self._deletable = deque(random.Random(seed).sample(data.reservation_ids, len(data.reservation_ids)))
+        # Последний ETag по URL: опрашивающие клиенты повторяют запрос с If-None-Match
+        self._etags: dict[str, str] = {}
+
+    def rng(self, i: int) -> random.Random:
+        return random.Random(self.seed * 1_000_003 + i)
+
+    @property
+    def scenarios(self) -> dict[str, Send]:
+        return {
+            "read": self.read,
+            "booking_storm": self.booking_storm,
+            "delete": self.delete,
+            "mixed": self.mixed,
+        }
+
+    async def _poll(self, client: httpx.AsyncClient, url: str) -> httpx.Response:
+        etag = self._etags.get(url)
+        response = await client.get(url, headers={"If-None-Match": etag} if etag else None)
+        if "etag" in response.headers:
+            self._etags[url] = response.headers["etag"]
+        return response
+
+    async def read(self, client: httpx.AsyncClient, i: int) -> httpx.Response:
+        """Опрос каталога и расписаний: списки с ETag, бронирования столика, поиск свободного времени."""
+        rng = self.rng(i)
+        kind = rng.random()
+        if kind < 0.4:
+            return await self._poll(client, f"/tables/?limit=50&location={LOCATION}")
+        if kind < 0.7:
+            table_id = rng.choice(self.data.table_ids)
+            return await self._poll(client, f"/reservations/?table_id={table_id}&limit=50")
+        start = BASE_TIME + SLOT * rng.randrange(max(1, self.data.slots_per_table))
+        return await client.get("/tables/availability", params={
+            "start": start.isoformat(),
+            "end": (start + timedelta(hours=8)).isoformat(),
+            "seats": rng.randint(1, 4),
+            "location": LOCATION,
+        })
+
+    async def booking_storm(self, client: httpx.AsyncClient, i: int) -> httpx.Response:
+        """
+        Бронирования горячих столиков на немногие слоты.
+
+        Слоты лежат после занятых наполнением, поэтому первая бронь слота
+        проходит (201), а повторные получают отказ «слот занят» (400).
+        """
+        rng = self.rng(i)
+        slot = self.data.slots_per_table + rng.randrange(self.hot_slots)
+        return await client.post("/reservations/", json={
+            "customer_name": f"storm-{i}",
+            "table_id": rng.choice(self.hot_table_ids),
+            "reservation_time": (BASE_TIME + SLOT * slot).isoformat(),
+            "duration_minutes": 60,
+        })
+
+    async def delete(self, client: httpx.AsyncClient, i: int) -> httpx.Response:
+        """Отмена бронирований из наполнения; когда они кончились — 404 на несуществующий id."""
+        reservation_id = self._deletable.popleft() if self._deletable else 0
+        return await client.delete(f"/reservations/{reservation_id}")
+
+    async def mixed(self, client: httpx.AsyncClient, i: int) -> httpx.Response:
+        """Чтение, бронирования и отмены в долях MIXED_WEIGHTS."""
+        operation = self.rng(i).choices(list(MIXED_WEIGHTS), weights=list(MIXED_WEIGHTS.values()))[0]
+        if operation == "book":
+            return await self.booking_storm(client, i)
+        if operation == "delete":
+            return await self.delete(client, i)
+        return await self.read(client, i)
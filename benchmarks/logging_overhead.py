@@ -0,0 +1,104 @@
+"""
+Накладные расходы логирования на запрос: прежняя схема (обработчики
+в потоке запроса, f-строки) против очереди QueueHandler/QueueListener
+с ленивыми %-аргументами.
+
+Каждый смоделированный запрос пишет те же записи, что create_reservation
+под uvicorn: строку access-лога, две INFO-записи приложения и одну
+отключенную DEBUG-запись. Запросы идут с частотой --rps в течение
+--duration секунд; замеряется только время внутри вызовов логгера.
+Файлы логов пишутся во временный каталог, консоль — в /dev/null.
+
+Запуск:
+    python -m benchmarks.logging_overhead --rps 1000 --duration 10
+"""
+import argparse
+import copy
+import json
+import logging
+import logging.config
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app.logging_config import LOG_CONFIG, setup_logging, stop_logging
+from app.schemas.reservation import ReservationCreate
+from benchmarks.common import percentile
+
+
+def config_in(log_dir: Path) -> dict:
+    config = copy.deepcopy(LOG_CONFIG)
+    config["handlers"]["file"]["filename"] = log_dir / "app.log"
+    config["handlers"]["access_file"]["filename"] = log_dir / "access.log"
+    return config
+
+
+def request_eager(app_logger, access_logger, reservation, reservation_id):
+    access_logger.info('%s - "%s %s HTTP/%s" %d', "127.0.0.1:5000", "POST", "/reservations/", "1.1", 201)
+    app_logger.info(f"Запрос на создание бронирования: {reservation.dict()}")
+    app_logger.debug(f"Параметры вставки: {reservation.model_dump()}")
+    app_logger.info(f"Бронирование создано: ID {reservation_id}")
+
+
+def request_lazy(app_logger, access_logger, reservation, reservation_id):
+    access_logger.info('%s - "%s %s HTTP/%s" %d', "127.0.0.1:5000", "POST", "/reservations/", "1.1", 201)
+    app_logger.info("Запрос на создание бронирования: %s", reservation)
+    app_logger.debug("Параметры вставки: %s", reservation)
+    app_logger.info("Бронирование создано: ID %s", reservation_id)
+
+
+def run(request, rps: int, duration: float) -> dict:
+    app_logger = logging.getLogger("app.routers.reservations")
+    access_logger = logging.getLogger("uvicorn.access")
+    reservation = ReservationCreate(
+        customer_name="Иван Иванов", table_id=1,
+        reservation_time=datetime(2030, 1, 1, 18, 0), duration_minutes=60,
+    )
+    total = int(rps * duration)
+    latencies = []
+    started = time.perf_counter()
+    for i in range(total):
+        delay = started + i / rps - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        t0 = time.perf_counter_ns()
+        request(app_logger, access_logger, reservation, i)
+        latencies.append((time.perf_counter_ns() - t0) / 1000)
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": total,
+        "achieved_rps": round(total / elapsed, 1),
+        "mean_us": round(sum(latencies) / len(latencies), 1),
+        "p50_us": round(percentile(latencies, 50), 1),
+        "p99_us": round(percentile(latencies, 99), 1),
+        "max_us": round(max(latencies), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    stdout = sys.stdout
+    sys.stderr = open(os.devnull, "w")
+    report = {}
+    with tempfile.TemporaryDirectory() as blocking_dir, tempfile.TemporaryDirectory() as queued_dir:
+        logging.config.dictConfig(config_in(Path(blocking_dir)))
+        report["blocking_fstring"] = run(request_eager, args.rps, args.duration)
+
+        setup_logging(config_in(Path(queued_dir)))
+        report["queued_lazy"] = run(request_lazy, args.rps, args.duration)
+        stop_logging()
+        logging.config.dictConfig({"version": 1, "disable_existing_loggers": False})
+
+    report["mean_speedup"] = round(report["blocking_fstring"]["mean_us"] / report["queued_lazy"]["mean_us"], 2)
+    print(json.dumps(report, indent=2), file=stdout)
+
+
+if __name__ == "__main__":
+    main()
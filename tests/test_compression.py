@@ -0,0 +1,75 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from app.middleware import compression
+from app.middleware.compression import CompressionMiddleware, choose_encoding
+
+BODY = "бронь " * 20_000
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse(BODY)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("ok")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([BODY.encode()] * 2), media_type="text/plain")
+
+    return TestClient(app)
+
+
+@pytest.mark.skipif(compression.brotli is None, reason="нужен пакет Brotli")
+def test_brotli_preferred(client: TestClient):
+    """br предпочтительнее gzip при равных q, q=0 запрещает кодировку, * разрешает любую"""
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("gzip;q=1.0, br;q=0.5") == "gzip"
+    assert choose_encoding("br;q=0, gzip") == "gzip"
+    assert choose_encoding("*") == "br"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("") is None
+    response = client.get("/large", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.text == BODY
+
+
+def test_gzip_without_brotli(monkeypatch, client: TestClient):
+    """Без пакета Brotli ответ сжимается gzip, даже если клиент предпочитает br"""
+    monkeypatch.setattr(compression, "brotli", None)
+
+    response = client.get("/large", headers={"Accept-Encoding": "br, gzip;q=0.5"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(BODY.encode()) / 10
+    assert response.text == BODY
+    assert choose_encoding("br") is None
+
+
+def test_only_whole_large_bodies_are_compressed(client: TestClient):
+    """Маленькие и потоковые ответы не сжимаются и не зависят от Accept-Encoding"""
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    stream = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    for response in (small, stream):
+        assert "content-encoding" not in response.headers
+        assert "vary" not in response.headers
+
+
+def test_identity_response_varies_on_accept_encoding(client: TestClient):
+    """Ответ, который мог быть сжат, получает Vary и без сжатия: кэш не отдаст его клиентам с gzip"""
+    for accept_encoding in ("identity", ""):
+        plain = client.get("/large", headers={"Accept-Encoding": accept_encoding})
+
+        assert "content-encoding" not in plain.headers
+        assert plain.headers["vary"] == "Accept-Encoding"
+        assert plain.text == BODY
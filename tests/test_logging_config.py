@@ -0,0 +1,56 @@
+import copy
+import logging
+from logging.handlers import QueueHandler
+import pytest
+from app.logging_config import LOG_CONFIG, DeferredQueueHandler, setup_logging, stop_logging
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    """Логирование в файлы временного каталога; после теста — прежняя настройка."""
+    config = copy.deepcopy(LOG_CONFIG)
+    config["handlers"]["file"]["filename"] = tmp_path / "app.log"
+    config["handlers"]["access_file"]["filename"] = tmp_path / "access.log"
+    setup_logging(config)
+    yield tmp_path
+    setup_logging()
+
+
+def test_loggers_only_enqueue_records(log_dir):
+    """Логгеры пишут в очередь, а обработчики работают в фоновых потоках"""
+    error_handlers = logging.getLogger("uvicorn.error").handlers
+    access_handlers = logging.getLogger("uvicorn.access").handlers
+    root_queues = [h for h in logging.getLogger().handlers if isinstance(h, QueueHandler)]
+
+    assert len(error_handlers) == len(access_handlers) == 1
+    assert isinstance(access_handlers[0], DeferredQueueHandler)
+    assert root_queues == error_handlers
+    assert not isinstance(error_handlers[0], DeferredQueueHandler)
+
+
+def test_messages_are_formatted_at_call_time(log_dir):
+    """Аргументы подставляются при вызове, трассировка сохраняется текстом; access.log — из record.args"""
+    payload = {"customer_name": "Гость"}
+    records = []
+    handler = logging.getLogger("uvicorn.error").handlers[0]
+    original_enqueue = handler.enqueue
+    handler.enqueue = lambda record: records.append(record) or original_enqueue(record)
+
+    # uvicorn.error пишет в те же обработчики, что и корневой логгер, но не
+    # передает записи обработчикам pytest, которые форматируют их сразу
+    logging.getLogger("uvicorn.error").info("Запрос: %s", payload)
+    payload["customer_name"] = "Изменено"
+    try:
+        raise ValueError("ошибка")
+    except ValueError:
+        logging.getLogger("uvicorn.error").exception("Сбой")
+    logging.getLogger("uvicorn.access").info(
+        '%s - "%s %s HTTP/%s" %d', "127.0.0.1:5000", "GET", "/tables/", "1.1", 200
+    )
+    stop_logging()
+
+    app_log = (log_dir / "app.log").read_text()
+    assert "Запрос: {'customer_name': 'Гость'}" in app_log
+    assert "ValueError: ошибка" in app_log
+    assert all(record.args is None and record.exc_info is None for record in records)
+    assert '"GET /tables/ HTTP/1.1" 200' in (log_dir / "access.log").read_text()
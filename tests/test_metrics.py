@@ -0,0 +1,215 @@
+import logging
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+from app.database import dispose_engine, instrument_queries, is_async_mode, session_scope
+from app.main import app
+from app.metrics.http import HttpMetrics
+from app.metrics.pool import InstrumentedAsyncQueuePool, PoolMetrics
+from app.metrics.queries import QueryMetrics, normalize_statement, query_metrics
+from app.middleware.logging_middleware import RequestTelemetryMiddleware
+from tests.conftest import DATABASE_URL
+
+
+@pytest.fixture
+def client():
+    """
+    Фикстура для тестирования клиента FastAPI.
+    """
+    return TestClient(app)
+
+
+def telemetry_client(metrics: HttpMetrics, sample_rate: float = 0.0, debug: bool = False) -> TestClient:
+    """Клиент минимального приложения с телеметрией запросов."""
+    telemetry_app = FastAPI()
+
+    @telemetry_app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    @telemetry_app.get("/queries/{count}")
+    async def run_queries(count: int):
+        async with session_scope() as session:
+            for _ in range(count):
+                await session.execute(text("SELECT 1"))
+        if is_async_mode():
+            # TestClient без with запускает каждый запрос в новом цикле событий,
+            # а соединение asyncpg привязано к циклу, в котором открыто
+            await dispose_engine()
+        return {"count": count}
+
+    telemetry_app.add_middleware(RequestTelemetryMiddleware, metrics=metrics, sample_rate=sample_rate, debug=debug)
+    return TestClient(telemetry_app)
+
+
+def test_instrumented_pool_logs_under_sqlalchemy(caplog):
+    """Логгер пула с замером ожидания — в иерархии sqlalchemy и не пишет INFO при корневом уровне INFO"""
+    caplog.set_level(logging.INFO)
+
+    pool = InstrumentedAsyncQueuePool(MagicMock())
+
+    assert pool.logger.name.startswith("sqlalchemy.pool.")
+    assert not pool.logger.isEnabledFor(logging.INFO)
+
+
+def test_telemetry_labels_by_route_template():
+    """
+    Тестируем, что запросы учитываются по шаблону маршрута, а не по сырому URL.
+    """
+    metrics = HttpMetrics()
+    client = telemetry_client(metrics)
+
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/items/abc")
+    client.get("/missing/42")
+    text = "\n".join(line for lines in metrics.prometheus() for line in lines)
+
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{item_id}"} 3' in text
+    assert 'http_responses_total{method="GET",route="/items/{item_id}",status="200"} 2' in text
+    assert 'http_responses_total{method="GET",route="/items/{item_id}",status="422"} 1' in text
+    assert 'http_responses_total{method="GET",route="<unmatched>",status="404"} 1' in text
+    assert 'le="+Inf"} 3' in text
+    assert "/items/1" not in text
+
+
+def test_telemetry_logs_only_sampled_requests(caplog):
+    """
+    Тестируем, что без сэмплирования строка лога на запрос не пишется.
+    """
+    name = "app.middleware.logging_middleware"
+    caplog.set_level(logging.INFO, logger=name)
+
+    telemetry_client(HttpMetrics(), sample_rate=0.0).get("/items/1")
+    assert not [record for record in caplog.records if record.name == name]
+
+    telemetry_client(HttpMetrics(), sample_rate=1.0).get("/items/1")
+    records = [record for record in caplog.records if record.name == name]
+    assert len(records) == 1
+    assert '"route": "/items/{item_id}"' in records[0].getMessage()
+
+
+def test_telemetry_counts_queries_per_request():
+    """
+    Тестируем подсчет SQL-запросов на HTTP-запрос и заголовки режима отладки.
+    """
+    metrics = HttpMetrics()
+
+    response = telemetry_client(metrics, debug=True).get("/queries/3")
+    text = "\n".join(line for lines in metrics.prometheus() for line in lines)
+
+    assert response.headers["x-db-query-count"] == "3"
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert 'http_request_db_queries_total{method="GET",route="/queries/{count}"} 3' in text
+    assert "x-db-query-count" not in telemetry_client(metrics).get("/queries/1").headers
+
+
+def test_normalize_statement_collapses_value_lists():
+    """
+    Тестируем, что запросы с разным числом строк VALUES и элементов IN совпадают.
+    """
+    assert normalize_statement(
+        "INSERT INTO t (a, b)\n  VALUES (%(a__0)s, %(b__0)s), (%(a__1)s, %(b__1)s)"
+    ) == "INSERT INTO t (a, b) VALUES (%(a__0)s, %(b__0)s), ..."
+    assert normalize_statement("SELECT * FROM t WHERE id IN ($1, $2, $3)") == \
+        normalize_statement("SELECT * FROM t WHERE id IN ($1, $2)")
+
+
+def test_query_metrics_snapshot_orders_by_total_time():
+    """
+    Тестируем агрегацию времени запросов по тексту.
+    """
+    metrics = QueryMetrics()
+    metrics.observe("SELECT 1", 0.001)
+    metrics.observe("SELECT  1", 0.003)
+    metrics.observe("SELECT 2", 0.002, slow=True)
+
+    snapshot = metrics.snapshot()
+
+    assert snapshot["queries_total"] == 3
+    assert snapshot["slow_queries_total"] == 1
+    assert [s["statement"] for s in snapshot["statements"]] == ["SELECT 1", "SELECT 2"]
+    assert snapshot["statements"][0]["count"] == 2
+    assert snapshot["statements"][0]["seconds_max"] == 0.003
+
+
+def test_slow_query_logged_with_plan(caplog):
+    """
+    Тестируем, что медленный запрос логируется с планом и не ломает транзакцию.
+    """
+    caplog.set_level(logging.WARNING, logger="app.database")
+    engine = create_engine(DATABASE_URL)
+    instrument_queries(engine, slow_query_ms=0.000001)
+    slow_before = query_metrics.snapshot()["slow_queries_total"]
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT count(*) FROM generate_series(1, :n)"), {"n": 10})
+        assert connection.execute(text("SELECT 1")).scalar_one() == 1
+    engine.dispose()
+
+    messages = [r.getMessage() for r in caplog.records if r.name == "app.database"]
+    assert any("generate_series" in m and "Function Scan" in m for m in messages)
+    assert query_metrics.snapshot()["slow_queries_total"] >= slow_before + 2
+
+
+def test_pool_snapshot_counts_overflow():
+    """
+    Тестируем снимок пула: занятые соединения и использование overflow.
+    """
+    metrics = PoolMetrics()
+    pool = QueuePool(creator=MagicMock, pool_size=2, max_overflow=2)
+    connections = [pool.connect() for _ in range(3)]
+    metrics.observe_wait(0.002)
+    metrics.observe_wait(0.5, timed_out=True)
+
+    snapshot = metrics.snapshot(pool)
+
+    assert snapshot["pool_size"] == 2
+    assert snapshot["max_overflow"] == 2
+    assert snapshot["checked_out"] == 3
+    assert snapshot["overflow_in_use"] == 1
+    assert snapshot["checkouts_total"] == 1
+    assert snapshot["checkout_timeouts_total"] == 1
+    assert snapshot["checkout_wait_seconds_max"] == 0.5
+    for connection in connections:
+        connection.close()
+
+
+def test_get_pool_metrics(client: TestClient):
+    """
+    Тестируем эндпоинт метрик пула соединений.
+    """
+    response = client.get("/metrics/pool")
+
+    assert response.status_code == 200
+    assert "checked_out" in response.json()
+    assert "checkout_wait_seconds_avg" in response.json()
+
+
+def test_get_prometheus_metrics(client: TestClient):
+    """
+    Тестируем эндпоинт метрик в формате Prometheus.
+    """
+    client.get("/metrics/pool")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert 'route="/metrics/pool"' in response.text
+    assert "db_pool_checked_out " in response.text
+    assert "table_cache_hits_total " in response.text
+
+
+def test_get_query_metrics(client: TestClient):
+    """
+    Тестируем эндпоинт метрик SQL-запросов.
+    """
+    response = client.get("/metrics/queries", params={"limit": 1})
+
+    assert response.status_code == 200
+    assert "queries_total" in response.json()
+    assert len(response.json()["statements"]) <= 1
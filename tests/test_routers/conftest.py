@@ -0,0 +1,26 @@
+import anyio
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+from app.database import ThreadPoolSession, get_read_session, get_session
+from app.main import app
+
+
+@pytest.fixture
+def db_client(session: Session):
+    """
+    Клиент FastAPI, обработчики которого работают в транзакции теста.
+
+    get_session и get_read_session подменяются сессией теста: записи через
+    API откатываются вместе с ней, а тест видит их без commit в БД.
+    Сессия теста не закрывается после запроса, поэтому слот пула у каждого
+    запроса свой: иначе запросы теста исчерпали бы слоты пула приложения.
+    """
+    async def override_session():
+        yield ThreadPoolSession(session, anyio.Semaphore(1))
+
+    app.dependency_overrides[get_session] = override_session
+    app.dependency_overrides[get_read_session] = override_session
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_session, None)
+    app.dependency_overrides.pop(get_read_session, None)
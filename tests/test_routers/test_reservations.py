@@ -1,10 +1,17 @@
+import anyio
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
-from app.database import get_session
-from unittest.mock import MagicMock
-from app.models.models import Reservation
+from app.database import ThreadPoolSession, get_read_session, get_session
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.exc import IntegrityError
+from app.models.models import Reservation, Table
+from app.routers import reservations
 from app.schemas.reservation import ReservationCreate
+from app.services.booking_queue import booking_queue
+from app.services.bulk import BULK_MAX_ITEMS
+from app.services.idempotency import request_fingerprint
+from app.services.occupancy import OccupancyIndex, load_occupancy
 import datetime
 
 
@@ -22,13 +29,27 @@ def mock_session():
     """
     Мок-сессия для тестирования базы данных.
     """
-    mock = MagicMock()
+    mock = AsyncMock()
+    mock.add = MagicMock()
+    mock.execute.return_value = MagicMock()
+    mock.get.return_value = Reservation(
+        id=1, table_id=1, reservation_time=datetime.datetime(2025, 4, 10, 12, 0),
+        duration_minutes=60, customer_name="alesha",
+    )
 
     # Мокируем данные для таблиц и бронирований
-    mock.query.return_value.all.return_value = [
+    mock.execute.return_value.scalars.return_value.all.return_value = [
         Reservation(id=1, table_id=1, reservation_time="2025-04-10T12:00:00", duration_minutes=60, customer_name="alesha"),
         Reservation(id=2, table_id=2, reservation_time="2025-04-10T14:00:00", duration_minutes=90, customer_name="alesha2")
     ]
+    # Списки выбирают столбцы: keys() и all() возвращают имена и кортежи значений
+    mock.execute.return_value.keys.return_value = [
+        "id", "customer_name", "table_id", "reservation_time", "duration_minutes"
+    ]
+    mock.execute.return_value.all.return_value = [
+        (1, "alesha", 1, datetime.datetime(2025, 4, 10, 12, 0), 60),
+        (2, "alesha2", 2, datetime.datetime(2025, 4, 10, 14, 0), 90),
+    ]
     return mock
 
 
@@ -43,7 +64,7 @@ def test_get_reservations(client: TestClient, mock_session):
     """
     Тестируем запрос на получение списка бронирований.
     """
-    app.dependency_overrides[get_session] = lambda: mock_session
+    app.dependency_overrides[get_read_session] = lambda: mock_session
 
     response = client.get("/reservations")
 
@@ -52,11 +73,35 @@ def test_get_reservations(client: TestClient, mock_session):
     assert response.json()[1]["reservation_time"] == "2025-04-10T14:00:00"
 
 
+def test_get_reservations_next_cursor(client: TestClient, mock_session):
+    """
+    Тестируем выдачу курсора следующей страницы.
+    """
+    app.dependency_overrides[get_read_session] = lambda: mock_session
+
+    response = client.get("/reservations", params={"limit": 1})
+
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert response.headers["X-Next-Cursor"]
+
+
+def test_get_reservations_invalid_cursor(client: TestClient, mock_session):
+    """
+    Тестируем запрос с поврежденным курсором.
+    """
+    app.dependency_overrides[get_read_session] = lambda: mock_session
+
+    response = client.get("/reservations", params={"cursor": "garbage"})
+
+    assert response.status_code == 400
+
+
 def test_create_reservation_conflict(client: TestClient, mock_session):
     """
     Тестируем создание бронирования с конфликтом времени.
     """
-    mock_session.query.return_value.filter.return_value.first.return_value = Reservation(id=1,
+    mock_session.execute.return_value.scalar.return_value = Reservation(id=1,
                                                                                          table_id=1,
                                                                                          reservation_time="2025-04-10T12:00:00",
                                                                                          duration_minutes=60)
@@ -68,6 +113,93 @@ def test_create_reservation_conflict(client: TestClient, mock_session):
     assert response.status_code == 422
 
 
+def test_create_reservation(client: TestClient, mock_session, new_reservation_data):
+    """
+    Тестируем создание бронирования одним INSERT ... RETURNING.
+    """
+    row = MagicMock(id=5)
+    row._asdict.return_value = {"id": 5, **new_reservation_data.model_dump()}
+    mock_session.execute.return_value.one.return_value = row
+
+    app.dependency_overrides[get_session] = lambda: mock_session
+
+    response = client.post("/reservations/", json=new_reservation_data.model_dump(mode="json"))
+
+    assert response.status_code == 201
+    assert response.json()["id"] == 5
+    insert_call, version_call = mock_session.execute.await_args_list
+    assert insert_call.args[0].is_insert
+    assert "reservation_version_seq" in str(version_call.args[0])
+
+
+def test_create_reservation_idempotent_replay(client: TestClient, mock_session, new_reservation_data):
+    """
+    Тестируем, что повтор с Idempotency-Key получает сохраненный ответ без вставки.
+    """
+    stored_body = '{"id":5,"customer_name":"test_name"}'
+    mock_session.execute.return_value.one_or_none.return_value = MagicMock(
+        request_hash=request_fingerprint(new_reservation_data), status_code=201, response=stored_body,
+    )
+
+    app.dependency_overrides[get_session] = lambda: mock_session
+
+    response = client.post("/reservations/", json=new_reservation_data.model_dump(mode="json"),
+                           headers={"Idempotency-Key": "retry-1"})
+
+    assert response.status_code == 201
+    assert response.text == stored_body
+    assert response.headers["Idempotent-Replayed"] == "true"
+    mock_session.execute.assert_awaited_once()
+    mock_session.commit.assert_not_awaited()
+
+
+def test_create_reservation_idempotency_key_reused(client: TestClient, mock_session, new_reservation_data):
+    """
+    Тестируем ответ 422 на тот же Idempotency-Key с другим телом запроса.
+    """
+    mock_session.execute.return_value.one_or_none.return_value = MagicMock(
+        request_hash="другой запрос", status_code=201, response="{}",
+    )
+
+    app.dependency_overrides[get_session] = lambda: mock_session
+
+    response = client.post("/reservations/", json=new_reservation_data.model_dump(mode="json"),
+                           headers={"Idempotency-Key": "retry-1"})
+
+    assert response.status_code == 422
+    mock_session.execute.assert_awaited_once()
+
+
+@pytest.mark.parametrize("pgcode, status_code", [("23P01", 400), ("23503", 404)])
+def test_create_reservation_integrity_error(client: TestClient, mock_session, new_reservation_data,
+                                            pgcode, status_code):
+    """
+    Тестируем преобразование нарушений ограничений БД в ответы 400 и 404.
+    """
+    mock_session.execute.side_effect = IntegrityError("INSERT", {}, MagicMock(pgcode=pgcode))
+
+    app.dependency_overrides[get_session] = lambda: mock_session
+
+    response = client.post("/reservations/", json=new_reservation_data.model_dump(mode="json"))
+
+    assert response.status_code == status_code
+    mock_session.rollback.assert_awaited_once()
+
+
+def test_create_reservations_bulk_too_large(client: TestClient, mock_session):
+    """
+    Тестируем ограничение размера пачки бронирований.
+    """
+    app.dependency_overrides[get_session] = lambda: mock_session
+    item = {"customer_name": "bulk", "table_id": 1,
+            "reservation_time": "2025-04-10T16:00:00", "duration_minutes": 60}
+
+    response = client.post("/reservations/bulk", json=[item] * (BULK_MAX_ITEMS + 1))
+
+    assert response.status_code == 422
+    mock_session.execute.assert_not_called()
+
+
 def test_delete_reservation(client: TestClient, mock_session):
     """
     Тестируем удаление бронирования.
@@ -104,3 +236,95 @@ def test_delete_reservation_error(client: TestClient, mock_session):
     response = client.delete("/reservations/1")
 
     assert response.status_code == 500
+
+
+@pytest.mark.parametrize("status, status_code", [("conflict", 400), ("table_not_found", 404)])
+def test_create_reservation_queued(client: TestClient, mock_session, new_reservation_data,
+                                   monkeypatch, status, status_code):
+    """
+    Тестируем создание бронирования через очередь столика без сессии запроса.
+    """
+    monkeypatch.setattr(booking_queue, "enabled", True)
+    monkeypatch.setattr(booking_queue, "submit", AsyncMock(return_value={"status": status, "reservation": None}))
+
+    app.dependency_overrides[get_session] = lambda: mock_session
+
+    response = client.post("/reservations/", json=new_reservation_data.model_dump(mode="json"))
+
+    assert response.status_code == status_code
+    mock_session.execute.assert_not_awaited()
+
+
+def test_create_reservation_in_db(db_client: TestClient, session):
+    """
+    Тестируем создание бронирования и конфликт слота на настоящей БД.
+    """
+    table = Table(name="A1", seats=2, location="Hall")
+    session.add(table)
+    session.commit()
+    payload = {"customer_name": "Гость", "table_id": table.id,
+               "reservation_time": "2030-01-01T18:00:00", "duration_minutes": 60}
+
+    created = db_client.post("/reservations/", json=payload)
+    conflict = db_client.post("/reservations/", json={**payload, "reservation_time": "2030-01-01T18:30:00"})
+    listed = db_client.get("/reservations/", params={"table_id": table.id})
+    columnar = db_client.get("/reservations/", params={"table_id": table.id, "format": "columnar"})
+
+    assert created.status_code == 201
+    assert conflict.status_code == 400
+    assert [r["id"] for r in listed.json()] == [created.json()["id"]]
+    assert columnar.json() == {
+        "id": [created.json()["id"]], "customer_name": ["Гость"], "table_id": [table.id],
+        "reservation_time": ["2030-01-01T18:00:00"], "duration_minutes": [60],
+    }
+
+
+def test_create_reservations_with_utc_offset(db_client: TestClient, session, monkeypatch):
+    """
+    Тестируем, что время с часовым поясом сохраняется в UTC и попадает в индекс занятости без ошибки.
+    """
+    table = Table(name="A1", seats=2, location="Hall")
+    session.add(table)
+    session.commit()
+    index = OccupancyIndex(slot_minutes=15, horizon_days=2)
+    anyio.run(load_occupancy, ThreadPoolSession(session, anyio.Semaphore(1)), index, datetime.datetime(2030, 1, 1))
+    monkeypatch.setattr(reservations, "occupancy_index", index)
+    payload = {"customer_name": "Гость", "table_id": table.id, "duration_minutes": 60}
+
+    created = db_client.post("/reservations/", json={**payload, "reservation_time": "2030-01-01T18:00:00Z"})
+    bulk = db_client.post("/reservations/bulk", json=[
+        {**payload, "reservation_time": "2030-01-01T22:00:00+03:00"},
+        {**payload, "reservation_time": "2030-01-01T20:00:00+00:00"},
+    ])
+    listed = db_client.get("/reservations/", params={"table_id": table.id, "start": "2030-01-01T18:00:00Z"})
+
+    assert created.status_code == 201
+    assert created.json()["reservation_time"] == "2030-01-01T18:00:00"
+    assert bulk.status_code == 200
+    assert [result["status"] for result in bulk.json()] == ["created", "created"]
+    assert [r["reservation_time"] for r in listed.json()] == [
+        "2030-01-01T18:00:00", "2030-01-01T19:00:00", "2030-01-01T20:00:00",
+    ]
+    assert index.stats()["reservations"] == 3
+    assert index.is_free(table.id, datetime.datetime(2030, 1, 1, 21), datetime.datetime(2030, 1, 1, 22))
+
+
+def test_index_error_does_not_fail_committed_write(db_client: TestClient, session, monkeypatch):
+    """
+    Тестируем, что ошибка индекса занятости после COMMIT не превращает созданную бронь в ответ 500.
+    """
+    table = Table(name="A1", seats=2, location="Hall")
+    session.add(table)
+    session.commit()
+    index = OccupancyIndex(slot_minutes=15, horizon_days=2)
+    monkeypatch.setattr(index, "add", MagicMock(side_effect=RuntimeError("сбой индекса")))
+    monkeypatch.setattr(reservations, "occupancy_index", index)
+
+    response = db_client.post("/reservations/bulk", json=[{
+        "customer_name": "Гость", "table_id": table.id, "reservation_time": "2030-01-01T18:00:00",
+        "duration_minutes": 60,
+    }])
+
+    assert response.status_code == 200
+    assert response.json()[0]["status"] == "created"
+    index.add.assert_called_once()
@@ -0,0 +1,175 @@
+import csv
+import io
+import json
+import os
+import resource
+import anyio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session
+from app.main import app
+from app.database import ThreadPoolSession, get_read_session_scope
+from app.models.models import Table
+from app.services.archive import archive_batch
+from app.services.export import EXPORT_FIELDS
+
+
+EXPORT_TEST_ROWS = int(os.getenv("EXPORT_TEST_ROWS", "2000000"))
+
+
+@pytest.fixture
+def client(session: Session):
+    """
+    Клиент FastAPI, выгрузка которого читает из сессии теста.
+    """
+    @asynccontextmanager
+    async def session_scope():
+        db = ThreadPoolSession(session)
+        try:
+            yield db
+        finally:
+            await db.close()
+
+    app.dependency_overrides[get_read_session_scope] = lambda: session_scope
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_read_session_scope)
+
+
+def seed_reservations(session: Session, rows: int) -> Table:
+    table = Table(name="X1", seats=2, location="Hall")
+    session.add(table)
+    session.commit()
+    session.execute(
+        text("""
+            INSERT INTO reservation (customer_name, table_id, reservation_time, duration_minutes)
+            SELECT 'Guest ' || n, :table_id, CAST(:base AS timestamp) + n * interval '1 hour', 60
+            FROM generate_series(1, :rows) AS n
+        """),
+        {"table_id": table.id, "base": datetime(2030, 1, 1), "rows": rows},
+    )
+    session.commit()
+    return table
+
+
+def test_export_ndjson(client: TestClient, session: Session):
+    """
+    Тестируем выгрузку в NDJSON: одна строка — одно бронирование.
+    """
+    seed_reservations(session, 3)
+
+    response = client.get("/reservations/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 3
+    assert list(lines[0]) == EXPORT_FIELDS
+    assert lines[0]["reservation_time"] == "2030-01-01T01:00:00"
+
+
+def test_export_csv(client: TestClient, session: Session):
+    """
+    Тестируем выгрузку в CSV с заголовком и фильтром по времени.
+    """
+    seed_reservations(session, 5)
+
+    response = client.get("/reservations/export", params={
+        "format": "csv", "start": "2030-01-01T02:00:00", "end": "2030-01-01T04:00:00",
+    })
+
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == EXPORT_FIELDS
+    assert [row[3] for row in rows[1:]] == ["2030-01-01T02:00:00", "2030-01-01T03:00:00"]
+
+
+def archive_first_reservation(session: Session) -> None:
+    """Переносит в архив первое из seed_reservations бронирований (01:00–02:00)."""
+    async def archive():
+        db = ThreadPoolSession(session, anyio.Semaphore(1))
+        await archive_batch(db, datetime(2030, 1, 1, 2, 30), batch_size=10)
+        await db.commit()
+
+    anyio.run(archive)
+
+
+def test_archived_reservations_are_excluded(client: TestClient, db_client: TestClient, session: Session):
+    """
+    Тестируем, что после архивации бронь пропадает из списка и выгрузки по умолчанию.
+    """
+    seed_reservations(session, 3)
+    archive_first_reservation(session)
+
+    listed = db_client.get("/reservations/").json()
+    exported = [json.loads(line) for line in client.get("/reservations/export").text.splitlines()]
+
+    assert [r["reservation_time"] for r in listed] == ["2030-01-01T02:00:00", "2030-01-01T03:00:00"]
+    assert [r["reservation_time"] for r in exported] == ["2030-01-01T02:00:00", "2030-01-01T03:00:00"]
+
+
+def test_export_include_archived(client: TestClient, session: Session):
+    """
+    Тестируем выгрузку вместе с архивом: фильтры применяются и к архиву, порядок по id.
+    """
+    seed_reservations(session, 3)
+    archive_first_reservation(session)
+
+    response = client.get("/reservations/export", params={
+        "format": "csv", "include_archived": "true", "location": "Hall", "end": "2030-01-01T03:00:00",
+    })
+
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == EXPORT_FIELDS
+    assert [row[3] for row in rows[1:]] == ["2030-01-01T01:00:00", "2030-01-01T02:00:00"]
+
+
+async def drain_export(path: str) -> int:
+    """
+    Выполняет запрос к ASGI-приложению напрямую и считает строки, не сохраняя тело.
+
+    TestClient собирает тело ответа целиком, поэтому для замера памяти не подходит.
+    """
+    disconnected = anyio.Event()
+    requested = False
+    lines = 0
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal lines
+        if message["type"] == "http.response.body":
+            lines += message.get("body", b"").count(b"\n")
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": [],
+        "server": ("testserver", 80), "client": ("testclient", 50000),
+    }
+    await app(scope, receive, send)
+    return lines
+
+
+@pytest.mark.skipif(not os.getenv("RUN_SLOW_TESTS"), reason="медленный тест: RUN_SLOW_TESTS=1")
+def test_export_memory_is_bounded(client: TestClient, session: Session):
+    """
+    Тестируем, что выгрузка миллионов строк не накапливает их в памяти.
+    """
+    seed_reservations(session, EXPORT_TEST_ROWS)
+    rss_before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    exported = anyio.run(drain_export, "/reservations/export")
+
+    rss_growth_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before_kb) / 1024
+    assert exported == EXPORT_TEST_ROWS
+    assert rss_growth_mb < 64
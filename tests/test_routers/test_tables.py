@@ -1,10 +1,14 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
-from app.database import get_session
-from unittest.mock import MagicMock
-from app.models.models import Table
+from app.database import ThreadPoolSession, get_read_session, get_session
+from unittest.mock import AsyncMock, MagicMock
+import anyio
+from datetime import datetime
+from app.models.models import Reservation, Table
 from app.schemas.table import TableCreate
+from app.services import occupancy
+from app.services.occupancy import OccupancyIndex, load_occupancy
 
 
 @pytest.fixture
@@ -21,17 +25,30 @@ def mock_session():
     """
     Мок-сессия для тестирования базы данных.
     """
-    mock = MagicMock()
-    mock.query.return_value.all.return_value = [
+    mock = AsyncMock()
+    mock.add = MagicMock()
+    mock.execute.return_value = MagicMock()
+    mock.execute.return_value.scalars.return_value.all.return_value = [
         Table(id=1, name="vip3", seats=4, location="Терраса"),
         Table(id=2, name="non_vip", seats=4, location="Холл"),
     ]
+    # Списки выбирают столбцы: keys() и all() возвращают имена и кортежи значений
+    mock.execute.return_value.keys.return_value = ["id", "name", "seats", "location"]
+    mock.execute.return_value.all.return_value = [
+        (1, "vip3", 4, "Терраса"),
+        (2, "non_vip", 4, "Холл"),
+    ]
     def add_side_effect(table):
         table.id = 3
     mock.add.side_effect = add_side_effect
     return mock
 
 
+def list_queries(mock_session) -> list:
+    """Выборки столиков среди запросов мок-сессии (без версий и уведомлений)."""
+    return [call for call in mock_session.execute.await_args_list if 'FROM "table"' in str(call.args[0])]
+
+
 @pytest.fixture
 def new_table_data():
     return TableCreate(name="vip4", seats=4, location="Холл")
@@ -41,7 +58,7 @@ def test_get_tables(client: TestClient, mock_session):
     """
     Тестируем запрос на получение списка столиков.
     """
-    app.dependency_overrides[get_session] = lambda: mock_session
+    app.dependency_overrides[get_read_session] = lambda: mock_session
 
     response = client.get("/tables")
 
@@ -50,6 +67,88 @@ def test_get_tables(client: TestClient, mock_session):
     assert response.json()[1]["name"] == "non_vip"
 
 
+def test_get_tables_columnar(client: TestClient, mock_session):
+    """
+    Тестируем выдачу страницы столиков по столбцам.
+    """
+    app.dependency_overrides[get_read_session] = lambda: mock_session
+
+    response = client.get("/tables", params={"format": "columnar"})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "id": [1, 2], "name": ["vip3", "non_vip"], "seats": [4, 4], "location": ["Терраса", "Холл"],
+    }
+
+
+def test_get_tables_last_page(client: TestClient, mock_session):
+    """
+    Тестируем, что на последней странице курсор не выдается.
+    """
+    app.dependency_overrides[get_read_session] = lambda: mock_session
+
+    response = client.get("/tables", params={"limit": 2})
+
+    assert response.status_code == 200
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_get_availability_empty_window(client: TestClient, mock_session):
+    """
+    Тестируем, что пустое окно поиска отклоняется без запроса к БД.
+    """
+    app.dependency_overrides[get_read_session] = lambda: mock_session
+
+    response = client.get("/tables/availability", params={
+        "start": "2030-05-01T20:00:00", "end": "2030-05-01T18:00:00",
+    })
+
+    assert response.status_code == 400
+    mock_session.execute.assert_not_called()
+
+
+def test_get_tables_is_cached(client: TestClient, mock_session):
+    """
+    Тестируем, что повторный запрос страницы столиков не обращается к БД.
+    """
+    app.dependency_overrides[get_read_session] = lambda: mock_session
+
+    first = client.get("/tables")
+    second = client.get("/tables")
+
+    assert first.json() == second.json()
+    assert len(list_queries(mock_session)) == 1
+
+
+def test_create_table_invalidates_cache(client: TestClient, mock_session, new_table_data):
+    """
+    Тестируем сброс кэша столиков после создания столика.
+    """
+    app.dependency_overrides[get_session] = lambda: mock_session
+    app.dependency_overrides[get_read_session] = lambda: mock_session
+    client.get("/tables")
+
+    client.post("/tables", json=new_table_data.model_dump())
+    client.get("/tables")
+
+    assert len(list_queries(mock_session)) == 2
+
+
+def test_get_tables_not_modified(client: TestClient, mock_session):
+    """
+    Тестируем ответ 304 без выборки столиков при совпадении ETag.
+    """
+    app.dependency_overrides[get_read_session] = lambda: mock_session
+    mock_session.execute.return_value.scalar_one.return_value = 7
+
+    response = client.get("/tables", headers={"If-None-Match": 'W/"tables-7"'})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == 'W/"tables-7"'
+    assert response.content == b""
+    assert list_queries(mock_session) == []
+
+
 def test_create_table(client: TestClient, new_table_data, mock_session):
     """
     Тестируем создание нового столика.
@@ -76,6 +175,19 @@ def test_create_table_error(client: TestClient, mock_session):
     assert response.status_code == 422
 
 
+def test_create_tables_bulk_error(client: TestClient, mock_session):
+    """
+    Тестируем откат пачки столиков при ошибке вставки.
+    """
+    app.dependency_overrides[get_session] = lambda: mock_session
+    mock_session.execute.side_effect = Exception("DB Error")
+
+    response = client.post("/tables/bulk", json=[{"name": "vip5", "seats": 4, "location": "Холл"}])
+
+    assert response.status_code == 400
+    mock_session.rollback.assert_awaited_once()
+
+
 def test_delete_table(client: TestClient, mock_session):
     """
     Тестируем удаление столика.
@@ -113,3 +225,66 @@ def test_delete_table_error(client: TestClient, mock_session):
 
     assert response.status_code == 400
     assert "Ошибка при удалении столика" in response.json()["detail"]
+
+
+def test_free_tables_from_db_and_index(db_client: TestClient, session, monkeypatch):
+    """
+    Тестируем, что индекс занятости и запрос к БД дают одинаковые свободные столики и время.
+    """
+    hall, terrace = Table(name="A1", seats=2, location="Hall"), Table(name="B1", seats=4, location="Terrace")
+    session.add_all([hall, terrace])
+    session.commit()
+    session.add(Reservation(customer_name="Гость", table_id=hall.id,
+                            reservation_time=datetime(2030, 1, 1, 18, 0), duration_minutes=60))
+    session.commit()
+    window = {"start": "2030-01-01T18:30:00", "end": "2030-01-01T19:30:00"}
+    next_free = {"after": "2030-01-01T18:00:00", "duration_minutes": 60}
+
+    def answers() -> tuple:
+        return (
+            db_client.get("/tables/free", params=window).json(),
+            db_client.get(f"/tables/{hall.id}/next-free", params=next_free).json(),
+        )
+
+    from_db = answers()
+    index = OccupancyIndex(slot_minutes=15, horizon_days=2)
+    anyio.run(load_occupancy, ThreadPoolSession(session, anyio.Semaphore(1)), index, datetime(2030, 1, 1, 12, 0))
+    monkeypatch.setattr(occupancy, "occupancy_index", index)
+    from_index = answers()
+
+    assert from_db == from_index
+    assert [t["id"] for t in from_db[0]] == [terrace.id]
+    assert from_db[1] == {"table_id": hall.id, "start": "2030-01-01T19:00:00"}
+    assert db_client.get("/tables/999999/next-free", params=next_free).status_code == 404
+
+
+@pytest.mark.parametrize("offset", ["Z", "+00:00", "+03:00"])
+def test_free_tables_with_utc_offset(db_client: TestClient, session, monkeypatch, offset):
+    """
+    Тестируем, что время с часовым поясом приводится к UTC и в запросе к БД, и в индексе занятости.
+    """
+    shift = 3 if offset == "+03:00" else 0
+    hall = Table(name="A1", seats=2, location="Hall")
+    session.add(hall)
+    session.commit()
+    session.add(Reservation(customer_name="Гость", table_id=hall.id,
+                            reservation_time=datetime(2030, 1, 1, 18, 0), duration_minutes=60))
+    session.commit()
+    window = {"start": f"2030-01-01T{19 + shift}:00:00{offset}", "end": f"2030-01-01T{20 + shift}:00:00{offset}"}
+    next_free = {"after": f"2030-01-01T{18 + shift}:00:00{offset}", "duration_minutes": 60}
+
+    def answers() -> tuple:
+        return (
+            db_client.get("/tables/free", params=window).json(),
+            db_client.get(f"/tables/{hall.id}/next-free", params=next_free).json(),
+        )
+
+    from_db = answers()
+    index = OccupancyIndex(slot_minutes=15, horizon_days=2)
+    anyio.run(load_occupancy, ThreadPoolSession(session, anyio.Semaphore(1)), index, datetime(2030, 1, 1, 12, 0))
+    monkeypatch.setattr(occupancy, "occupancy_index", index)
+    from_index = answers()
+
+    assert from_db == from_index
+    assert [t["id"] for t in from_db[0]] == [hall.id]
+    assert from_db[1] == {"table_id": hall.id, "start": "2030-01-01T19:00:00"}
@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+import pytest
+from app import server
+from app.config import Settings
+from app.database import get_pool
+
+
+def test_worker_count():
+    """
+    Тестируем выбор числа воркеров: явное значение или по числу CPU.
+    """
+    assert server.worker_count(Settings(database_url="", workers=3)) == 3
+    assert server.worker_count(Settings(database_url="", workers=0)) == server.available_cpus() >= 1
+
+
+def test_server_options_fall_back_without_uvloop(monkeypatch):
+    """
+    Тестируем, что без uvloop и httptools используются asyncio и h11.
+    """
+    monkeypatch.setattr(server, "_installed", lambda module: False)
+
+    options = server.server_options(Settings(database_url="", workers=2, port=9000, backlog=512))
+
+    assert options["loop"] == "asyncio"
+    assert options["http"] == "h11"
+    assert options["workers"] == 2
+    assert options["port"] == 9000
+    assert options["backlog"] == 512
+
+
+def test_server_options_prefer_uvloop(monkeypatch):
+    """
+    Тестируем выбор uvloop и httptools, если они установлены.
+    """
+    monkeypatch.setattr(server, "_installed", lambda module: True)
+
+    options = server.server_options(Settings(database_url=""))
+
+    assert (options["loop"], options["http"]) == ("uvloop", "httptools")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="нужен os.fork")
+def test_pool_is_replaced_after_fork():
+    """
+    Тестируем, что дочерний процесс после fork получает собственный пустой пул.
+    """
+    parent_pool = get_pool()
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if get_pool() is not parent_pool and get_pool().checkedin() == 0 else 1)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert get_pool() is parent_pool
+
+
+def test_import_does_not_connect_to_db():
+    """
+    Тестируем, что импорт приложения не создает движок и не загружает драйвер БД.
+    """
+    probe = (
+        "import sys, app.main, app.database; "
+        "assert app.database._engine is None; "
+        "assert not {'psycopg2', 'asyncpg'} & set(sys.modules)"
+    )
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,12 @@
+import anyio
+import pytest
+from sqlmodel import Session
+from app.database import ThreadPoolSession
+
+
+@pytest.fixture
+def db(session: Session):
+    """Сессия теста с асинхронным интерфейсом сервисов."""
+    db = ThreadPoolSession(session)
+    yield db
+    anyio.run(db.close)
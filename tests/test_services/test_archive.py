@@ -0,0 +1,55 @@
+import anyio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from sqlmodel import Session, select
+from app.database import ThreadPoolSession
+from app.models.models import RESERVATION_VERSION_SEQ, Reservation, ReservationArchive, Table
+from app.services.archive import archive_finished_reservations
+from app.services.etag import collection_version
+
+NOW = datetime(2030, 6, 1, 12, 0)
+
+
+def test_archive_moves_only_finished_reservations(session: Session, db: ThreadPoolSession):
+    """Архивируются закончившиеся бронирования, текущие и будущие остаются"""
+    session.add(Table(id=1, name="A1", seats=2, location="Hall"))
+    session.commit()
+    finished = [NOW - timedelta(days=day) for day in range(1, 6)]
+    for start in finished:
+        session.add(Reservation(customer_name="Прошлое", table_id=1, reservation_time=start, duration_minutes=60))
+    session.add(Reservation(customer_name="Идет", table_id=1, reservation_time=NOW - timedelta(minutes=30),
+                            duration_minutes=60))
+    session.add(Reservation(customer_name="Будущее", table_id=1, reservation_time=NOW + timedelta(days=1),
+                            duration_minutes=60))
+    session.commit()
+    version_before = anyio.run(collection_version, db, RESERVATION_VERSION_SEQ)
+
+    @asynccontextmanager
+    async def open_session():
+        yield db
+
+    moved = anyio.run(lambda: archive_finished_reservations(NOW, batch_size=2, open_session=open_session))
+
+    assert moved == 5
+    assert sorted(r.reservation_time for r in session.exec(select(ReservationArchive))) == sorted(finished)
+    assert {r.customer_name for r in session.exec(select(Reservation))} == {"Идет", "Будущее"}
+    assert anyio.run(collection_version, db, RESERVATION_VERSION_SEQ) == version_before + 1
+
+
+def test_archive_respects_max_batches(session: Session, db: ThreadPoolSession):
+    """За запуск переносится не больше max_batches пачек"""
+    session.add(Table(id=1, name="A1", seats=2, location="Hall"))
+    session.commit()
+    for day in range(1, 6):
+        session.add(Reservation(customer_name="Прошлое", table_id=1, reservation_time=NOW - timedelta(days=day),
+                                duration_minutes=60))
+    session.commit()
+
+    @asynccontextmanager
+    async def open_session():
+        yield db
+
+    moved = anyio.run(lambda: archive_finished_reservations(NOW, 2, max_batches=1, open_session=open_session))
+
+    assert moved == 2
+    assert len(session.exec(select(Reservation)).all()) == 3
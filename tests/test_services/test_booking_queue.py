@@ -0,0 +1,122 @@
+import asyncio
+import anyio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from sqlmodel import Session
+from app.database import dispose_engine
+from app.models.models import Reservation, Table
+from app.schemas.reservation import BulkStatus, ReservationCreate
+from app.services.booking_queue import BookingQueue, split_overlapping
+
+START = datetime(2030, 1, 1, 18, 0)
+
+
+def booking(table_id: int, offset_minutes: int, duration: int = 60) -> ReservationCreate:
+    return ReservationCreate(customer_name="Гость", table_id=table_id,
+                             reservation_time=START + timedelta(minutes=offset_minutes), duration_minutes=duration)
+
+
+def test_split_overlapping_first_wins():
+    """Пересекающееся с занятым или более ранним бронирование проигрывает, соседние интервалы — нет"""
+    occupied = [(START + timedelta(hours=3), START + timedelta(hours=4))]
+    accepted, rejected = split_overlapping(
+        [booking(1, 0), booking(1, 30), booking(1, 60), booking(1, 90), booking(1, 150)], occupied,
+    )
+
+    assert accepted == [0, 2]
+    assert rejected == [1, 3, 4]
+
+
+def test_queue_settles_contended_table_in_one_batch(committed_session: Session):
+    """Одновременные брони горячего столика решаются одной транзакцией по его занятости"""
+    session = committed_session
+    session.add(Table(id=1, name="A1", seats=2, location="Hall"))
+    session.commit()
+    session.add(Reservation(customer_name="Ранее", table_id=1, reservation_time=START + timedelta(hours=3),
+                            duration_minutes=60))
+    session.commit()
+    session.close()
+    queue = BookingQueue()
+    requests = [booking(1, 0) for _ in range(5)] + [booking(1, 120), booking(1, 180), booking(2, 0)]
+
+    async def submit_all() -> list[dict]:
+        results = [None] * len(requests)
+
+        async def submit(i: int) -> None:
+            results[i] = await queue.submit(requests[i])
+
+        async with anyio.create_task_group() as tg:
+            for i in range(len(requests)):
+                tg.start_soon(submit, i)
+        await dispose_engine()
+        return results
+
+    statuses = [result["status"] for result in anyio.run(submit_all)]
+
+    assert statuses == [BulkStatus.created] + [BulkStatus.conflict] * 4 + [
+        BulkStatus.created, BulkStatus.conflict, BulkStatus.table_not_found,
+    ]
+    assert queue.stats() == {"submitted": 8, "batches": 2, "rejected": 5, "pending": 0}
+
+
+def test_close_cancels_unfinished_batches():
+    """При завершении зависшая пачка отменяется, ее запросы и очередь за ней получают ошибку"""
+    @asynccontextmanager
+    async def stuck_session():
+        await asyncio.sleep(60)
+        yield
+
+    queue = BookingQueue(open_session=stuck_session)
+
+    async def scenario() -> list:
+        async with anyio.create_task_group() as tg:
+            results = []
+
+            async def submit(reservation: ReservationCreate) -> None:
+                try:
+                    results.append(await queue.submit(reservation))
+                except RuntimeError as e:
+                    results.append(e)
+
+            for reservation in (booking(1, 0), booking(1, 120)):
+                tg.start_soon(submit, reservation)
+            await anyio.sleep(0.01)
+            await queue.close(timeout=0.01)
+        return results
+
+    results = anyio.run(scenario)
+
+    assert len(results) == 2 and all(isinstance(result, RuntimeError) for result in results)
+    assert queue.stats()["pending"] == 0 and not queue._tasks
+
+
+def test_queue_accepts_timezone_aware_time(committed_session: Session):
+    """Время с часовым поясом сравнивается с занятостью столика в UTC, результат — без пояса"""
+    session = committed_session
+    session.add(Table(id=1, name="A1", seats=2, location="Hall"))
+    session.commit()
+    session.add(Reservation(customer_name="Ранее", table_id=1, reservation_time=START, duration_minutes=60))
+    session.commit()
+    session.close()
+    queue = BookingQueue()
+    moscow = timezone(timedelta(hours=3))
+
+    def aware(moment: datetime) -> ReservationCreate:
+        # model_construct: время не проходит валидатор схемы, как у вызывающего кода вне API
+        return ReservationCreate.model_construct(customer_name="Гость", table_id=1, reservation_time=moment,
+                                                 duration_minutes=60)
+
+    async def submit_both() -> list[dict]:
+        try:
+            return [
+                await queue.submit(aware(START.replace(tzinfo=timezone.utc))),
+                await queue.submit(aware((START + timedelta(hours=1)).replace(tzinfo=timezone.utc).astimezone(moscow))),
+            ]
+        finally:
+            await dispose_engine()
+
+    conflict, created = anyio.run(submit_both)
+
+    assert conflict["status"] == BulkStatus.conflict
+    assert created["status"] == BulkStatus.created
+    assert created["reservation"]["reservation_time"] == START + timedelta(hours=1)
@@ -0,0 +1,70 @@
+from datetime import datetime
+import anyio
+from sqlmodel import Session, select
+from app.database import ThreadPoolSession
+from app.models.models import Reservation, Table
+from app.schemas.reservation import BulkStatus, ReservationCreate
+from app.schemas.table import TableCreate
+from app.services.bulk import insert_reservations, insert_tables
+
+
+def test_insert_tables_keeps_order(session: Session, db: ThreadPoolSession):
+    """Созданные столики возвращаются в порядке входных данных"""
+    tables = [TableCreate(name=f"T{i}", seats=i + 1, location="Hall") for i in range(5)]
+
+    rows = anyio.run(insert_tables, db, tables)
+    anyio.run(db.commit)
+
+    assert [row.name for row in rows] == [table.name for table in tables]
+    assert len(session.exec(select(Table)).all()) == 5
+
+
+def test_insert_reservations_reports_each_row(session: Session, db: ThreadPoolSession):
+    """Конфликты и отсутствующие столики не прерывают пачку"""
+    table = Table(name="B1", seats=2, location="Hall")
+    session.add(table)
+    session.commit()
+    session.add(Reservation(customer_name="Existing", table_id=table.id,
+                            reservation_time=datetime(2030, 5, 1, 12, 0), duration_minutes=60))
+    session.commit()
+
+    def item(name: str, table_id: int, hour: int) -> ReservationCreate:
+        return ReservationCreate(customer_name=name, table_id=table_id,
+                                 reservation_time=datetime(2030, 5, 1, hour, 0), duration_minutes=60)
+
+    results = anyio.run(insert_reservations, db, [
+        item("Alice", table.id, 18),
+        item("Bob", table.id, 12),        # занято бронью из БД
+        item("Carol", table.id + 1, 18),  # столика нет
+        item("Dave", table.id, 18),       # занято строкой той же пачки
+        item("Eve", table.id, 20),
+    ])
+    anyio.run(db.commit)
+
+    assert [result["status"] for result in results] == [
+        BulkStatus.created, BulkStatus.conflict, BulkStatus.table_not_found,
+        BulkStatus.conflict, BulkStatus.created,
+    ]
+    assert [result["index"] for result in results] == list(range(5))
+    assert results[0]["reservation"]["id"] < results[4]["reservation"]["id"]
+    names = session.exec(select(Reservation.customer_name).order_by(Reservation.id)).all()
+    assert names == ["Existing", "Alice", "Eve"]
+
+
+def test_insert_reservations_without_conflicts(session: Session, db: ThreadPoolSession):
+    """Пачка без конфликтов создается целиком, id идут по порядку строк"""
+    table = Table(name="B2", seats=2, location="Hall")
+    session.add(table)
+    session.commit()
+
+    results = anyio.run(insert_reservations, db, [
+        ReservationCreate(customer_name=f"Guest {hour}", table_id=table.id,
+                          reservation_time=datetime(2030, 5, 1, hour, 0), duration_minutes=60)
+        for hour in range(10, 20)
+    ])
+    anyio.run(db.commit)
+
+    assert {result["status"] for result in results} == {BulkStatus.created}
+    ids = [result["reservation"]["id"] for result in results]
+    assert ids == sorted(ids)
+    assert results[3]["reservation"]["customer_name"] == "Guest 13"
@@ -0,0 +1,95 @@
+import anyio
+from app.services.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def load_value(value):
+    calls = []
+
+    async def loader():
+        calls.append(value)
+        return value
+
+    return loader, calls
+
+
+def get(cache: TTLCache, key, loader):
+    return anyio.run(cache.get_or_load, key, loader)
+
+
+def test_read_through_counts_hits_and_misses():
+    """Первое обращение загружает значение, повторное берет его из кэша"""
+    cache = TTLCache(maxsize=10, ttl=60)
+    loader, calls = load_value("tables")
+
+    assert get(cache, "key", loader) == "tables"
+    assert get(cache, "key", loader) == "tables"
+
+    assert calls == ["tables"]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl():
+    """Просроченная запись загружается заново"""
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+    loader, calls = load_value("tables")
+
+    get(cache, "key", loader)
+    clock.now = 61
+    get(cache, "key", loader)
+
+    assert len(calls) == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    """При переполнении вытесняется давно не использованная запись"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    loader_a, calls_a = load_value("a")
+    loader_b, _ = load_value("b")
+    loader_c, _ = load_value("c")
+
+    get(cache, "a", loader_a)
+    get(cache, "b", loader_b)
+    get(cache, "a", loader_a)
+    get(cache, "c", loader_c)
+    get(cache, "a", loader_a)
+
+    assert calls_a == ["a"]
+    assert cache.stats()["size"] == 2
+    loader_b_again, calls_b = load_value("b")
+    get(cache, "b", loader_b_again)
+    assert calls_b == ["b"]
+
+
+def test_load_started_before_invalidation_is_not_stored():
+    """Значение, прочитанное до сброса, не попадает в кэш после него"""
+    cache = TTLCache(maxsize=10, ttl=60)
+
+    async def stale_loader():
+        cache.invalidate()
+        return "stale"
+
+    assert get(cache, "key", stale_loader) == "stale"
+    loader, calls = load_value("fresh")
+    assert get(cache, "key", loader) == "fresh"
+    assert calls == ["fresh"]
+
+
+def test_disabled_cache_always_loads():
+    """С ttl=0 кэш выключен и каждый раз обращается к загрузчику"""
+    cache = TTLCache(maxsize=10, ttl=0)
+    loader, calls = load_value("tables")
+
+    get(cache, "key", loader)
+    get(cache, "key", loader)
+
+    assert len(calls) == 2
@@ -0,0 +1,29 @@
+import anyio
+import pytest
+from app.database import ThreadPoolSession
+from app.models.models import RESERVATION_VERSION_SEQ, TABLE_VERSION_SEQ
+from app.services.etag import bump_versions, collection_version, etag_matches, weak_etag
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    (None, False),
+    ('W/"tables-3"', True),
+    ('"tables-3"', True),
+    ('W/"tables-2", W/"tables-3"', True),
+    ("*", True),
+    ('W/"tables-4"', False),
+])
+def test_etag_matches(if_none_match, expected):
+    """Слабое сравнение ETag со списком из If-None-Match"""
+    assert etag_matches(if_none_match, weak_etag("tables", 3)) is expected
+
+
+def test_bump_changes_only_given_collection(db: ThreadPoolSession):
+    """Запись меняет версию своей коллекции и не трогает другую"""
+    tables_before = anyio.run(collection_version, db, TABLE_VERSION_SEQ)
+    reservations_before = anyio.run(collection_version, db, RESERVATION_VERSION_SEQ)
+
+    anyio.run(bump_versions, db, RESERVATION_VERSION_SEQ)
+
+    assert anyio.run(collection_version, db, TABLE_VERSION_SEQ) == tables_before
+    assert anyio.run(collection_version, db, RESERVATION_VERSION_SEQ) == reservations_before + 1
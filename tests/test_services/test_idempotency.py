@@ -0,0 +1,60 @@
+import anyio
+import pytest
+from datetime import datetime
+from app.database import ThreadPoolSession
+from app.schemas.reservation import ReservationCreate
+from app.services.idempotency import (
+    IdempotencyKeyReusedError,
+    find_response,
+    purge_expired_keys,
+    replay_response,
+    request_fingerprint,
+    save_response,
+)
+
+TTL = 3600
+REQUEST = ReservationCreate(customer_name="Гость", table_id=1,
+                            reservation_time=datetime(2030, 1, 1, 18, 0), duration_minutes=60)
+
+
+def test_saved_response_is_replayed(db: ThreadPoolSession):
+    """Повтор с тем же ключом и телом получает сохраненный ответ"""
+    fingerprint = request_fingerprint(REQUEST)
+    assert anyio.run(save_response, db, "key-1", fingerprint, 201, b'{"id":7}', TTL)
+    anyio.run(db.commit)
+
+    response = anyio.run(replay_response, db, "key-1", fingerprint, TTL)
+
+    assert response.status_code == 201
+    assert response.body == b'{"id":7}'
+    assert response.headers["Idempotent-Replayed"] == "true"
+    assert anyio.run(replay_response, db, "key-2", fingerprint, TTL) is None
+
+
+def test_key_reused_with_other_request(db: ThreadPoolSession):
+    """Тот же ключ с другим телом запроса отклоняется"""
+    anyio.run(save_response, db, "key-1", request_fingerprint(REQUEST), 201, b"{}", TTL)
+    other = REQUEST.model_copy(update={"duration_minutes": 90})
+
+    with pytest.raises(IdempotencyKeyReusedError):
+        anyio.run(replay_response, db, "key-1", request_fingerprint(other), TTL)
+
+
+def test_live_key_is_not_overwritten(db: ThreadPoolSession):
+    """Действующий ключ не перезаписывается, истекший — перезаписывается"""
+    assert anyio.run(save_response, db, "key-1", "a" * 64, 201, b'{"id":1}', TTL)
+    assert not anyio.run(save_response, db, "key-1", "a" * 64, 201, b'{"id":2}', TTL)
+    assert anyio.run(find_response, db, "key-1", TTL).response == '{"id":1}'
+
+    assert anyio.run(save_response, db, "key-1", "a" * 64, 201, b'{"id":2}', 0)
+    assert anyio.run(find_response, db, "key-1", TTL).response == '{"id":2}'
+
+
+def test_purge_expired_keys(db: ThreadPoolSession):
+    """Очистка удаляет ключи старше срока хранения"""
+    anyio.run(save_response, db, "key-1", "a" * 64, 201, b"{}", TTL)
+    anyio.run(db.commit)
+
+    assert anyio.run(purge_expired_keys, db, TTL) == 0
+    assert anyio.run(purge_expired_keys, db, 0) == 1
+    assert anyio.run(find_response, db, "key-1", TTL) is None
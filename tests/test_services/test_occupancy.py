@@ -0,0 +1,110 @@
+import anyio
+from datetime import datetime, timedelta
+from sqlmodel import Session
+from app.config import Settings
+from app.database import dispose_engine
+from app.models.models import Reservation, Table
+from app.services.occupancy import OccupancyIndex, horizon_origin, maintain_occupancy_index, occupancy_index
+
+ORIGIN = datetime(2030, 1, 1)
+TABLES = [
+    {"id": 1, "name": "A1", "seats": 2, "location": "Hall"},
+    {"id": 2, "name": "B1", "seats": 4, "location": "Terrace"},
+]
+
+
+def at(hour: int, minute: int = 0) -> datetime:
+    return ORIGIN.replace(hour=hour, minute=minute)
+
+
+def loaded_index(*reservations) -> OccupancyIndex:
+    index = OccupancyIndex(slot_minutes=15, horizon_days=2)
+    index.load(ORIGIN, TABLES, reservations)
+    return index
+
+
+def test_free_checks_partial_slots_exactly():
+    """Бронь 18:00-18:40 делит слот 18:30-18:45 с интервалом 18:40-19:00, но не пересекается с ним"""
+    index = loaded_index((1, at(18), at(18, 40)))
+
+    assert index.is_free(1, at(18, 40), at(19)) is True
+    assert index.is_free(1, at(18, 30), at(19)) is False
+    assert index.is_free(1, at(17), at(20)) is False
+    assert index.is_free(3, at(17), at(20)) is None
+    assert [t["id"] for t in index.free_tables(at(18, 30), at(19))] == [2]
+    assert [t["id"] for t in index.free_tables(at(18, 40), at(19), seats=3)] == [2]
+    assert index.free_tables(at(18, 40), at(19), location="Hall") == [TABLES[0]]
+
+
+def test_changes_are_idempotent():
+    """Повтор изменения (от обработчика и от уведомления) не меняет индекс"""
+    index = loaded_index()
+
+    index.add(1, at(18), at(19))
+    index.apply_notification(
+        f'["+", 1, 1, "{at(18).isoformat()}", "{at(19).isoformat()}", 60, "Гость", "Hall"]\n'
+        f'["+", 2, 2, "{at(18).isoformat()}", "{at(19).isoformat()}", 60, "Гость", "Terrace"]'
+    )
+    index.remove(1, at(18), at(19))
+
+    assert index.is_free(1, at(18), at(19)) is True
+    assert index.is_free(2, at(18), at(19)) is False
+    index.remove(1, at(18), at(19))
+    assert index.stats()["reservations"] == 1
+    assert index.apply_notification("tables") is True
+
+
+def test_first_free_slot():
+    """Ближайший свободный интервал ищется по целым слотам и не выходит за until"""
+    index = loaded_index((1, at(18), at(19)), (1, at(19, 30), at(20)))
+
+    assert index.first_free(1, at(18), 30, at(23)) == at(19)
+    assert index.first_free(1, at(18, 5), 60, at(23)) == at(20)
+    assert index.first_free(1, at(18), 60, at(20, 30)) is None
+
+
+def test_reload_replays_changes_received_during_load():
+    """Изменение, пришедшее во время чтения из БД, не теряется при замене индекса"""
+    index = OccupancyIndex(slot_minutes=15, horizon_days=2)
+
+    index.begin_reload()
+    index.add(1, at(18), at(19))
+    index.load(ORIGIN, TABLES, [])
+
+    assert index.is_free(1, at(18), at(19)) is False
+    assert index.covers(at(18), at(19))
+    assert not index.covers(at(18), ORIGIN + timedelta(days=3))
+
+
+def test_index_follows_committed_changes(committed_session: Session):
+    """Триггер БД сообщает о брони и ее удалении, и индекс воркера обновляется без перезагрузки"""
+    session = committed_session
+    session.add(Table(id=1, name="A1", seats=2, location="Hall"))
+    session.commit()
+    start = horizon_origin(datetime.now()) + timedelta(days=1, hours=18)
+    end = start + timedelta(hours=1)
+
+    async def wait_for(free: bool) -> bool:
+        with anyio.move_on_after(5):
+            while occupancy_index.is_free(1, start, end) is not free:
+                await anyio.sleep(0.05)
+            return True
+        return False
+
+    async def scenario() -> None:
+        async with maintain_occupancy_index():
+            assert occupancy_index.is_free(1, start, end) is True
+            reservation = Reservation(customer_name="Гость", table_id=1, reservation_time=start,
+                                      duration_minutes=60)
+            session.add(reservation)
+            session.commit()
+            assert await wait_for(free=False)
+            session.delete(reservation)
+            session.commit()
+            assert await wait_for(free=True)
+        await dispose_engine()
+
+    try:
+        anyio.run(scenario)
+    finally:
+        occupancy_index.configure(Settings.occupancy_slot_minutes, Settings.occupancy_horizon_days)
@@ -0,0 +1,28 @@
+from datetime import datetime
+import pytest
+from app.services.pagination import InvalidCursorError, decode_cursor, encode_cursor, split_page
+
+
+def test_cursor_round_trip():
+    """Курсор восстанавливает ключ сортировки с типами"""
+    key = (datetime(2025, 4, 10, 12, 30), 42)
+
+    assert decode_cursor(encode_cursor(*key), datetime, int) == key
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor(1), encode_cursor("x", "y")])
+def test_decode_invalid_cursor(cursor):
+    """Поврежденный или чужой курсор отклоняется"""
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, datetime, int)
+
+
+def test_split_page():
+    """Лишняя строка сверх limit означает, что есть следующая страница"""
+    page, cursor = split_page([1, 2, 3], 2, key=lambda x: (x,))
+    assert page == [1, 2]
+    assert decode_cursor(cursor, int) == (2,)
+
+    page, cursor = split_page([1, 2], 2, key=lambda x: (x,))
+    assert page == [1, 2]
+    assert cursor is None
@@ -0,0 +1,36 @@
+import threading
+import anyio
+from sqlmodel import Session
+from app.database import ThreadPoolSession
+from app.services.pg_notify import PgNotifyListener, notify
+from tests.conftest import DATABASE_URL
+
+
+CHANNEL = "test_channel"
+
+
+def test_listener_receives_committed_notifications(committed_session: Session):
+    """Слушатель получает только уведомления зафиксированных транзакций"""
+    db = ThreadPoolSession(committed_session)
+    received = []
+    delivered = threading.Event()
+
+    def callback(payload: str) -> None:
+        received.append(payload)
+        delivered.set()
+
+    listener = PgNotifyListener(DATABASE_URL, CHANNEL, callback, poll_interval=0.1)
+    listener.start()
+    try:
+        assert listener.wait_listening(5)
+
+        anyio.run(notify, db, CHANNEL, "rolled back")
+        anyio.run(db.rollback)
+        anyio.run(notify, db, CHANNEL, "committed")
+        anyio.run(db.commit)
+
+        assert delivered.wait(5)
+    finally:
+        listener.stop()
+
+    assert received == ["committed"]
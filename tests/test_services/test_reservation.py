@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+import anyio
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+from app.database import ThreadPoolSession
+from app.models.models import Table
+from app.schemas.reservation import ReservationCreate
+from app.services.reservation import (
+    EXCLUSION_VIOLATION,
+    FOREIGN_KEY_VIOLATION,
+    check_reservation_conflict,
+    insert_reservation,
+    integrity_error_code,
+    list_reservations,
+)
+
+
+def insert(db: ThreadPoolSession, reservation: ReservationCreate):
+    return anyio.run(insert_reservation, db, reservation)
+
+
+def test_insert_reservation_returns_row(session: Session, db: ThreadPoolSession):
+    """Вставка возвращает созданную строку без дополнительного SELECT"""
+    table = Table(name="D1", seats=2, location="Hall")
+    session.add(table)
+    session.commit()
+
+    start = datetime(2030, 5, 1, 18, 0)
+    row = insert(db, ReservationCreate(
+        customer_name="Alice", table_id=table.id, reservation_time=start, duration_minutes=60
+    ))
+
+    assert row.id is not None
+    assert row.reservation_time == start
+
+
+def test_insert_reservation_overlap_is_exclusion_violation(session: Session, db: ThreadPoolSession):
+    """Пересечение ловит ограничение no_overlapping_reservations"""
+    table = Table(name="D2", seats=2, location="Hall")
+    session.add(table)
+    session.commit()
+
+    start = datetime(2030, 5, 1, 18, 0)
+    insert(db, ReservationCreate(
+        customer_name="Alice", table_id=table.id, reservation_time=start, duration_minutes=60
+    ))
+    with pytest.raises(IntegrityError) as exc_info:
+        insert(db, ReservationCreate(
+            customer_name="Bob", table_id=table.id,
+            reservation_time=start + timedelta(minutes=30), duration_minutes=60
+        ))
+
+    assert integrity_error_code(exc_info.value) == EXCLUSION_VIOLATION
+
+
+def test_insert_reservation_unknown_table_is_fk_violation(session: Session, db: ThreadPoolSession):
+    """Несуществующий столик ловит внешний ключ"""
+    with pytest.raises(IntegrityError) as exc_info:
+        insert(db, ReservationCreate(
+            customer_name="Alice", table_id=999_999,
+            reservation_time=datetime(2030, 5, 1, 18, 0), duration_minutes=60
+        ))
+
+    assert integrity_error_code(exc_info.value) == FOREIGN_KEY_VIOLATION
+
+
+def test_check_reservation_conflict_uses_half_open_periods(session: Session, db: ThreadPoolSession):
+    """Пересекающийся интервал — конфликт, соседний — нет"""
+    table = Table(name="D3", seats=2, location="Hall")
+    session.add(table)
+    session.commit()
+
+    start = datetime(2030, 5, 1, 18, 0)
+    insert(db, ReservationCreate(
+        customer_name="Alice", table_id=table.id, reservation_time=start, duration_minutes=60
+    ))
+
+    def conflict(reservation_time: datetime, duration: int) -> bool:
+        return anyio.run(check_reservation_conflict, db, table.id, reservation_time, duration)
+
+    assert conflict(start + timedelta(minutes=59), 30)
+    assert conflict(start - timedelta(minutes=30), 31)
+    assert not conflict(start + timedelta(minutes=60), 30)
+    assert not conflict(start - timedelta(minutes=30), 30)
+
+
+def test_list_reservations_keyset_pages(session: Session, db: ThreadPoolSession):
+    """Страницы по ключу (reservation_time, id) не теряют и не повторяют строки"""
+    hall = Table(name="E1", seats=2, location="Hall")
+    patio = Table(name="E2", seats=2, location="Patio")
+    session.add_all([hall, patio])
+    session.commit()
+
+    start = datetime(2030, 6, 1, 12, 0)
+    for table in (hall, patio):
+        for hour in range(3):
+            insert(db, ReservationCreate(
+                customer_name="Guest", table_id=table.id,
+                reservation_time=start + timedelta(hours=hour), duration_minutes=60
+            ))
+
+    def page(**kwargs):
+        return anyio.run(lambda: list_reservations(db, **kwargs))
+
+    first = page(limit=4)
+    second = page(limit=4, after=(first[-1]["reservation_time"], first[-1]["id"]))
+    keys = [(r["reservation_time"], r["id"]) for r in first + second]
+    assert len(keys) == 6
+    assert keys == sorted(keys)
+
+    patio_only = page(limit=10, location="Patio", start=start + timedelta(hours=1))
+    assert [r["table_id"] for r in patio_only] == [patio.id, patio.id]
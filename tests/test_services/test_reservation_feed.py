@@ -0,0 +1,143 @@
+import asyncio
+import json
+import anyio
+from datetime import datetime, timedelta
+from sqlmodel import Session
+from app.models.models import Reservation, Table
+from app.services.pg_notify import PgNotifyListener
+from app.services.reservation_changes import ReservationChange, parse_changes
+from app.services.reservation_feed import FeedSubscriber, ReservationFeed, reservation_event
+
+START = datetime(2030, 1, 1, 18, 0)
+
+
+def change(table_id: int, location: str = "Hall", created: bool = True) -> ReservationChange:
+    return ReservationChange(created, 1, table_id, START, START + timedelta(hours=1), 60, "Гость", location)
+
+
+def test_parse_changes():
+    """Строки уведомления триггера разбираются в изменения, уведомление о столиках — пустое"""
+    payload = (
+        '["+", 7, 1, "2030-01-01T18:00:00.000000", "2030-01-01T19:00:00.000000", 60, "Гость", "Hall"]\n'
+        '["-", 8, 2, "2030-01-01T18:00:00.000000", "2030-01-01T18:30:00.000000", 30, "Гость", null]'
+    )
+
+    created, deleted = parse_changes(payload)
+
+    assert created == ReservationChange(True, 7, 1, START, START + timedelta(hours=1), 60, "Гость", "Hall")
+    assert (deleted.created, deleted.id, deleted.location) == (False, 8, None)
+    assert parse_changes("tables") == []
+    assert reservation_event(created).startswith('event: created\ndata: {"id": 7, "customer_name": "Гость"')
+
+
+def test_publish_filters_and_drops_slow_subscriber():
+    """Изменения получают только подходящие подписчики; переполнивший буфер отключается"""
+    feed = ReservationFeed(buffer_size=1)
+    everyone = FeedSubscriber(1)
+    table_2 = FeedSubscriber(1, table_id=2)
+    terrace = FeedSubscriber(1, location="Terrace")
+    feed._subscribers.update({everyone, table_2, terrace})
+
+    feed.publish([change(1), change(2)])
+
+    assert everyone.dropped.is_set()
+    assert table_2.queue.get_nowait().table_id == 2
+    assert terrace.queue.empty() and not terrace.dropped.is_set()
+    assert feed.stats() == {"subscribers": 2, "published": 2, "dropped": 1}
+
+
+def test_resubscribe_drops_all_subscribers():
+    """После переподключения слушателя все подписчики получают dropped, первая подписка их не трогает"""
+    feed = ReservationFeed()
+    subscribers = {FeedSubscriber(1), FeedSubscriber(1, table_id=2)}
+    feed._subscribers.update(subscribers)
+
+    async def scenario() -> list[bool]:
+        feed._loop = asyncio.get_running_loop()
+        feed._on_subscribe()
+        await asyncio.sleep(0)
+        after_first = [subscriber.dropped.is_set() for subscriber in subscribers]
+        feed._on_subscribe()
+        await asyncio.sleep(0)
+        return after_first
+
+    assert anyio.run(scenario) == [False, False]
+    assert all(subscriber.dropped.is_set() for subscriber in subscribers)
+    assert feed.stats() == {"subscribers": 0, "published": 0, "dropped": 2}
+
+
+def test_feed_drops_client_when_listen_fails(monkeypatch):
+    """Если подписаться на канал не удалось, клиент получает dropped вместо ready"""
+    monkeypatch.setattr(PgNotifyListener, "start", lambda self: None)
+    monkeypatch.setattr(PgNotifyListener, "wait_listening", lambda self, timeout: False)
+    feed = ReservationFeed()
+
+    async def scenario() -> list[str]:
+        return [event async for event in feed.events()]
+
+    assert anyio.run(scenario) == ["event: dropped\ndata: {}\n\n"]
+    assert feed.stats()["subscribers"] == 0
+    assert feed._listener is None
+
+
+def test_feed_streams_committed_changes(committed_session: Session):
+    """Бронь, зафиксированная любым соединением, приходит подписчику событием created"""
+    session = committed_session
+    session.add(Table(id=1, name="A1", seats=2, location="Hall"))
+    session.commit()
+    feed = ReservationFeed(heartbeat=0.1)
+    reservation_time = datetime.now() + timedelta(days=1)
+
+    async def scenario() -> list[str]:
+        events = feed.events(location="Hall")
+        received = [await events.__anext__()]
+        session.add(Reservation(customer_name="Гость", table_id=1, reservation_time=reservation_time,
+                                duration_minutes=60))
+        session.commit()
+        with anyio.fail_after(5):
+            while not received[-1].startswith("event: created"):
+                received.append(await events.__anext__())
+        await events.aclose()
+        return received
+
+    received = anyio.run(scenario)
+
+    assert received[0] == "event: ready\ndata: {}\n\n"
+    assert '"customer_name": "Гость"' in received[-1] and '"location": "Hall"' in received[-1]
+    assert feed.stats()["subscribers"] == 0
+    assert feed._listener is None
+
+
+def test_feed_delivers_long_names_and_locations(committed_session: Session):
+    """Длинные имя и расположение не обрезаются; не помещающееся в уведомление имя приходит как null"""
+    session = committed_session
+    location = "Терраса у окна " * 200
+    long_name, huge_name = "Имя " * 300, "Я" * 4000
+    session.add(Table(id=1, name="A1", seats=2, location=location))
+    session.commit()
+    feed = ReservationFeed(heartbeat=0.1)
+    names = [f"Гость {i}" for i in range(30)] + [long_name, huge_name]
+    reservation_time = datetime.now().replace(microsecond=0) + timedelta(days=1)
+
+    async def scenario() -> list[dict]:
+        events = feed.events(location=location)
+        await events.__anext__()
+        session.add_all([
+            Reservation(customer_name=name, table_id=1, reservation_time=reservation_time + timedelta(hours=i),
+                        duration_minutes=60)
+            for i, name in enumerate(names)
+        ])
+        session.commit()
+        created = []
+        with anyio.fail_after(5):
+            while len(created) < len(names):
+                event = await events.__anext__()
+                if event.startswith("event: created"):
+                    created.append(json.loads(event.split("data: ", 1)[1]))
+        await events.aclose()
+        return created
+
+    created = anyio.run(scenario)
+
+    assert all(event["location"] == location for event in created)
+    assert sorted(event["customer_name"] or "" for event in created) == sorted(names[:-1] + [""])
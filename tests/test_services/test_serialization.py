@@ -0,0 +1,43 @@
+import json
+from datetime import datetime
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.schemas.reservation import ReservationResponse
+from app.schemas.table import TableAvailability
+from app.services.serialization import RESERVATION_ROWS, TABLE_AVAILABILITY_ROWS, json_rows_response
+
+
+def as_response_model(model, rows: list[dict]):
+    """JSON прежнего пути: валидация response_model и jsonable_encoder."""
+    return jsonable_encoder(TypeAdapter(list[model]).validate_python(rows))
+
+
+def test_dump_json_matches_response_model():
+    """Быстрая сериализация дает тот же JSON, что и response_model"""
+    rows = [
+        {"id": 1, "customer_name": "Гость", "table_id": 3,
+         "reservation_time": datetime(2030, 1, 1, 18, 30, 15, 250000), "duration_minutes": 90},
+        {"id": 2, "customer_name": 'quote " and \\ slash', "table_id": 4,
+         "reservation_time": datetime(2030, 1, 2, 9, 0), "duration_minutes": 30},
+    ]
+
+    assert json.loads(RESERVATION_ROWS.dump_json(rows)) == as_response_model(ReservationResponse, rows)
+
+
+def test_dump_json_nested_rows():
+    """Вложенные интервалы свободного времени сериализуются как в TableAvailability"""
+    rows = [{
+        "id": 1, "name": "A1", "seats": 4, "location": "Hall",
+        "free": [{"start": datetime(2030, 1, 1, 12, 0), "end": datetime(2030, 1, 1, 14, 0)}],
+    }]
+
+    assert json.loads(TABLE_AVAILABILITY_ROWS.dump_json(rows)) == as_response_model(TableAvailability, rows)
+
+
+def test_json_rows_response_headers():
+    """Ответ несет JSON и переданные заголовки"""
+    response = json_rows_response(RESERVATION_ROWS, [], {"ETag": 'W/"reservations-1"'})
+
+    assert response.body == b"[]"
+    assert response.media_type == "application/json"
+    assert response.headers["etag"] == 'W/"reservations-1"'
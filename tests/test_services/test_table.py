@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+import anyio
+from sqlmodel import Session
+from app.database import ThreadPoolSession
+from app.models.models import Reservation, Table
+from app.services.table import find_available_tables
+
+
+WINDOW_START = datetime(2030, 5, 1, 12, 0)
+WINDOW_END = datetime(2030, 5, 1, 22, 0)
+
+
+def add_tables(session: Session) -> tuple[Table, Table, Table]:
+    busy = Table(name="A1", seats=4, location="Hall")
+    free = Table(name="A2", seats=4, location="Hall")
+    small = Table(name="A3", seats=2, location="Terrace")
+    session.add_all([busy, free, small])
+    session.commit()
+    return busy, free, small
+
+
+def test_free_intervals_exclude_reservations(session: Session, db: ThreadPoolSession):
+    """Брони вырезаются из окна, включая выходящие за его границы"""
+    busy, free, _ = add_tables(session)
+    session.add_all([
+        Reservation(customer_name="Early", table_id=busy.id,
+                    reservation_time=WINDOW_START - timedelta(hours=1), duration_minutes=120),
+        Reservation(customer_name="Dinner", table_id=busy.id,
+                    reservation_time=datetime(2030, 5, 1, 18, 0), duration_minutes=90),
+    ])
+    session.commit()
+
+    tables = anyio.run(find_available_tables, db, WINDOW_START, WINDOW_END, 4)
+
+    assert [table["id"] for table in tables] == [busy.id, free.id]
+    assert tables[0]["free"] == [
+        {"start": datetime(2030, 5, 1, 13, 0), "end": datetime(2030, 5, 1, 18, 0)},
+        {"start": datetime(2030, 5, 1, 19, 30), "end": WINDOW_END},
+    ]
+    assert tables[1]["free"] == [{"start": WINDOW_START, "end": WINDOW_END}]
+
+
+def test_fully_booked_table_has_no_free_intervals(session: Session, db: ThreadPoolSession):
+    """Полностью занятый столик возвращается с пустым списком"""
+    _, _, small = add_tables(session)
+    session.add(Reservation(customer_name="All day", table_id=small.id,
+                            reservation_time=WINDOW_START, duration_minutes=600))
+    session.commit()
+
+    tables = anyio.run(find_available_tables, db, WINDOW_START, WINDOW_END, 1, "Terrace")
+
+    assert tables == [{"id": small.id, "name": "A3", "seats": 2, "location": "Terrace", "free": []}]
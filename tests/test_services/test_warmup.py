@@ -0,0 +1,35 @@
+import anyio
+from sqlalchemy import text
+from app.database import dispose_engine, get_pool, session_scope
+from app.services.warmup import warm_up_pool
+
+
+def test_warm_up_opens_connections(caplog):
+    """Прогрев открывает заданное число соединений, возвращает их в пул и не оставляет броней"""
+
+    async def warm_up() -> tuple[int, int]:
+        await warm_up_pool(2)
+        checked_in = get_pool().checkedin()
+        async with session_scope() as session:
+            reservations = (await session.execute(text("SELECT count(*) FROM reservation"))).scalar()
+        await dispose_engine()
+        return checked_in, reservations
+
+    assert anyio.run(warm_up) == (2, 0)
+    assert "Прогрев пула соединений не удался" not in caplog.text
+
+
+def test_warm_up_failure_is_not_fatal(monkeypatch, caplog):
+    """Ошибка прогрева логируется и не прерывает старт"""
+    async def broken(session):
+        raise RuntimeError("нет соединения")
+
+    monkeypatch.setattr("app.services.warmup.run_hot_statements", broken)
+
+    async def warm_up() -> None:
+        await warm_up_pool(1)
+        await dispose_engine()
+
+    anyio.run(warm_up)
+
+    assert "Прогрев пула соединений не удался" in caplog.text